@@ -0,0 +1 @@
+"""Benchmarks for sattools, to be run with airspeed velocity (asv)."""
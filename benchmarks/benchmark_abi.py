@@ -0,0 +1,106 @@
+"""Benchmarks for ABI utilities."""
+
+import os
+import pathlib
+import datetime
+import tempfile
+import unittest.mock
+
+from fsspec.implementations.local import LocalFileSystem
+from fsspec.implementations.cached import CachingFileSystem
+
+from sattools import s3
+from sattools import abi
+from sattools import synth
+from sattools import prefetch
+
+from . import synthetic
+
+
+class SplitMeso:
+    """Split a multiscene where the MESO sector moves every hour."""
+
+    params = [10, 100, 1000, 10000]
+    param_names = ["n_scenes"]
+    timeout = 600
+
+    def setup(self, n):
+        """Make multiscene with n ABI scenes."""
+        self.ms = synthetic.make_abi_glm_multiscene(
+                n, abi_every=1, move_every=60)
+
+    def time_split_meso(self, n):
+        """Time splitting the multiscene."""
+        for _ in abi.split_meso(self.ms):
+            pass
+
+    def peakmem_split_meso(self, n):
+        """Measure peak memory splitting the multiscene."""
+        for _ in abi.split_meso(self.ms):
+            pass
+
+
+class GetFSFiles:
+    """List ABI files in a local directory posing as the S3 bucket."""
+
+    params = [10, 100, 1000, 10000]
+    param_names = ["n_scans"]
+    timeout = 600
+
+    def setup_cache(self):
+        """Create empty files for the largest size."""
+        root = pathlib.Path("bucket").absolute()
+        synth.make_abi_archive(
+                LocalFileSystem(), synthetic.start_time,
+                synthetic.start_time + datetime.timedelta(minutes=10000),
+                sector="M1", chans=(8, 10, 14), prefix=f"{root!s}/",
+                empty=True)
+        return str(root)
+
+    def setup(self, root, n):
+        """Make S3 point to the local bucket."""
+        self.cwd = os.getcwd()
+        os.chdir(root)
+        self.patcher = unittest.mock.patch("s3fs.S3FileSystem",
+                                           LocalFileSystem)
+        self.patcher.start()
+        s3.clear()
+        self.end = synthetic.start_time + datetime.timedelta(minutes=n)
+
+    def teardown(self, root, n):
+        """Undo setup."""
+        self.patcher.stop()
+        s3.clear()
+        os.chdir(self.cwd)
+
+    def time_get_fsfiles(self, root, n):
+        """Time listing files for one channel."""
+        abi.get_fsfiles(synthetic.start_time, self.end, sector="M1",
+                        chans=14)
+
+
+class Prefetch:
+    """Prefetch scattered byte ranges of a file into the block cache."""
+
+    params = [1, 8]
+    param_names = ["max_workers"]
+
+    def setup(self, max_workers):
+        """Write a 16 MB file and an empty block cache."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "src.nc")
+        with open(self.path, "wb") as fp:
+            fp.write(os.urandom(2**24))
+        self.fs = CachingFileSystem(
+                fs=LocalFileSystem(),
+                cache_storage=os.path.join(self.tmpdir.name, "cache"))
+        self.ranges = [(i, i + 2**17) for i in range(0, 2**24, 2**18)]
+
+    def teardown(self, max_workers):
+        """Remove the file and the cache."""
+        self.tmpdir.cleanup()
+
+    def time_prefetch(self, max_workers):
+        """Time prefetching every other 128 kB."""
+        prefetch.prefetch(self.fs, self.path, self.ranges,
+                          max_workers=max_workers)
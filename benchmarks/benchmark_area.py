@@ -0,0 +1,24 @@
+"""Benchmarks for area utilities."""
+
+from sattools import area
+
+from sattools import synth
+
+
+class JoinAreadefs:
+    """Join the areas of a moving MESO sector."""
+
+    params = [10, 100, 1000, 10000]
+    param_names = ["n_areas"]
+
+    def setup(self, n):
+        """Make n distinct areas."""
+        self.areas = list(synth.make_areas(n, move_every=1))
+
+    def time_join_areadefs(self, n):
+        """Time joining areas."""
+        area.join_areadefs(*self.areas)
+
+    def peakmem_join_areadefs(self, n):
+        """Measure peak memory joining areas."""
+        area.join_areadefs(*self.areas)
@@ -0,0 +1,47 @@
+"""Benchmarks for time coverage arithmetic."""
+
+import numpy
+import pandas
+
+from sattools.coverage import Coverage
+
+sizes = [1000, 100000, 1000000]
+
+
+def _make(n, seed):
+    """Make n one-minute intervals in shuffled order with some missing."""
+    rng = numpy.random.default_rng(seed)
+    starts = (numpy.datetime64("1900-01-01", "ns")
+              + rng.permutation(n * 11 // 10)[:n].astype("m8[m]"))
+    return (starts, starts + numpy.timedelta64(1, "m"))
+
+
+class CoverageArithmetic:
+    """Merge, intersect and find gaps for n one-minute files."""
+
+    params = sizes
+    param_names = ["n_intervals"]
+
+    def setup(self, n):
+        """Make random file times."""
+        self.times = _make(n, 0)
+        self.a = Coverage(*self.times)
+        self.b = Coverage(*_make(n, 1))
+        self.end = pandas.Timestamp("1900-01-01") + pandas.Timedelta(
+                minutes=n * 11 // 10)
+
+    def time_merge(self, n):
+        """Time building coverage from unsorted intervals."""
+        Coverage(*self.times)
+
+    def time_gaps(self, n):
+        """Time finding gaps."""
+        self.a.gaps("1900-01-01", self.end)
+
+    def time_intersection(self, n):
+        """Time intersecting two coverages."""
+        self.a & self.b
+
+    def time_union(self, n):
+        """Time joining two coverages."""
+        self.a | self.b
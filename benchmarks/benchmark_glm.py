@@ -0,0 +1,107 @@
+"""Benchmarks for GLM utilities.
+
+The GLM archive is simulated with synthetic files below a temporary
+``$NAS_DATA``, see :mod:`sattools.synth`.
+"""
+
+import os
+import pathlib
+
+import pandas
+
+from sattools import glm
+from sattools import synth
+
+from . import synthetic
+
+sizes = [10, 100, 1000, 10000]
+
+
+def _get_end(n):
+    return pandas.Timestamp(synthetic.start_time) + pandas.Timedelta(
+            minutes=n)
+
+
+class FindCoverageGaps:
+    """Find gaps in an archive with one minute missing every ten."""
+
+    params = sizes
+    param_names = ["n_minutes"]
+    timeout = 600
+
+    def setup_cache(self):
+        """Create empty files for the largest size."""
+        nas = pathlib.Path("nas").absolute()
+        os.environ["NAS_DATA"] = str(nas)
+        gaps = [(_get_end(i), _get_end(i+1))
+                for i in range(0, max(sizes), 10)]
+        synth.make_glm_archive(synthetic.start_time, _get_end(max(sizes)),
+                               gaps=gaps, empty=True)
+        return str(nas)
+
+    def setup(self, nas, n):
+        """Point $NAS_DATA to the archive."""
+        os.environ["NAS_DATA"] = nas
+
+    def time_find_glm_coverage_gaps(self, nas, n):
+        """Time finding gaps."""
+        list(glm.find_glm_coverage_gaps(synthetic.start_time, _get_end(n)))
+
+    def peakmem_find_glm_coverage_gaps(self, nas, n):
+        """Measure peak memory finding gaps."""
+        list(glm.find_glm_coverage_gaps(synthetic.start_time, _get_end(n)))
+
+    def time_locate_glm_files(self, nas, n):
+        """Time listing the hour directories."""
+        glm.locate_glm_files(synthetic.start_time, _get_end(n))
+
+
+class EnsureGLM:
+    """Ensure GLM for a period that is already fully covered."""
+
+    params = sizes
+    param_names = ["n_minutes"]
+    timeout = 600
+
+    def setup_cache(self):
+        """Create empty files for the largest size."""
+        nas = pathlib.Path("nas").absolute()
+        os.environ["NAS_DATA"] = str(nas)
+        synth.make_glm_archive(synthetic.start_time, _get_end(max(sizes)),
+                               empty=True)
+        return str(nas)
+
+    def setup(self, nas, n):
+        """Point $NAS_DATA to the archive."""
+        os.environ["NAS_DATA"] = nas
+
+    def time_ensure_glm_for_period(self, nas, n):
+        """Time ensuring GLM."""
+        list(glm.ensure_glm_for_period(synthetic.start_time, _get_end(n)))
+
+    def time_ensure_glm_for_periods(self, nas, n):
+        """Time ensuring GLM for five-minute events every ten minutes."""
+        glm.ensure_glm_for_periods(
+                [(_get_end(i), _get_end(i+5)) for i in range(0, n, 10)])
+
+
+class IntegratedScene:
+    """Sum GLM flash extent densities from many files."""
+
+    params = sizes
+    param_names = ["n_files"]
+    timeout = 1800
+
+    def setup_cache(self):
+        """Write gridded GLM files for the largest size."""
+        os.environ["NAS_DATA"] = str(pathlib.Path("nas").absolute())
+        return [str(f) for f in synth.make_glm_archive(
+            synthetic.start_time, _get_end(max(sizes)), shape=(50, 50))]
+
+    def time_get_integrated_scene(self, files, n):
+        """Time integrating the scene."""
+        glm.get_integrated_scene(files[:n])["flash_extent_density"].compute()
+
+    def peakmem_get_integrated_scene(self, files, n):
+        """Measure peak memory integrating the scene."""
+        glm.get_integrated_scene(files[:n])["flash_extent_density"].compute()
@@ -0,0 +1,28 @@
+"""Benchmarks for import time of the command line tools.
+
+Each import is timed in a fresh interpreter, such that nothing is already
+imported.
+"""
+
+
+class ImportTime:
+    """Time importing sattools modules."""
+
+    def timeraw_import_sattools(self):
+        """Time importing the sattools package."""
+        return "import sattools"
+
+    def timeraw_import_showsat(self):
+        """Time importing the show-sat script."""
+        return "import sattools.processing.showsat"
+
+    def timeraw_import_video(self):
+        """Time importing the show-sat-video-* scripts."""
+        return "import sattools.processing.video"
+
+    def timeraw_showsat_parser(self):
+        """Time importing and parsing the show-sat command line."""
+        return """
+        from sattools.processing import showsat
+        showsat.get_parser().parse_args(["out", "in.nc", "-a", "germ"])
+        """
@@ -0,0 +1,109 @@
+"""Track traced memory peaks for functions that process many scenes.
+
+Unlike asv's ``peakmem`` benchmarks, which report the maximum resident set
+size of the whole process, these report the peak of the allocations traced
+by :mod:`tracemalloc` and the sampled peak resident set size during the
+call only, see :mod:`sattools.memory`.  Inputs are generated one scene at a
+time, such that they do not count towards the peak.
+"""
+
+import os
+import pathlib
+import tempfile
+import unittest.mock
+
+import pandas
+import satpy
+
+from sattools import glm
+from sattools import vis
+from sattools import synth
+from sattools import scutil
+from sattools import memory
+
+from . import synthetic
+
+sizes = [10, 100, 1000]
+
+
+class _Tracked:
+    """Mixin to track both memory measures for ``_run``."""
+
+    unit = "bytes"
+
+    def _measure(self, *args):
+        with memory.MemoryMonitor() as mm:
+            self._run(*args)
+        return mm
+
+    def track_traced_peak(self, *args):
+        """Track peak traced allocations."""
+        return self._measure(*args).traced_peak
+
+    def track_rss_peak(self, *args):
+        """Track peak resident set size."""
+        return self._measure(*args).rss_peak
+
+
+class CollapseScenes(_Tracked):
+    """Collapse scenes with GLM every minute and ABI every five."""
+
+    params = sizes
+    param_names = ["n_scenes"]
+    timeout = 600
+
+    def _run(self, n):
+        for sc in scutil.collapse_abi_glm_scenes(synth.make_abi_glm_scenes(
+                n, shape=(200, 200), start=synthetic.start_time)):
+            sc["flash_extent_density"].values
+
+
+class IntegratedScene(_Tracked):
+    """Sum GLM flash extent densities from many files."""
+
+    params = sizes
+    param_names = ["n_files"]
+    timeout = 1800
+
+    def setup_cache(self):
+        """Write gridded GLM files for the largest size."""
+        os.environ["NAS_DATA"] = str(pathlib.Path("nas").absolute())
+        return [str(f) for f in synth.make_glm_archive(
+            synthetic.start_time,
+            synthetic.start_time + pandas.Timedelta(minutes=max(sizes)),
+            shape=(200, 200))]
+
+    def _run(self, files, n):
+        glm.get_integrated_scene(files[:n])
+
+
+def _fake_multiscenes(start_date, end_date, **kwargs):
+    n = int((end_date - start_date) / pandas.Timedelta("1min"))
+    yield satpy.MultiScene(list(synth.make_abi_glm_scenes(
+        n, shape=(200, 200), abi_every=1, start=start_date)))
+
+
+class ShowVideoSegments(_Tracked):
+    """Show a video in ten minute segments from synthetic scenes."""
+
+    params = [10, 100]
+    param_names = ["n_scenes"]
+    timeout = 1800
+
+    def setup(self, n):
+        """Prepare output directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def teardown(self, n):
+        """Remove output."""
+        self.tmpdir.cleanup()
+
+    def _run(self, n):
+        with unittest.mock.patch("sattools.scutil.get_abi_glm_multiscenes",
+                                 new=_fake_multiscenes):
+            vis.show_video_abi_glm_times(
+                    pandas.Timestamp(synthetic.start_time),
+                    pandas.Timestamp(synthetic.start_time)
+                    + pandas.Timedelta(minutes=n),
+                    pathlib.Path(self.tmpdir.name),
+                    enh_args={"enhance": False}, segment_duration="10min")
@@ -0,0 +1,65 @@
+"""Benchmarks for scene and multiscene utilities."""
+
+import os
+import pathlib
+import datetime
+
+from sattools import scutil
+from sattools import synth
+
+from . import synthetic
+
+sizes = [10, 100, 1000, 10000]
+
+
+class CollapseMultiScene:
+    """Collapse a multiscene with GLM every minute and ABI every five."""
+
+    params = sizes
+    param_names = ["n_scenes"]
+    timeout = 600
+
+    def setup(self, n):
+        """Make multiscene with n scenes."""
+        self.ms = synthetic.make_abi_glm_multiscene(
+                n, shape=(50, 50), abi_every=5)
+
+    def time_collapse_abi_glm_multiscene(self, n):
+        """Time collapsing the multiscene."""
+        for sc in scutil.collapse_abi_glm_multiscene(self.ms).scenes:
+            pass
+
+    def peakmem_collapse_abi_glm_multiscene(self, n):
+        """Measure peak memory collapsing the multiscene."""
+        for sc in scutil.collapse_abi_glm_multiscene(self.ms).scenes:
+            pass
+
+
+class ResampledMultiScene:
+    """Resample files from a moving sector to the joint area."""
+
+    params = sizes
+    param_names = ["n_files"]
+    timeout = 1800
+
+    def setup_cache(self):
+        """Write gridded GLM files for the largest size."""
+        os.environ["NAS_DATA"] = str(pathlib.Path("nas").absolute())
+        return [str(f) for f in synth.make_glm_archive(
+            synthetic.start_time,
+            synthetic.start_time + datetime.timedelta(minutes=max(sizes)),
+            shape=(20, 20), move_every=60)]
+
+    def _resample(self, files, n):
+        (_, mr) = scutil.get_resampled_multiscene(
+                files[:n], ["glm_l2"], "flash_extent_density", [])
+        for sc in mr.scenes:
+            sc["flash_extent_density"].compute()
+
+    def time_get_resampled_multiscene(self, files, n):
+        """Time getting and computing the resampled multiscene."""
+        self._resample(files, n)
+
+    def peakmem_get_resampled_multiscene(self, files, n):
+        """Measure peak memory getting the resampled multiscene."""
+        self._resample(files, n)
@@ -0,0 +1,100 @@
+"""Benchmarks for visualisation routines.
+
+Composites are defined by satpy's composite configuration, so the
+benchmarks comparing composite strategies need real ABI L1b data.  Set
+``SATTOOLS_BENCHMARK_ABI`` to a glob pattern matching ABI L1b files for one
+time slot with all 16 channels.  Optionally, set
+``SATTOOLS_BENCHMARK_AREA`` to the target area (default:
+``goes_east_abi_c_2km``).  Without data, these benchmarks are skipped.
+
+Other benchmarks use synthetic GLM data.
+"""
+
+import glob
+import os
+import pathlib
+import datetime
+import tempfile
+
+from sattools import vis
+from sattools import synth
+
+from . import synthetic
+
+
+class ShowCompositeStrategy:
+    """Compare composite-first and resample-first per composite."""
+
+    params = (["airmass", "ash", "natural_color", "true_color"],
+              ["composite_first", "resample_first"])
+    param_names = ["composite", "strategy"]
+    timeout = 1800
+
+    def setup(self, composite, strategy):
+        """Find input files or skip."""
+        self.files = sorted(glob.glob(
+            os.environ.get("SATTOOLS_BENCHMARK_ABI", "")))
+        if not self.files:
+            raise NotImplementedError("No ABI data for benchmark")
+        self.area = os.environ.get(
+                "SATTOOLS_BENCHMARK_AREA", "goes_east_abi_c_2km")
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def teardown(self, composite, strategy):
+        """Remove output."""
+        self.tmpdir.cleanup()
+
+    def _show(self, composite, strategy):
+        vis.show(self.files, [], [composite], [self.area],
+                 self.tmpdir.name, "{area:s}_{dataset:s}.tif",
+                 reader="abi_l1b", strategy=strategy)
+
+    def time_show(self, composite, strategy):
+        """Time producing one composite for one area."""
+        self._show(composite, strategy)
+
+    def peakmem_show(self, composite, strategy):
+        """Measure peak memory producing one composite for one area."""
+        self._show(composite, strategy)
+
+
+class ShowSynthetic:
+    """Show flash extent density from a synthetic GLM file."""
+
+    params = [10, 100, 1000]
+    param_names = ["side"]
+    timeout = 600
+
+    def setup_cache(self):
+        """Write a GLM file for each size."""
+        files = {}
+        for side in self.params:
+            os.environ["NAS_DATA"] = str(
+                    pathlib.Path(f"nas{side:d}").absolute())
+            (files[side],) = (str(f) for f in synth.make_glm_archive(
+                synthetic.start_time,
+                synthetic.start_time + datetime.timedelta(minutes=1),
+                shape=(side, side)))
+        return files
+
+    def setup(self, files, side):
+        """Prepare output directory and target area."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.area = synth.make_area((side//2, side//2))
+
+    def teardown(self, files, side):
+        """Remove output."""
+        self.tmpdir.cleanup()
+
+    def _show(self, files, side):
+        vis.show([files[side]], ["flash_extent_density"], [], [self.area],
+                 self.tmpdir.name, "{area:s}_{dataset:s}.tif",
+                 reader="glm_l2")
+
+    def time_show(self, files, side):
+        """Time showing one dataset for one area."""
+        self._show(files, side)
+
+    def peakmem_show(self, files, side):
+        """Measure peak memory showing one dataset for one area."""
+        self._show(files, side)
@@ -0,0 +1,27 @@
+"""Synthetic ABI- and GLM-like scenes for the benchmarks.
+
+Synthetic scenes and files are made by :mod:`sattools.synth`.
+"""
+
+import datetime
+
+import satpy
+
+from sattools import synth
+
+start_time = datetime.datetime(1900, 1, 1)
+
+
+def make_abi_glm_multiscene(n, shape=(5, 5), abi_every=5, move_every=None):
+    """Make a multiscene with GLM in every scene and ABI in some.
+
+    See :func:`sattools.synth.make_abi_glm_scenes`.
+
+    Args:
+        n (int): Number of scenes.
+        shape (Tuple[int, int]): Shape of each dataset.
+        abi_every (int): Include ABI in every so many scenes.
+        move_every (int): Move the area every so many scenes.
+    """
+    return satpy.MultiScene(list(synth.make_abi_glm_scenes(
+        n, shape, abi_every, move_every, start=start_time)))
@@ -3,11 +3,31 @@
 import collections.abc
 
 import appdirs
-import s3fs
-import fsspec.implementations.cached
 
-import satpy
-from typhon.files.fileset import FileSet
+from . import s3
+from . import log
+from .lazy import lazy_import
+
+satpy = lazy_import("satpy.readers")
+typhon = lazy_import("typhon.files.fileset")
+dask = lazy_import("dask")
+pyresample = lazy_import("pyresample.geometry")
+
+#: Dask chunk size for region of interest reads, small enough that satpy
+#: uses its smallest dask chunks, see :func:`get_roi_scene`
+roi_chunk_size = "1MiB"
+
+
+def get_pattern_s3_abi(sector="F"):
+    """Return filename pattern for ABI L1b files on NOAA's S3 bucket.
+
+    The pattern matches all channels.
+    """
+    return (f"noaa-goes16/ABI-L1b-Rad{sector[0]:s}/"
+            "{year}/{doy}/{hour}/"
+            f"OR_ABI-L1b-Rad{sector:s}-M6C*_G16_"
+            "s{year}{doy}{hour}{minute}{second}*_e{end_year}{end_doy}"
+            "{end_hour}{end_minute}{end_second}*_c*.nc")
 
 
 def get_fsfiles(start_date, end_date, sector="F", chans=14):
@@ -17,18 +37,18 @@ def get_fsfiles(start_date, end_date, sector="F", chans=14):
 
     Chans is a channel number or an array of channel numbers.
 
-    Returns a list of FSFile instances.
+    Returns a list of FSFile instances.  They share the S3 filesystem
+    and block cache, see :mod:`sattools.s3`.
     """
     cachedir = appdirs.user_cache_dir("ABI-block-cache")
 
     if not isinstance(chans, collections.abc.Iterable):
         chans = {chans}
 
-    fs_s3 = s3fs.S3FileSystem(anon=True)
+    fs_s3 = s3.get_filesystem()
 
-    fs_block = fsspec.implementations.cached.CachingFileSystem(
-            fs=fs_s3,
-            cache_storage=cachedir,
+    fs_block = s3.get_caching_filesystem(
+            cachedir,
             cache_check=600,
             check_files=False,
             expiry_times=False,
@@ -36,20 +56,54 @@ def get_fsfiles(start_date, end_date, sector="F", chans=14):
 
     # satpy can't search recursively, only directly in the same directory
     # therefore use typhon, and filter channels manually later
-    abi_fileset = FileSet(
-            path=f"noaa-goes16/ABI-L1b-Rad{sector[0]:s}/"
-                 "{year}/{doy}/{hour}/"
-                 f"OR_ABI-L1b-Rad{sector:s}-M6C*_G16_"
-                 "s{year}{doy}{hour}{minute}{second}*_e{end_year}{end_doy}"
-                 "{end_hour}{end_minute}{end_second}*_c*.nc",
+    abi_fileset = typhon.files.fileset.FileSet(
+            path=get_pattern_s3_abi(sector),
             name="abi",
             fs=fs_s3)
-    files = list(
-            fi for fi in abi_fileset.find(start_date, end_date)
-            if any(f"C{c:>02d}_" in fi.path for c in chans))
+    with log.Span("abi.list_s3") as sp:
+        files = list(
+                fi for fi in abi_fileset.find(start_date, end_date)
+                if any(f"C{c:>02d}_" in fi.path for c in chans))
+        sp.add(items=len(files))
     return [satpy.readers.FSFile(fi.path, fs=fs_block) for fi in files]
 
 
+def get_roi_scene(fsfiles, roi, channels, reader="abi_l1b"):
+    """Get scene for a region of interest only.
+
+    Loads channels from ABI files and crops them to the region of interest,
+    which can be much smaller than the sector.  Data are read lazily, with
+    the smallest dask chunks that satpy supports: 226 by 226 pixels at 2 km,
+    452 at 1 km, and 904 at 500 m.  Satpy aligns those with on-disk chunks
+    of 226 by 226 pixels, as in full disk files, such that a dask chunk
+    covers one, four, or sixteen chunks on disk.  CONUS and mesoscale files
+    have on-disk chunks of 250 by 250 pixels, which the dask chunks do not
+    align with, such that a dask chunk can touch a few more.  Cropping
+    selects the rows and columns in the ABI fixed grid that overlap the
+    region of interest, such that computing the scene reads only the dask
+    chunks that overlap, and the chunks on disk they cover.  With FSFile
+    objects from :func:`get_fsfiles`, only those are downloaded.
+
+    Args:
+        fsfiles (List): Files to read, such as from :func:`get_fsfiles`.
+        roi (AreaDefinition or Tuple[float, float, float, float]): Region
+            of interest.  Either an area, or a box in degrees as
+            (lon_min, lat_min, lon_max, lat_max).
+        channels (List[str]): Channels to load, such as ``["C14"]``.
+        reader (str): Satpy reader.
+
+    Returns:
+        satpy.Scene, cropped to the region of interest.
+    """
+    with dask.config.set({"array.chunk-size": roi_chunk_size}), \
+            log.Span("abi.load_roi"):
+        sc = satpy.Scene(filenames=fsfiles, reader=reader)
+        sc.load(channels)
+    if isinstance(roi, pyresample.geometry.AreaDefinition):
+        return sc.crop(area=roi)
+    return sc.crop(ll_bbox=tuple(roi))
+
+
 def split_meso(ms):
     """Split a meso-multiscene into smaller multiscenes.
 
@@ -1,6 +1,9 @@
 """Utilities to manipulate pyresample areas."""
 import numpy
-import pyresample
+
+from .lazy import lazy_import
+
+pyresample = lazy_import("pyresample.geometry")
 
 
 def join_areadefs(*areas):
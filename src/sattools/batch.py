@@ -0,0 +1,205 @@
+"""Run many visualisation jobs in a single process.
+
+Starting a process per job means paying the import of satpy, the parsing
+of area definitions, and the calculation of resampling lookup tables every
+time.  Instead, a manifest lists many jobs, which are then run by a pool of
+worker threads sharing the area catalogue.  Each worker keeps its own
+resampling and overlay caches between jobs.
+
+A manifest is either YAML or JSON Lines.  In YAML, it is a list of jobs,
+or a mapping with ``jobs`` and optional ``defaults`` for all jobs::
+
+    defaults:
+      outdir: /tmp/out
+      areas: [eurol]
+    jobs:
+      - files: [/data/a.nc, /data/b.nc]
+        composites: [overview]
+      - name: fog
+        files: /data/c*.nc
+        composites: [fog]
+        areas: [germ, native]
+
+In JSON Lines, each line is one job.  The keys of a job correspond to the
+command line options of ``show-sat``: ``files`` (a list of paths or a glob
+pattern), ``outdir``, ``channels``, ``composites``, ``areas``,
+``filename_pattern``, ``reader``, ``coastline_dir``,
+``show_only_coastlines``, ``quicklook``, ``cog``, ``strategy``, and
+additionally ``label`` and ``name``.
+"""
+
+import glob
+import json
+import time
+import logging
+import pathlib
+import itertools
+import threading
+import concurrent.futures
+
+import yaml
+
+from . import io
+from . import ptc
+from . import vis
+
+logger = logging.getLogger(__name__)
+
+job_keys = {"name", "files", "outdir", "channels", "composites", "areas",
+            "filename_pattern", "reader", "coastline_dir",
+            "show_only_coastlines", "quicklook", "cog", "strategy", "label"}
+
+
+def read_manifest(path):
+    """Read jobs from a manifest.
+
+    Files ending in ``.jsonl`` or ``.ndjson`` are read as JSON Lines, any
+    other files as YAML.  Defaults in a YAML manifest are applied to each
+    job.
+
+    Args:
+        path (str or pathlib.Path): Path to manifest.
+
+    Returns:
+        List of dictionaries, one per job.
+    """
+    path = pathlib.Path(path)
+    with path.open("r", encoding="utf-8") as fp:
+        if path.suffix in (".jsonl", ".ndjson"):
+            return [json.loads(line) for line in fp if line.strip()]
+        content = yaml.safe_load(fp)
+    if isinstance(content, list):
+        return content
+    defaults = content.get("defaults", {})
+    return [{**defaults, **job} for job in content["jobs"]]
+
+
+def _get_show_kwargs(job, areas):
+    """Translate job to keyword arguments for vis.show."""
+    unknown = job.keys() - job_keys
+    if unknown:
+        raise ValueError("Unknown keys in job: " + ", ".join(sorted(unknown)))
+    files = job["files"]
+    if isinstance(files, str):
+        files = sorted(glob.glob(files))
+        if not files:
+            raise FileNotFoundError(f"No files matching {job['files']:s}")
+    return dict(
+            files=[pathlib.Path(f) for f in files],
+            channels=job.get("channels", []),
+            composites=job.get("composites", []),
+            regions=[areas.get(ar, ar) for ar in job.get("areas", [])],
+            d_out=pathlib.Path(job["outdir"]),
+            fn_out=job.get("filename_pattern",
+                           "{label:s}_{area:s}_{dataset:s}.tiff"),
+            reader=job.get("reader"),
+            path_to_coastlines=job.get("coastline_dir"),
+            label=job.get("label", ""),
+            show_only_coastlines=job.get("show_only_coastlines", False),
+            quicklook=job.get("quicklook"),
+            cog=job.get("cog", False),
+            strategy=job.get("strategy", "composite_first"))
+
+
+def prepare_cache_dir(cache_dir=None):
+    """Create directories for the resampling and overlay caches.
+
+    Args:
+        cache_dir (str or pathlib.Path): Base directory.  If not given, use
+            a subdirectory of the sattools cache directory.
+
+    Returns:
+        pathlib.Path to the base directory.
+    """
+    cache_dir = pathlib.Path(
+            cache_dir or io.get_cache_dir(subdir="sattools-batch"))
+    for sub in ("resample", "overlay"):
+        (cache_dir / sub).mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def run_job(job, areas, cache_dir, scene_cache=None):
+    """Run a single job and report its outcome.
+
+    Failures are logged and reported rather than raised, such that one
+    failing job does not stop the others.
+
+    Args:
+        job (Mapping): Job as read from a manifest.
+        areas (Mapping): Area definitions per area name, such as from
+            :func:`sattools.ptc.get_all_areas`.
+        cache_dir (pathlib.Path): Directory for the shared resampling and
+            overlay caches.
+        scene_cache (sattools.scutil.SceneCache): Optional cache of
+            recently created scenes.
+
+    Returns:
+        Dictionary with the job ``name``, the ``status`` ("ok" or
+        "failed"), the ``files`` written, the ``error`` if any, and the
+        ``duration`` in seconds.
+    """
+    name = job.get("name", "")
+    t0 = time.perf_counter()
+    result = {"name": name, "status": "ok", "files": [], "error": None}
+    try:
+        kwargs = _get_show_kwargs(job, areas)
+        files = vis.show(
+                **kwargs,
+                resample_cache_dir=cache_dir / "resample",
+                overlay_cache_dir=cache_dir / "overlay",
+                scene_cache=scene_cache)
+    except Exception as e:
+        logger.exception(f"Job {name!s} failed")
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__:s}: {e!s}"
+    else:
+        result["files"] = sorted(str(f) for f in files)
+    result["duration"] = time.perf_counter() - t0
+    return result
+
+
+def run_jobs(jobs, max_workers=1, areas=None, cache_dir=None):
+    """Run many jobs with a bounded pool of worker threads.
+
+    All jobs share the area definitions.  Pyresample and pycoast do not
+    write their cache files atomically, such that with more than one
+    worker, each worker uses its own caches for resampling lookup tables
+    and coastline overlays, in a subdirectory ``worker-<n>`` of
+    ``cache_dir``.
+
+    Args:
+        jobs (List[Mapping]): Jobs, such as from :func:`read_manifest`.
+        max_workers (int): Maximum number of jobs to run at the same time.
+        areas (Mapping): Area definitions per area name.  If not given, use
+            :func:`sattools.ptc.get_all_areas`.
+        cache_dir (str or pathlib.Path): Directory for the caches.  If not
+            given, use a subdirectory of the sattools cache directory.
+
+    Returns:
+        List of results, in the order of the jobs, as returned by
+        :func:`run_job`.
+    """
+    if areas is None:
+        areas = ptc.get_all_areas()
+    cache_dir = prepare_cache_dir(cache_dir)
+    jobs = [{"name": str(i), **job} for (i, job) in enumerate(jobs)]
+    # create area definitions once, before jobs start using them
+    for job in jobs:
+        for ar in job.get("areas", []):
+            if isinstance(ar, str) and ar in areas:
+                areas[ar]
+    worker = threading.local()
+    worker_ids = itertools.count()
+
+    def run(job):
+        if max_workers == 1:
+            return run_job(job, areas, cache_dir)
+        if not hasattr(worker, "cache_dir"):
+            worker.cache_dir = prepare_cache_dir(
+                    cache_dir / f"worker-{next(worker_ids):d}")
+        return run_job(job, areas, worker.cache_dir)
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        results = list(executor.map(run, jobs))
+    n_failed = sum(r["status"] == "failed" for r in results)
+    logger.info(f"Ran {len(results):d} jobs, {n_failed:d} failed")
+    return results
@@ -0,0 +1,153 @@
+"""Time coverage as sets of intervals.
+
+Archives of GLM files can contain hundreds of thousands of files, each
+covering one minute.  The :class:`Coverage` keeps the covered time as
+sorted arrays of start and end times, such that unions, gaps,
+intersections, and coverage checks are computed with numpy rather than by
+looping over ``pandas.Interval`` objects.
+
+Example::
+
+    cov = Coverage(starts, ends)
+    for gap in cov.gaps(start_date, end_date):
+        ...
+"""
+
+import numpy
+
+from .lazy import lazy_import
+
+pandas = lazy_import("pandas")
+
+
+def _to_dt64(times):
+    """Convert times to an array of datetime64[ns]."""
+    return numpy.asarray(
+            pandas.to_datetime(numpy.atleast_1d(times)), dtype="M8[ns]")
+
+
+class Coverage:
+    """Set of half-open time intervals.
+
+    Intervals may be passed in any order and may overlap or touch.  They are
+    merged into sorted, disjoint intervals, available as the arrays
+    ``starts`` and ``ends``.  Empty intervals are dropped.  Iterating yields
+    each merged interval as a ``pandas.Interval``.
+    """
+
+    def __init__(self, starts=(), ends=()):
+        """Initialise coverage from start and end times.
+
+        Args:
+            starts (array_like): Start times of intervals.
+            ends (array_like): End times of intervals, same length as
+                ``starts``.
+        """
+        starts = _to_dt64(starts)
+        ends = _to_dt64(ends)
+        if starts.shape != ends.shape:
+            raise ValueError("Need as many start times as end times, got "
+                             f"{starts.size:d} and {ends.size:d}")
+        keep = ends > starts
+        (starts, ends) = (starts[keep], ends[keep])
+        order = numpy.argsort(starts, kind="stable")
+        (starts, ends) = (starts[order], ends[order])
+        reach = numpy.maximum.accumulate(ends) if ends.size else ends
+        new = numpy.ones(starts.size, dtype="?")
+        new[1:] = starts[1:] > reach[:-1]
+        first = numpy.flatnonzero(new)
+        self.starts = starts[first]
+        self.ends = reach[numpy.r_[first[1:] - 1, starts.size - 1]] \
+            if first.size else reach[:0]
+
+    @classmethod
+    def from_intervals(cls, intervals):
+        """Make coverage from intervals.
+
+        Args:
+            intervals (Iterable): ``pandas.Interval`` objects or pairs of
+                start and end times.
+        """
+        pairs = [(iv.left, iv.right) if isinstance(iv, pandas.Interval)
+                 else iv for iv in intervals]
+        if not pairs:
+            return cls()
+        (starts, ends) = zip(*pairs)
+        return cls(starts, ends)
+
+    def __len__(self):
+        """Number of disjoint intervals."""
+        return self.starts.size
+
+    def __iter__(self):
+        """Yield disjoint intervals as ``pandas.Interval``."""
+        for (s, e) in zip(self.starts, self.ends):
+            yield pandas.Interval(pandas.Timestamp(s), pandas.Timestamp(e))
+
+    def __eq__(self, other):
+        """Check whether two coverages cover the same time."""
+        if not isinstance(other, Coverage):
+            return NotImplemented
+        return (numpy.array_equal(self.starts, other.starts)
+                and numpy.array_equal(self.ends, other.ends))
+
+    def __repr__(self):
+        """Represent as list of intervals."""
+        return f"Coverage({list(self)!r})"
+
+    def __or__(self, other):
+        """Union, see :meth:`union`."""
+        return self.union(other)
+
+    def __and__(self, other):
+        """Intersection, see :meth:`intersection`."""
+        return self.intersection(other)
+
+    @property
+    def duration(self):
+        """Total covered time as ``pandas.Timedelta``."""
+        return pandas.Timedelta((self.ends - self.starts).sum())
+
+    def union(self, other):
+        """Get time covered by this or other coverage."""
+        return Coverage(numpy.concatenate([self.starts, other.starts]),
+                        numpy.concatenate([self.ends, other.ends]))
+
+    def intersection(self, other):
+        """Get time covered by both this and other coverage."""
+        # for each interval here, the range of intervals there overlapping
+        lo = numpy.searchsorted(other.ends, self.starts, side="right")
+        hi = numpy.searchsorted(other.starts, self.ends, side="left")
+        n = numpy.maximum(hi - lo, 0)
+        mine = numpy.repeat(numpy.arange(len(self)), n)
+        offset = numpy.arange(n.sum()) - numpy.repeat(numpy.cumsum(n) - n, n)
+        theirs = numpy.repeat(lo, n) + offset
+        return Coverage(
+                numpy.maximum(self.starts[mine], other.starts[theirs]),
+                numpy.minimum(self.ends[mine], other.ends[theirs]))
+
+    def clip(self, start, end):
+        """Get part of coverage between start and end."""
+        return self.intersection(Coverage(start, end))
+
+    def gaps(self, start, end):
+        """Get time between start and end that is not covered.
+
+        Args:
+            start: Start of period, anything understood by pandas.
+            end: End of period.
+
+        Returns:
+            :class:`Coverage` with the gaps.
+        """
+        inside = self.clip(start, end)
+        return Coverage(numpy.concatenate([_to_dt64(start), inside.ends]),
+                        numpy.concatenate([inside.starts, _to_dt64(end)]))
+
+    def is_fully_covered(self, start, end):
+        """Check whether the period from start to end is fully covered."""
+        (start, end) = (_to_dt64(start)[0], _to_dt64(end)[0])
+        if end <= start:
+            return True
+        i = numpy.searchsorted(self.starts, start, side="right") - 1
+        return bool(i >= 0 and self.ends[i] >= end)
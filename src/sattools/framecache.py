@@ -0,0 +1,188 @@
+"""Content-addressed cache for rendered video frames.
+
+Rendering a video frame (enhancing, decorating, adding overlays) is
+expensive.  When the same frames are needed again, for example because the
+time range of a video was changed by a few minutes, they can be taken from a
+cache instead.  Each frame is stored under a hash of everything that went
+into rendering it.
+"""
+
+import os
+import json
+import hashlib
+import pathlib
+import logging
+
+import numpy
+
+from . import io
+
+logger = logging.getLogger(__name__)
+
+# increase when the way frames are rendered changes incompatibly
+CACHE_VERSION = 1
+
+
+def file_identity(f):
+    """Get an identity for a source file.
+
+    For files on an fsspec filesystem (such as FSFile objects pointing to
+    S3), the identity consists of the path, size, and ETag or modification
+    time reported by the filesystem.  For local files, it consists of the
+    path, size, and modification time.  In either case, a rewritten file
+    gets a new identity.  If the file cannot be found, only the path is
+    used.
+    """
+    p = os.fspath(f) if isinstance(f, (str, os.PathLike)) else str(f)
+    fs = getattr(f, "fs", None)
+    if fs is not None:
+        try:
+            info = fs.info(p)
+        except OSError:
+            return [p]
+        return [p, info.get("size"),
+                info.get("ETag", info.get("mtime", info.get("created")))]
+    try:
+        st = os.stat(p)
+    except (OSError, ValueError):
+        return [p]
+    return [p, st.st_size, st.st_mtime_ns]
+
+
+def area_identity(ar):
+    """Get a JSON-serialisable identity for an area."""
+    if ar is None:
+        return None
+    if hasattr(ar, "defs"):  # StackedAreaDefinition
+        return [area_identity(a) for a in ar.defs]
+    try:
+        return {"crs": ar.crs.to_wkt(),
+                "shape": list(ar.shape),
+                "extent": list(ar.area_extent)}
+    except AttributeError:  # not an AreaDefinition, such as swath
+        return str(ar)
+
+
+_identifying_attrs = (
+        "name", "start_time", "end_time", "platform_name", "sensor",
+        "wavelength", "calibration", "modifiers", "resolution", "units")
+
+
+def get_frame_key(ds, files=(), enh_args=None, fill_value=None):
+    """Calculate the cache key for a frame.
+
+    The key is a hash of the source file identities, the identifying dataset
+    attributes, the area, and the enhancement arguments (such as decorate and
+    overlay configuration).  Without source files, datasets with the same
+    metadata may still differ, so the key then includes a digest of the
+    data, which are computed for that.
+
+    Args:
+        ds (xarray.DataArray): Dataset from which the frame is rendered.
+        files (Iterable): Source files for the scene containing ``ds``.
+        enh_args (Mapping): Enhancement arguments, as passed to
+            ``satpy.writers.get_enhanced_image``.
+        fill_value (int or None): Fill value used when finalising the image.
+
+    Returns:
+        str, hexadecimal digest
+    """
+    import satpy
+    content = {
+        "version": CACHE_VERSION,
+        "satpy": satpy.__version__,
+        "files": sorted(file_identity(f) for f in files),
+        "attrs": {k: ds.attrs.get(k) for k in _identifying_attrs},
+        "area": area_identity(ds.attrs.get("area")),
+        "shape": list(ds.shape),
+        "enh_args": enh_args or {},
+        "fill_value": fill_value}
+    if not content["files"]:
+        content["data"] = hashlib.sha256(
+                numpy.ascontiguousarray(ds.values)).hexdigest()
+    js = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(js.encode("utf-8")).hexdigest()
+
+
+class FrameCache:
+    """Size-bounded on-disk cache of rendered frames.
+
+    Frames are stored as ``.npy`` files named after their key.  When the total
+    size exceeds ``max_size``, the least recently used frames are removed.
+
+    Example::
+
+        cache = FrameCache(max_size=2**30)
+        arr = cache.get(key)
+        if arr is None:
+            arr = render(...)
+            cache.put(key, arr)
+    """
+
+    def __init__(self, cache_dir=None, max_size=2*2**30):
+        """Initialise the frame cache.
+
+        Args:
+            cache_dir (str or pathlib.Path): Directory to store frames.  If not
+                given, use a subdirectory of the sattools cache directory.
+            max_size (int): Maximum total size of cached frames in bytes.
+        """
+        self.cache_dir = pathlib.Path(
+                cache_dir or io.get_cache_dir(subdir="sattools-frames"))
+        self.max_size = max_size
+        self._size = None
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key:s}.npy"
+
+    def _all_paths(self):
+        return self.cache_dir.glob("??/*.npy")
+
+    @property
+    def size(self):
+        """Total size of cached frames in bytes."""
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self._all_paths())
+        return self._size
+
+    def __contains__(self, key):
+        """Check whether a frame is cached."""
+        return self._path(key).exists()
+
+    def get(self, key):
+        """Get frame for key, or None if not cached."""
+        p = self._path(key)
+        try:
+            arr = numpy.load(p)
+        except FileNotFoundError:
+            return None
+        os.utime(p)  # mark as recently used
+        logger.debug(f"Using cached frame {key:s}")
+        return arr
+
+    def put(self, key, arr):
+        """Store frame under key, evicting old frames if needed."""
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        size = self.size - (p.stat().st_size if p.exists() else 0)
+        with io.atomic_write(p, "wb") as fp:
+            numpy.save(fp, numpy.asarray(arr))
+        self._size = size + p.stat().st_size
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used frames until within size limit."""
+        entries = []
+        for p in self._all_paths():
+            st = p.stat()
+            entries.append((st.st_mtime_ns, st.st_size, p))
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        for (_, size, p) in entries:
+            if total <= self.max_size:
+                break
+            logger.debug(f"Evicting cached frame {p!s}")
+            p.unlink(missing_ok=True)
+            total -= size
+        self._size = total
@@ -1,17 +1,24 @@
 """Routines interacting with GLM and glmtools."""
 import pathlib
 import importlib
+import functools
+import concurrent.futures
 
 import appdirs
-import pandas
-import s3fs
-import fsspec.implementations.cached
 import logging
 import os
-import satpy
-import xarray
 
-from typhon.files.fileset import FileSet
+import numpy
+
+from . import s3
+from . import log
+from . import coverage
+from .lazy import lazy_import
+
+pandas = lazy_import("pandas")
+satpy = lazy_import("satpy")
+xarray = lazy_import("xarray")
+typhon = lazy_import("typhon.files.fileset")
 
 pattern_s3_glm_lcfa = (
         "noaa-goes16/GLM-L2-LCFA/{year}/{doy}/{hour}/"
@@ -39,45 +46,197 @@ def get_dwd_glm_basedir(sector="C", lat=None, lon=None, period="1min"):
 def get_pattern_dwd_glm(sector="C", lat=None, lon=None, period="1min"):
     """Return filename pattern for storing processed GLM data."""
     bd = get_dwd_glm_basedir(sector=sector, lat=lat, lon=lon, period=period)
-    seclab = sector if sector in ("C", "F", "M1") else "M1"
     return str(bd /
                "{year}/{month}/{day}/{hour}/"
-               f"OR_GLM-L2-GLM{seclab:s}-M3_G16_"
+               f"{_get_dwd_glm_prefix(sector):s}"
                "s{year}{doy}{hour}{minute}{second}*_"
                "e{end_year}{end_doy}{end_hour}{end_minute}{end_second}*_"
                "c*.nc")
 
 
-def ensure_glm_lcfa_for_period(start_date, end_date):
-    """Make sure GLM LCFA files for period are present locally.
+def _get_dwd_glm_prefix(sector):
+    """Get start of processed GLM filenames up to the start time."""
+    seclab = sector if sector in ("C", "F", "M1") else "M1"
+    return f"OR_GLM-L2-GLM{seclab:s}-M3_G16_"
 
-    Yields the local paths for the (cached or downloaded) files.
+
+def _parse_times(stamps):
+    """Parse many times formatted as %Y%j%H%M%S into datetime64[s]."""
+    if not stamps:
+        return numpy.array([], dtype="M8[s]")
+    d = (numpy.frombuffer("".join(stamps).encode("ascii"), dtype="u1")
+         .reshape(len(stamps), 13).astype("i8") - ord("0"))
+    year = d[:, 0:4] @ [1000, 100, 10, 1]
+    doy = d[:, 4:7] @ [100, 10, 1]
+    secs = (d[:, 7:9] @ [10, 1]) * 3600 + (d[:, 9:11] @ [10, 1]) * 60 + \
+        d[:, 11:13] @ [10, 1]
+    return ((year - 1970).astype("M8[Y]").astype("M8[D]")
+            + (doy - 1).astype("m8[D]")).astype("M8[s]") + \
+        secs.astype("m8[s]")
+
+
+def _scan_glm_hour(path, prefix):
+    """List processed GLM files in an hour directory.
+
+    Returns the paths and the strings with start and end times.
+    """
+    (paths, starts, ends) = ([], [], [])
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                name = entry.name
+                if not (name.startswith(prefix) and name.endswith(".nc")):
+                    continue
+                i = len(prefix)
+                j = name.find("_e", i)
+                (start, end) = (name[i:i+13], name[j+2:j+15])
+                if j < 0 or not (start + end).isdigit() or len(end) < 13:
+                    continue
+                paths.append(entry.path)
+                starts.append(start)
+                ends.append(end)
+    except FileNotFoundError:
+        pass
+    return (paths, starts, ends)
+
+
+def _get_hours(start_date, end_date):
+    """Get hours of directories that may contain files for period."""
+    # a file starting in the previous minute may extend into the period
+    return pandas.date_range(
+            (pandas.Timestamp(start_date) - pandas.Timedelta("1min")).floor(
+                "h"),
+            pandas.Timestamp(end_date).floor("h"), freq="h")
+
+
+def _get_hours_for(periods):
+    """Get the union of hours of directories for many periods."""
+    return sorted(set().union(*(_get_hours(start_date, end_date)
+                                for (start_date, end_date) in periods)))
+
+
+def _scan_glm_hours(hours, sector="C", lat=None, lon=None, max_workers=8):
+    """List processed GLM files in hour directories, in parallel.
+
+    Returns unsorted arrays of paths, start times, and end times.
+    """
+    bd = get_dwd_glm_basedir(sector=sector, lat=lat, lon=lon)
+    prefix = _get_dwd_glm_prefix(sector) + "s"
+    dirs = [bd / f"{h:%Y/%m/%d/%H}" for h in hours]
+    with log.Span("glm.locate") as sp, \
+            concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        results = list(executor.map(_scan_glm_hour, dirs,
+                                    [prefix] * len(dirs)))
+        paths = numpy.array([p for r in results for p in r[0]], dtype=object)
+        starts = _parse_times([t for r in results for t in r[1]])
+        ends = _parse_times([t for r in results for t in r[2]])
+        sp.add(items=len(paths))
+    return (paths, starts, ends)
+
+
+def _select_files(paths, starts, ends, start_date, end_date):
+    """Select files overlapping period, sorted by start time."""
+    keep = (starts < numpy.datetime64(pandas.Timestamp(end_date))) & \
+        (ends > numpy.datetime64(pandas.Timestamp(start_date)))
+    order = numpy.argsort(starts[keep], kind="stable")
+    return (paths[keep][order], starts[keep][order], ends[keep][order])
+
+
+def _locate_glm_files(start_date, end_date, sector="C", lat=None, lon=None,
+                      max_workers=8):
+    """Locate processed GLM files, helper for locate_glm_files.
+
+    Returns arrays of paths, start times, and end times, sorted by start
+    time.
+    """
+    return _select_files(
+            *_scan_glm_hours(_get_hours(start_date, end_date), sector=sector,
+                             lat=lat, lon=lon, max_workers=max_workers),
+            start_date, end_date)
+
+
+def locate_glm_files(start_date, end_date, sector="C", lat=None, lon=None,
+                     max_workers=8):
+    """Locate processed GLM files for period.
+
+    The processed GLM store has a deterministic layout with one directory
+    per hour, see :func:`get_pattern_dwd_glm`.  Rather than searching for
+    files matching a pattern, list each hour directory in the period once,
+    in parallel, and parse the times from the filenames in bulk.
+
+    Args:
+        start_date: Start of period, anything understood by pandas.
+        end_date: End of period.
+        sector (str): Sector, "C", "F", "M1", or "M2".
+        lat (float): For MESO sectors, the latitude of the centre.
+        lon (float): For MESO sectors, the longitude of the centre.
+        max_workers (int): Number of hour directories to list at the same
+            time.
+
+    Returns:
+        Tuple of the :class:`~sattools.coverage.Coverage` of the files and
+        the list of paths of files overlapping the period, sorted by start
+        time.
+    """
+    (paths, starts, ends) = _locate_glm_files(
+            start_date, end_date, sector=sector, lat=lat, lon=lon,
+            max_workers=max_workers)
+    return (coverage.Coverage(starts, ends), list(paths))
+
+
+def _ensure_glm_lcfa(periods):
+    """Make sure GLM LCFA files for periods are present locally.
+
+    Helper for :func:`ensure_glm_lcfa_for_period` and
+    :func:`ensure_glm_for_periods`, using the shared S3 filesystem and
+    file cache, see :mod:`sattools.s3`.  Yields tuples with the local
+    path, start time, and end time for each file, each file only once.
     """
-    logger.debug(
-            "Ensuring local LCFA availability "
-            f"{start_date:%Y-%m-%d %H:%M:%S}--{end_date:%H:%M:%S}")
     cachedir = appdirs.user_cache_dir("GLM-file-cache")
-    s3 = s3fs.S3FileSystem(anon=True)
-    wfcfs = fsspec.implementations.cached.WholeFileCacheFileSystem(
-            fs=s3,
-            cache_storage=cachedir,
+    fs_s3 = s3.get_filesystem()
+    wfcfs = s3.get_caching_filesystem(
+            cachedir,
+            whole_file=True,
             cache_check=86400,
             check_files=False,
             expiry_time=False,
             same_names=True)
 
-    glm_lcfa = FileSet(path=pattern_s3_glm_lcfa, name="glm_lcfa", fs=s3)
-    for f in glm_lcfa.find(start_date, end_date):
-        if not f.times[1] > start_date:  # typhon uses closed intervals
-            continue
-        logger.debug(f"Downloading {f!s}")
-        with wfcfs.open(f, mode="rb"):  # force download
-            exp = pathlib.Path(cachedir) / pathlib.Path(f).name
-            logger.debug(f"Writing to {exp!s}")
-            # Is this guaranteed?  See
-            # https://stackoverflow.com/q/64261276/974555
-            if not exp.exists():
-                raise FileNotFoundError(f"Not found! {exp!s}")
+    glm_lcfa = typhon.files.fileset.FileSet(
+            path=pattern_s3_glm_lcfa, name="glm_lcfa", fs=fs_s3)
+    seen = set()
+    for (start_date, end_date) in periods:
+        logger.debug(
+                "Ensuring local LCFA availability "
+                f"{start_date:%Y-%m-%d %H:%M:%S}--{end_date:%H:%M:%S}")
+        with log.Span("glm.list_lcfa") as sp:
+            found = list(glm_lcfa.find(start_date, end_date))
+            sp.add(items=len(found))
+        for f in found:
+            if not f.times[1] > start_date:  # typhon uses closed intervals
+                continue
+            if f.path in seen:
+                continue
+            seen.add(f.path)
+            logger.debug(f"Downloading {f!s}")
+            with log.Span("glm.download_lcfa") as sp, \
+                    wfcfs.open(f, mode="rb"):  # force download
+                exp = pathlib.Path(cachedir) / pathlib.Path(f).name
+                logger.debug(f"Writing to {exp!s}")
+                # Is this guaranteed?  See
+                # https://stackoverflow.com/q/64261276/974555
+                if not exp.exists():
+                    raise FileNotFoundError(f"Not found! {exp!s}")
+                sp.add(bytes=exp.stat().st_size, items=1)
+            yield (exp, *f.times)
+
+
+def ensure_glm_lcfa_for_period(start_date, end_date):
+    """Make sure GLM LCFA files for period are present locally.
+
+    Yields the local paths for the (cached or downloaded) files.
+    """
+    for (exp, _, _) in _ensure_glm_lcfa([(start_date, end_date)]):
         yield exp
 
 
@@ -85,64 +244,124 @@ def ensure_glm_for_period(
         start_date, end_date, sector="C", lat=None, lon=None):
     """Get gridded GLM for period, unless already existing.
 
-    Yields resulting GLM files as strings.
+    Yields resulting GLM files as strings.  To ensure GLM for many periods,
+    :func:`ensure_glm_for_periods` is faster than calling this function
+    repeatedly.
     """
-    logger.debug(
-            "Locating GLM gaps between "
-            f"{start_date:%Y-%m-%d %H:%M:%S}--{end_date:%H:%M:%S}, "
-            f"sector {sector:s}")
-    for gap in find_glm_coverage_gaps(start_date, end_date, sector=sector,
-                                      lat=lat, lon=lon):
-        logger.debug(
-                "Found gap between "
-                f"{start_date:%Y-%m-%d %H:%M:%S}--{end_date:%H:%M:%S}")
-        files = list(ensure_glm_lcfa_for_period(gap.left, gap.right))
-        if sector in "CF":
-            run_glmtools(files, max_files=60, sector=sector)
-        else:
-            run_glmtools(files, max_files=60, sector=sector,
-                         lat=lat, lon=lon)
-            logger.debug(f"GLM {sector:s} should now be fully covered")
+    (files,) = ensure_glm_for_periods(
+            [(start_date, end_date, sector, lat, lon)])
+    yield from files
+
+
+def _get_glm_request(period):
+    """Get (start, end, sector, lat, lon) with defaults and Timestamps."""
+    (start_date, end_date, sector, lat, lon) = (
+            tuple(period) + ("C", None, None)[len(period)-2:])
+    return (pandas.Timestamp(start_date), pandas.Timestamp(end_date),
+            sector, lat, lon)
+
+
+def ensure_glm_for_periods(periods, max_files=60):
+    """Get gridded GLM for many periods, unless already existing.
+
+    Like :func:`ensure_glm_for_period`, but for many requests at once, such
+    as for many short lightning events.  Per sector (and MESO location),
+    the hour directories for all requests are listed once, and the gaps of
+    all requests are joined.  The LCFA files needed for the gaps of all
+    sectors are downloaded once, with a single S3 filesystem.  Each
+    contiguous gap is then gridded with one call to :func:`run_glmtools`.
+
+    Args:
+        periods (Iterable[tuple]): Requests as tuples of
+            ``(start_date, end_date, sector, lat, lon)``.  Sector and
+            location may be left out, defaulting to "C".
+        max_files (int): Maximum number of LCFA files per glmtools run.
+
+    Returns:
+        List with, for each request, the list of GLM files as strings.
+
+    Raises:
+        RuntimeError: if files are still missing after running glmtools.
+    """
+    requests = [_get_glm_request(p) for p in periods]
+    targets = {}
+    for (start_date, end_date, *target) in requests:
+        targets.setdefault(tuple(target), []).append((start_date, end_date))
+    hours = {target: _get_hours_for(pers) for (target, pers) in
+             targets.items()}
+    gaps = {}
+    for (target, pers) in targets.items():
+        logger.debug(f"Locating GLM gaps for {len(pers):d} periods, "
+                     f"sector {target[0]:s}")
+        (_, starts, ends) = _scan_glm_hours(hours[target], *target)
+        have = coverage.Coverage(starts, ends)
+        wanted = coverage.Coverage(*zip(*pers))
+        gaps[target] = coverage.Coverage.from_intervals(
+                gap for iv in wanted for gap in have.gaps(iv.left, iv.right))
+    needed = functools.reduce(coverage.Coverage.union, gaps.values(),
+                              coverage.Coverage())
+    if len(needed):
+        logger.debug(f"Found {len(needed):d} gaps covering "
+                     f"{needed.duration!s}")
+        lcfa = list(_ensure_glm_lcfa((iv.left, iv.right) for iv in needed))
+        lcfa = (numpy.array([x[0] for x in lcfa], dtype=object),
+                numpy.array([x[1] for x in lcfa], dtype="M8[ns]"),
+                numpy.array([x[2] for x in lcfa], dtype="M8[ns]"))
+    for ((sector, lat, lon), target_gaps) in gaps.items():
+        for gap in target_gaps:
+            (files, _, _) = _select_files(*lcfa, gap.left, gap.right)
+            if sector in "CF":
+                run_glmtools(list(files), max_files=max_files, sector=sector)
+            else:
+                run_glmtools(list(files), max_files=max_files, sector=sector,
+                             lat=lat, lon=lon)
     # there should be no more gaps now!
-    for gap in find_glm_coverage_gaps(
-            start_date, end_date, sector=sector, lat=lat, lon=lon):
-        raise RuntimeError(
-                f"I have tried to ensure GLM {sector:s} by running glmtools, "
-                "but data still appear to be missing for "
+    found = {target: _scan_glm_hours(hours[target], *target)
+             for target in targets}
+    results = []
+    for (start_date, end_date, *target) in requests:
+        (paths, starts, ends) = _select_files(*found[tuple(target)],
+                                              start_date, end_date)
+        if not coverage.Coverage(starts, ends).is_fully_covered(
+                start_date, end_date):
+            raise RuntimeError(
+                f"I have tried to ensure GLM {target[0]:s} by running "
+                "glmtools, but data still appear to be missing for "
                 f"{start_date:%Y-%m-%d %H:%M:%S}--{end_date:%H:%M:%S} :( ")
-    if sector in "CF":
-        pat = get_pattern_dwd_glm(sector)
-    else:
-        pat = get_pattern_dwd_glm(sector, lat=lat, lon=lon)
-    glm = FileSet(path=pat, name="glm")
-    for fileinfo in glm.find(start_date, end_date, no_files_error=True):
-        yield os.fspath(fileinfo)
+        results.append([os.fspath(p) for p in paths])
+    return results
 
 
 def find_glm_coverage(start_date, end_date, sector="C", lat=None, lon=None):
-    """Yield intervals corresponding to GLMC coverage."""
-    if sector in "CF":
-        pat = get_pattern_dwd_glm(sector)
-    else:
-        pat = get_pattern_dwd_glm(sector, lat=lat, lon=lon)
-    glm = FileSet(path=pat, name="glm")
-    for file_info in glm.find(start_date, end_date, no_files_error=False):
-        yield pandas.Interval(
-                pandas.Timestamp(file_info.times[0]),
-                pandas.Timestamp(file_info.times[1]))
+    """Yield intervals corresponding to GLMC coverage.
+
+    Yields one interval per file.  To get the merged coverage, use
+    :func:`get_glm_coverage`.
+    """
+    (_, starts, ends) = _locate_glm_files(
+            start_date, end_date, sector=sector, lat=lat, lon=lon)
+    for (start, end) in zip(starts, ends):
+        yield pandas.Interval(pandas.Timestamp(start), pandas.Timestamp(end))
+
+
+def get_glm_coverage(start_date, end_date, sector="C", lat=None, lon=None):
+    """Get GLMC coverage for period.
+
+    Returns:
+        :class:`~sattools.coverage.Coverage` covered by files overlapping
+        the period.
+    """
+    (cov, _) = locate_glm_files(start_date, end_date, sector=sector,
+                                lat=lat, lon=lon)
+    return cov
 
 
 def find_glm_coverage_gaps(start_date, end_date, sector="C",
                            lat=None, lon=None):
     """Yield intervals not covered by GLMC in period."""
-    last = pandas.Timestamp(start_date)
-    for iv in find_glm_coverage(start_date, end_date, sector=sector,
-                                lat=lat, lon=lon):
-        if iv.left > last:
-            yield pandas.Interval(last, iv.left)
-        last = iv.right
-    if last < end_date:
-        yield pandas.Interval(last, pandas.Timestamp(end_date))
+    yield from get_glm_coverage(
+            start_date, end_date, sector=sector, lat=lat, lon=lon).gaps(
+                    start_date, end_date)
 
 
 def load_file(name, path):
@@ -154,6 +373,19 @@ def load_file(name, path):
     return module
 
 
+@functools.lru_cache(maxsize=None)
+def _load_glmtool(path):
+    return load_file("glmtool", path)
+
+
+def get_glmtool():
+    """Get the glmtools gridding script as a module.
+
+    The script at ``glm_script`` is loaded only once per process.
+    """
+    return _load_glmtool(glm_script)
+
+
 def run_glmtools(files, max_files=180, sector="C", lat=None, lon=None):
     """Run glmtools.
 
@@ -166,7 +398,8 @@ def run_glmtools(files, max_files=180, sector="C", lat=None, lon=None):
     if len(files) > max_files:
         logger.info(f"Got {len(files):d} > {max_files:d} files, splitting...")
     idx = 0
-    glmtool = load_file("glmtool", glm_script)
+    with log.Span("glm.load_glmtools"):
+        glmtool = get_glmtool()
     parser = glmtool.create_parser()
     glm_names = {"C": "conus",
                  "M1": "meso",
@@ -192,9 +425,10 @@ def run_glmtools(files, max_files=180, sector="C", lat=None, lon=None):
             *(str(f) for f in these_files)])
         args = parser.parse_args(arg_list)
         # this part taken from glmtools example script glm_script
-        (gridder, glm_filenames, start_time, end_time, grid_kwargs) = \
-            glmtool.grid_setup(args)
-        gridder(glm_filenames, start_time, end_time, **grid_kwargs)
+        with log.Span("glm.run_glmtools", items=len(these_files)):
+            (gridder, glm_filenames, start_time, end_time, grid_kwargs) = \
+                glmtool.grid_setup(args)
+            gridder(glm_filenames, start_time, end_time, **grid_kwargs)
 
         idx += max_files
 
@@ -202,15 +436,27 @@ def run_glmtools(files, max_files=180, sector="C", lat=None, lon=None):
 def get_integrated_scene(glm_files, start_scene=None):
     """Get an integrated scene.
 
-    Given a set of GLM files, get a scene where quantities are summed or
-    averaged or so.
+    Given a set of GLM files, get a scene where the flash extent density is
+    summed over all files.  If ``start_scene`` is given, the summed datasets
+    are added to this scene.
+
+    Files are read one time step at a time and added to a running sum, such
+    that memory use does not grow with the number of files.  The result is
+    therefore computed rather than lazy.
     """
-    ms = satpy.MultiScene.from_files(
-            glm_files,
-            "glm_l2",
-            time_threshold=10,
-            group_keys=["start_time"])
-    ms.load(["flash_extent_density"])
-    with xarray.set_options(keep_attrs=True):
-        sc = ms.blend(sum, scene=start_scene)
+    sc = satpy.Scene() if start_scene is None else start_scene
+    total = {}
+    with log.Span("glm.integrate", items=len(glm_files)), \
+            xarray.set_options(keep_attrs=True):
+        for group in satpy.readers.group_files(
+                glm_files, "glm_l2", time_threshold=10,
+                group_keys=["start_time"]):
+            step = satpy.Scene(filenames=group)
+            step.load(["flash_extent_density"])
+            for did in step.keys():
+                val = step[did].compute()
+                total[did] = total[did] + val if did in total else val
+            del step
+    for (did, val) in total.items():
+        sc[did] = val
     return sc
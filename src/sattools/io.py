@@ -2,6 +2,8 @@
 import os
 import pathlib
 import datetime
+import threading
+import contextlib
 
 
 def get_cache_dir(base=None, subdir=""):
@@ -48,3 +50,33 @@ def nas_data_out(nas_store=None, subdir="data_out", create=False):
     if create:
         pd.mkdir(parents=True, exist_ok=True)
     return pd
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", **kwargs):
+    """Open file for writing such that others never see a partial file.
+
+    Writes to a temporary file in the same directory, which replaces
+    ``path`` when the block ends.  If the block raises an exception, the
+    temporary file is removed and ``path`` is left as it was.
+
+    Args:
+        path (str or pathlib.Path): File to write.
+        mode (str): Mode to open the file with, ``"w"`` or ``"wb"``.
+        **kwargs: Passed on to ``open``, such as ``encoding``.
+
+    Yields:
+        File object opened on the temporary file.
+    """
+    path = pathlib.Path(path)
+    # unique per process and thread, such that concurrent writers of the
+    # same file do not write into each other's temporary file
+    tmp = path.with_name(
+            f"{path.name:s}.{os.getpid():d}.{threading.get_ident():d}.tmp")
+    try:
+        with tmp.open(mode, **kwargs) as fp:
+            yield fp
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,76 @@
+"""Import heavy dependencies at first use.
+
+Importing satpy, pyresample, typhon, s3fs and friends takes several
+seconds.  The command line tools should not pay that before even parsing
+the command line, so sattools modules import those packages with
+:func:`lazy_import`::
+
+    from .lazy import lazy_import
+    satpy = lazy_import("satpy")
+
+The real import happens when an attribute of ``satpy`` is first accessed.
+"""
+
+import sys
+import types
+import importlib
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module at first use."""
+
+    def __init__(self, name, full_name=None):
+        """Initiate placeholder for module.
+
+        Args:
+            name (str): Name of the module to get attributes from.
+            full_name (str): Name of the module to import, if different,
+                such as a submodule of ``name``.
+        """
+        super().__init__(name)
+        self.__dict__["_lazy_full_name"] = full_name or name
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        mod = self.__dict__["_lazy_module"]
+        if mod is None:
+            importlib.import_module(self.__dict__["_lazy_full_name"])
+            mod = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = mod
+        return mod
+
+    def __getattr__(self, attr):
+        """Import the module if needed and get attribute from it."""
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        """List attributes of the real module."""
+        return dir(self._load())
+
+    def __repr__(self):
+        """Represent lazy module."""
+        return f"<lazy module {self.__dict__['_lazy_full_name']!r}>"
+
+
+def lazy_import(name):
+    """Get module that is imported when first used.
+
+    Like the ``import`` statement, this returns the top-level package, such
+    that ``lazy_import("pyresample.geometry")`` replaces ``import
+    pyresample.geometry``::
+
+        pyresample = lazy_import("pyresample.geometry")
+        pyresample.geometry.AreaDefinition  # imports pyresample.geometry
+
+    If the module is already imported, return it directly.
+
+    Args:
+        name (str): Name of module, may be dotted.
+
+    Returns:
+        Module or :class:`LazyModule`
+    """
+    top = name.split(".")[0]
+    if name in sys.modules:
+        return sys.modules[top]
+    return LazyModule(top, name)
@@ -2,7 +2,15 @@
 
 import os
 import sys
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
+import contextvars
+import logging.handlers
+import multiprocessing
 import datetime
 import pathlib
 import appdirs
@@ -24,7 +32,8 @@ def setup_main_handler(
         mods=("fogtools", "typhon", "fogpy", "sattools", "fcitools"),
         level=logging.DEBUG,
         stderr=True,
-        filename=None):
+        filename=None,
+        queue=False):
     """Set up the main handlers.
 
     By default, setups a stderr StreamHandler.  Optionally also sets up a
@@ -33,6 +42,16 @@ def setup_main_handler(
     Args:
         mods (Collection[str]): Modules to log for.
         level (logging level): At what level to log to stderr.
+        stderr (bool): Whether to log to stderr.
+        filename (str or pathlib.Path): If given, also log to this file.
+        queue (bool): If true, the loggers get only a QueueHandler, and the
+            actual handlers are called from a separate listener thread.  This
+            keeps I/O out of the threads doing the work.  The listener is
+            stopped (and pending records written) at exit.
+
+    Returns:
+        The ``logging.handlers.QueueListener`` if ``queue`` is true, else
+        None.
     """
     handlers = []
     if stderr:
@@ -45,11 +64,71 @@ def setup_main_handler(
         style="{")
     for handler in handlers:
         handler.setFormatter(formatter)
+    listener = None
+    if queue:
+        (handlers, listener) = _queue_handlers(handlers)
+        atexit.register(listener.stop)
     for m in mods:
         log = logging.getLogger(m)
         log.setLevel(level)
         for handler in handlers:
             log.addHandler(handler)
+    return listener
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """Queue listener that may be stopped more than once.
+
+    Stopping a listener that is not running does nothing, such that it
+    can be stopped both by the user and at exit.
+    """
+
+    running = False
+
+    def start(self):
+        """Start the listener thread."""
+        super().start()
+        self.running = True
+
+    def stop(self):
+        """Stop the listener thread if running, writing pending records."""
+        if self.running:
+            self.running = False
+            super().stop()
+
+
+def _queue_handlers(handlers):
+    """Replace handlers by a QueueHandler and a started listener.
+
+    Returns a list with the QueueHandler and the QueueListener.
+    """
+    q = queue.SimpleQueue()
+    listener = _QueueListener(q, *handlers, respect_handler_level=True)
+    listener.start()
+    return ([logging.handlers.QueueHandler(q)], listener)
+
+
+def setup_worker_handler(q, level=logging.DEBUG):
+    """Send all log records from a worker process to a queue.
+
+    Intended as initializer for a process pool, such that records logged
+    in the worker processes end up in the file written by a
+    :class:`LogToTimeFile` with ``queue=True``.  Replaces any handlers on
+    the root logger that the worker may have inherited.
+
+    Example::
+
+        with log.LogToTimeFile(logfile, queue=True) as c:
+            with concurrent.futures.ProcessPoolExecutor(
+                    initializer=log.setup_worker_handler,
+                    initargs=(c.queue,)) as executor:
+                ...
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(q))
+    root.setLevel(level)
 
 
 # this class is based on
@@ -93,13 +172,19 @@ class LogToTimeFile(LoggingContext):
     This is intended to be used when files are processed, and a corresponding
     logfile shall be written.
 
+    With ``queue=True``, records are passed through a multiprocessing queue
+    to a listener thread that writes the file, such that file I/O does not
+    happen in the threads doing the work.  Worker processes can log into the
+    same file by setting up :func:`setup_worker_handler` with the ``queue``
+    attribute.
+
     Example::
 
         with log.LogToTimeFile(logfile):
             ...
     """
 
-    def __init__(self, logfile):
+    def __init__(self, logfile, queue=False):
         """Initiate the logging context manager."""
         logger = logging.getLogger()  # root logger
         self.logfile = logfile
@@ -111,11 +196,21 @@ class LogToTimeFile(LoggingContext):
                 "{pathname:s}:{lineno:d} {funcName:s}: {message:s}",
                 style="{")
         handler.setFormatter(formatter)
+        self.file_handler = handler
+        self.queue = multiprocessing.Queue(-1) if queue else None
+        self.listener = None
+        if queue:
+            handler = logging.handlers.QueueHandler(self.queue)
         super().__init__(logger, level=logging.DEBUG, handler=handler,
                          close=True)
 
     def __enter__(self):
         """Enter the logging to time file context manager."""
+        if self.queue is not None:
+            self.listener = logging.handlers.QueueListener(
+                    self.queue, self.file_handler,
+                    respect_handler_level=True)
+            self.listener.start()
         super().__enter__()
         logger.info(f"Opening logfile at {self.logfile!s}")
         return self
@@ -124,6 +219,10 @@ class LogToTimeFile(LoggingContext):
         """Exit the logging to time file context manager."""
         logger.info(f"Closing logfile at {self.logfile!s}")
         super().__exit__(et, ev, tb)
+        if self.listener is not None:
+            self.listener.stop()  # writes pending records
+            self.listener = None
+            self.file_handler.close()
 
 
 def logfile(name, label, create_dir=True):
@@ -170,10 +269,221 @@ def setup_error_handler(mods=["satpy"]):
         log.addHandler(rowh)
 
 
-class RaiseOnWarnContext(LoggingContext):
-    """Context manager to turn logged warnings into exceptions."""
+# names of loggers for which warnings raise in the current context
+_raise_on_warn = contextvars.ContextVar("raise_on_warn", default=frozenset())
+_context_handlers = {}
+_context_handlers_lock = threading.Lock()
+
+
+class ContextRaiseOnWarnHandler(RaiseOnWarnHandler):
+    """Logging handler to raise on warnings only within a context.
+
+    Like :class:`RaiseOnWarnHandler`, but only raises if the logger it is
+    attached to was activated with :class:`RaiseOnWarnContext` in the
+    current thread or asyncio task.  One such handler is installed per
+    logger and never removed.
+    """
+
+    def __init__(self, name):
+        """Initiate handler for logger with name."""
+        super().__init__()
+        self.logger_name = name
+
+    def handle(self, record):
+        """Handle record, skipping the handler lock when inactive."""
+        if (record.levelno < logging.WARNING
+                or self.logger_name not in _raise_on_warn.get()):
+            return False
+        return super().handle(record)
+
+
+def _get_context_handler(logger):
+    """Get the context handler for logger, installing it if needed."""
+    with _context_handlers_lock:
+        if logger.name not in _context_handlers:
+            handler = ContextRaiseOnWarnHandler(logger.name)
+            logger.addHandler(handler)
+            _context_handlers[logger.name] = handler
+        return _context_handlers[logger.name]
+
+
+class RaiseOnWarnContext:
+    """Context manager to turn logged warnings into exceptions.
+
+    Applies only to the current thread or asyncio task: warnings logged
+    elsewhere at the same time are not affected.  Entering and exiting the
+    context does not add or remove handlers, so it is cheap enough to wrap
+    fine-grained operations.
+    """
 
     def __init__(self, logger):
         """Initiate the context manager."""
-        rowh = RaiseOnWarnHandler()
-        super().__init__(logger, handler=rowh)
+        self.logger = logger
+        self.handler = _get_context_handler(logger)
+
+    def __enter__(self):
+        """Enter the context manager."""
+        self._token = _raise_on_warn.set(
+                _raise_on_warn.get() | {self.logger.name})
+        return self
+
+    def __exit__(self, et, ev, tb):
+        """Exit the context manager."""
+        _raise_on_warn.reset(self._token)
+
+
+class Tracer:
+    """Collection of timed spans.
+
+    Spans are recorded by :class:`Span` while a :class:`TraceContext` is
+    active.  The collection can be exported as a Chrome trace (to be viewed
+    in chrome://tracing or https://ui.perfetto.dev) or summarised as a table.
+    """
+
+    def __init__(self):
+        """Initiate an empty tracer."""
+        self.spans = []
+        self.t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        """Add a completed span."""
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome_trace(self, filename):
+        """Write spans to Chrome trace JSON file."""
+        events = [{"name": sp.name,
+                   "cat": sp.name.split(".")[0],
+                   "ph": "X",
+                   "ts": (sp.start - self.t0) * 1e6,
+                   "dur": (sp.end - sp.start) * 1e6,
+                   "pid": sp.pid,
+                   "tid": sp.tid,
+                   "args": dict(sp.counters)}
+                  for sp in self.spans]
+        with open(filename, "w", encoding="utf-8") as fp:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
+
+    def summary(self):
+        """Get a table summarising spans per stage.
+
+        For each stage, the table lists the number of spans, their total,
+        mean, and maximum duration, and the sum of the ``bytes`` and
+        ``items`` counters.
+        """
+        stages = {}
+        for sp in self.spans:
+            st = stages.setdefault(
+                    sp.name, {"count": 0, "total": 0, "max": 0, "bytes": 0,
+                              "items": 0})
+            dur = sp.end - sp.start
+            st["count"] += 1
+            st["total"] += dur
+            st["max"] = max(st["max"], dur)
+            st["bytes"] += sp.counters.get("bytes", 0)
+            st["items"] += sp.counters.get("items", 0)
+        lines = [f"{'stage':<40s} {'count':>6s} {'total [s]':>10s} "
+                 f"{'mean [s]':>10s} {'max [s]':>10s} {'bytes':>12s} "
+                 f"{'items':>8s}"]
+        for (name, st) in sorted(stages.items(), key=lambda x: -x[1]["total"]):
+            lines.append(
+                f"{name:<40s} {st['count']:>6d} {st['total']:>10.3f} "
+                f"{st['total']/st['count']:>10.3f} {st['max']:>10.3f} "
+                f"{st['bytes']:>12d} {st['items']:>8d}")
+        return "\n".join(lines)
+
+
+_tracer = None
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class TraceContext:
+    """Context manager to trace sattools stages.
+
+    Within the context manager, :class:`Span` records the duration of
+    stages in sattools and any counters (such as bytes read or number of
+    items) into a :class:`Tracer`.  On exit, the trace is written as Chrome
+    trace JSON if a filename is given, and a summary table is logged.
+
+    Example::
+
+        with log.TraceContext("trace.json") as tc:
+            vis.show_video_abi_glm_times(...)
+        print(tc.tracer.summary())
+    """
+
+    def __init__(self, filename=None, summary=True):
+        """Initiate trace context manager.
+
+        Pass the filename to which to write a Chrome trace (if any) and
+        whether to log a summary table at the end.
+        """
+        self.filename = filename
+        self.summary = summary
+        self.tracer = Tracer()
+
+    def __enter__(self):
+        """Enter the trace context manager."""
+        global _tracer
+        self.old_tracer = _tracer
+        _tracer = self.tracer
+        return self
+
+    def __exit__(self, et, ev, tb):
+        """Exit the trace context manager."""
+        global _tracer
+        _tracer = self.old_tracer
+        if self.filename is not None:
+            logger.info(f"Writing trace to {self.filename!s}")
+            self.tracer.to_chrome_trace(self.filename)
+        if self.summary:
+            logger.info("Time spent per stage:\n" + self.tracer.summary())
+
+
+class Span:
+    """Context manager to record the duration of a stage.
+
+    Spans can be nested; the Chrome trace shows the nesting per thread.
+    Counters can be passed on creation or added while the span is active.
+    If no :class:`TraceContext` is active, this does very little.
+
+    Example::
+
+        with log.Span("glm.lcfa_download") as sp:
+            ...
+            sp.add(bytes=size, items=1)
+    """
+
+    __slots__ = ("name", "counters", "start", "end", "pid", "tid",
+                 "parent", "_tracer", "_token")
+
+    def __init__(self, name, **counters):
+        """Initiate span with name and optional counters."""
+        self.name = name
+        self.counters = counters
+
+    def add(self, **counters):
+        """Add to counters such as bytes or items."""
+        for (k, v) in counters.items():
+            self.counters[k] = self.counters.get(k, 0) + v
+
+    def __enter__(self):
+        """Start the span."""
+        self._tracer = _tracer
+        if self._tracer is not None:
+            self.parent = _current_span.get()
+            self._token = _current_span.set(self.name)
+            self.pid = os.getpid()
+            self.tid = threading.get_ident()
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, et, ev, tb):
+        """End the span."""
+        if self._tracer is not None:
+            self.end = time.perf_counter()
+            _current_span.reset(self._token)
+            if self.parent is not None:
+                self.counters["parent"] = self.parent
+            self._tracer.add(self)
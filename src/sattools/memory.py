@@ -0,0 +1,146 @@
+"""Measure peak memory use.
+
+Functions such as :func:`sattools.scutil.collapse_abi_glm_multiscene`,
+:func:`sattools.glm.get_integrated_scene`, or
+:func:`sattools.vis.show_video_abi_glm_times` process many scenes.  Their
+memory use should not grow with the number of scenes.  The
+:class:`MemoryMonitor` measures the peak memory use within a block, such
+that tests and benchmarks can check memory budgets.
+
+Two measures are recorded:
+
+- The peak of memory allocations traced by :mod:`tracemalloc`.  This
+  includes numpy arrays, but not memory allocated by libraries that bypass
+  the Python allocators, such as HDF5.  It is deterministic, and therefore
+  suitable for tests.
+- The peak resident set size (RSS), sampled in a background thread.  This
+  includes all memory, but is noisy and may miss short peaks.
+
+Example::
+
+    with MemoryMonitor() as mm:
+        ...
+    print(mm.traced_peak, mm.rss_peak)
+"""
+
+import os
+import time
+import resource
+import threading
+import tracemalloc
+
+
+def get_rss():
+    """Get current resident set size in bytes.
+
+    Reads ``/proc/self/statm`` where available.  Elsewhere, falls back to
+    the maximum resident set size reported by ``resource.getrusage``.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as fp:
+            pages = int(fp.read().split()[1])
+    except OSError:
+        # on Linux, ru_maxrss is in kB, on Mac in bytes
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemoryMonitor:
+    """Context manager to measure peak memory use within a block.
+
+    Starts :mod:`tracemalloc` if it is not already tracing, and stops it
+    again on exit.  After exit, the attributes ``traced_peak`` and
+    ``rss_peak`` contain the peak traced allocations and the peak resident
+    set size in bytes, both relative to the start of the block.  The
+    attribute ``traced_retained`` contains the traced allocations still
+    present at the end of the block, such as for results that are kept.
+    """
+
+    def __init__(self, interval=0.005):
+        """Initiate monitor.
+
+        Args:
+            interval (float): Time between RSS samples in seconds.
+        """
+        self.interval = interval
+        self.traced_peak = None
+        self.traced_retained = None
+        self.rss_peak = None
+
+    def __enter__(self):
+        """Start tracing and sampling."""
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        elif not self._started:
+            # Python 3.8 has no reset_peak; restarting drops the traces
+            # of earlier allocations too
+            tracemalloc.stop()
+            tracemalloc.start()
+        self._traced_start = tracemalloc.get_traced_memory()[0]
+        self._rss_start = self._rss_max = get_rss()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self._rss_max = max(self._rss_max, get_rss())
+            time.sleep(self.interval)
+
+    def __exit__(self, et, ev, tb):
+        """Stop tracing and sampling and record peaks."""
+        self._stop.set()
+        self._sampler.join()
+        self._rss_max = max(self._rss_max, get_rss())
+        (current, peak) = tracemalloc.get_traced_memory()
+        self.traced_peak = peak - self._traced_start
+        self.traced_retained = current - self._traced_start
+        self.rss_peak = self._rss_max - self._rss_start
+        if self._started:
+            tracemalloc.stop()
+
+
+def measure(func, *args, **kwargs):
+    """Call function and measure its peak memory use.
+
+    Args:
+        func (callable): Function to call.
+        *args: Passed on to ``func``.
+        **kwargs: Passed on to ``func``.
+
+    Returns:
+        Tuple of the return value of ``func`` and the
+        :class:`MemoryMonitor` with the peaks.
+    """
+    with MemoryMonitor() as mm:
+        res = func(*args, **kwargs)
+    return (res, mm)
+
+
+def check_sublinear(peaks, exponent=0.5):
+    """Check that peak memory grows sublinearly with size.
+
+    Compares each peak to the peak for the smallest size, scaled by the
+    ratio of sizes to the power of ``exponent``.
+
+    Args:
+        peaks (Mapping[int, int]): Peak memory in bytes per size, such as
+            the number of scenes.
+        exponent (float): Allowed growth exponent.  With 0.5, ten times as
+            many scenes may use at most about three times as much memory.
+
+    Raises:
+        MemoryError: if a peak exceeds its budget.
+    """
+    smallest = min(peaks)
+    for (size, peak) in sorted(peaks.items()):
+        budget = peaks[smallest] * (size / smallest) ** exponent
+        if peak > budget:
+            raise MemoryError(
+                    f"Peak memory for size {size:d} is {peak:d} bytes, "
+                    f"exceeding budget of {budget:.0f} bytes (size "
+                    f"{smallest:d} peaks at {peaks[smallest]:d} bytes)")
@@ -0,0 +1,248 @@
+"""Prefetch blocks of ABI files into the block cache.
+
+The FSFile objects from :func:`sattools.abi.get_fsfiles` read through a
+``CachingFileSystem``, which fetches blocks from S3 as satpy asks for
+them, one request at a time.  Loading a channel reads the HDF5 metadata
+and then every chunk of the radiances, so most of the time is spent
+waiting for one request after another.
+
+This module fetches the byte ranges that a channel load will need before
+satpy reads them, with several requests at the same time, and stores
+them in the block cache.  The byte ranges come either from the HDF5 chunk
+index, which needs the optional dependency ``h5py``, or from a read trace:
+the blocks cached after loading a file before.  Files of the same sector
+and channel have nearly the same layout, so a trace from one file covers
+most of what another needs; satpy fetches anything missing as before.
+
+Example::
+
+    files = abi.get_fsfiles(start, end, sector="C", chans=[8, 14])
+    prefetch.prefetch_fsfiles(files)
+    sc = satpy.Scene(filenames=files, reader="abi_l1b")
+    sc.load(["C08", "C14"])
+    prefetch.save_read_trace(files, "trace.json")
+"""
+
+import concurrent.futures
+import json
+import logging
+import os
+
+from . import log
+from .lazy import lazy_import
+
+h5py = lazy_import("h5py")
+fsspec = lazy_import("fsspec.caching")
+
+logger = logging.getLogger(__name__)
+
+
+def get_chunk_ranges(f, variables=("Rad", "DQF")):
+    """Get byte ranges of the HDF5 chunks of variables.
+
+    Reads the chunk index from the file with ``h5py``, which needs only
+    the metadata and not the data.
+
+    Args:
+        f (str or file-like): File to read, opened in binary mode.
+        variables (Iterable[str]): Variables to get byte ranges for.
+            Those not in the file are skipped.
+
+    Returns:
+        List of (start, end) byte offsets, end exclusive.
+    """
+    ranges = []
+    with h5py.File(f, "r") as h5:
+        for v in variables:
+            if v not in h5:
+                continue
+            dsid = h5[v].id
+            if h5[v].chunks is None:
+                offset = dsid.get_offset()
+                if offset is not None:
+                    ranges.append((offset, offset + dsid.get_storage_size()))
+                continue
+            for i in range(dsid.get_num_chunks()):
+                info = dsid.get_chunk_info(i)
+                ranges.append(
+                        (info.byte_offset, info.byte_offset + info.size))
+    return ranges
+
+
+def _blocks_to_ranges(blocks, blocksize, size):
+    """Convert block numbers to byte ranges, merging consecutive blocks."""
+    ranges = []
+    for b in sorted(blocks):
+        if ranges and ranges[-1][1] == b * blocksize:
+            ranges[-1][1] = min((b + 1) * blocksize, size)
+        else:
+            ranges.append([b * blocksize, min((b + 1) * blocksize, size)])
+    return [tuple(r) for r in ranges]
+
+
+def _get_missing_runs(ranges, blocks, blocksize, size, max_request):
+    """Get byte ranges of blocks needed for ranges but not yet cached.
+
+    Consecutive missing blocks are merged into runs of at most
+    ``max_request`` bytes, such that large ranges are fetched in parallel
+    too.
+    """
+    needed = set()
+    for (start, end) in ranges:
+        end = min(end, size)
+        if end > start:
+            needed.update(range(start // blocksize,
+                                (end - 1) // blocksize + 1))
+    per_run = max(max_request // blocksize, 1)
+    runs = []
+    for r in _blocks_to_ranges(needed - set(blocks), blocksize, size):
+        for start in range(r[0], r[1], per_run * blocksize):
+            runs.append((start, min(start + per_run * blocksize, r[1])))
+    return runs
+
+
+def prefetch(fs, path, ranges, max_workers=8, max_request=2**22):
+    """Fetch byte ranges of a file into the block cache.
+
+    Blocks already cached are not fetched again.  The missing blocks are
+    fetched from the filesystem underlying the cache with up to
+    ``max_workers`` requests at the same time, and the cache metadata are
+    updated such that later reads, by this or another process, find them.
+
+    Args:
+        fs (fsspec.implementations.cached.CachingFileSystem): Caching
+            filesystem, such as from
+            :func:`sattools.s3.get_caching_filesystem`.
+        path (str): Path of file on the filesystem.
+        ranges (Iterable): (start, end) byte offsets to fetch, end
+            exclusive.  Ranges beyond the end of the file are truncated.
+        max_workers (int): Maximum number of requests at the same time.
+        max_request (int): Maximum bytes per request.
+
+    Returns:
+        Number of bytes fetched.
+    """
+    with fs.open(path, "rb") as f:
+        cache = getattr(f, "cache", None)
+        if not isinstance(cache, fsspec.caching.MMapCache):
+            # whole file already cached locally, nothing to do
+            return 0
+        bs = cache.blocksize
+        runs = _get_missing_runs(ranges, cache.blocks, bs, cache.size,
+                                 max_request)
+        if not runs:
+            return 0
+        with log.Span("prefetch.fetch", items=len(runs)) as sp, \
+                concurrent.futures.ThreadPoolExecutor(max_workers) as ex:
+            futures = {ex.submit(fs.fs.cat_file, path, start, end):
+                       (start, end) for (start, end) in runs}
+            for fut in concurrent.futures.as_completed(futures):
+                (start, end) = futures[fut]
+                cache.cache[start:end] = fut.result()
+                cache.blocks.update(range(start // bs, (end - 1) // bs + 1))
+                sp.add(bytes=end - start)
+    return sum(end - start for (start, end) in runs)
+
+
+def get_read_trace(fs, path):
+    """Get byte ranges of a file that are in the block cache.
+
+    After loading a file with satpy, these are the ranges satpy read.
+
+    Args:
+        fs (fsspec.implementations.cached.CachingFileSystem): Caching
+            filesystem.
+        path (str): Path of file on the filesystem.
+
+    Returns:
+        List of (start, end) byte offsets, end exclusive.
+    """
+    with fs.open(path, "rb") as f:
+        cache = getattr(f, "cache", None)
+        if not isinstance(cache, fsspec.caching.MMapCache):
+            return [(0, f.size)]
+        return _blocks_to_ranges(cache.blocks, cache.blocksize, cache.size)
+
+
+def _get_trace_key(path):
+    """Get key for file in read trace.
+
+    ABI files of the same sector and channel have nearly the same layout,
+    such that a trace is keyed on the part of the filename before the time,
+    such as ``OR_ABI-L1b-RadC-M6C14_G16``.
+    """
+    return os.path.basename(path).split("_s")[0]
+
+
+def save_read_trace(fsfiles, out):
+    """Save byte ranges read from files to a JSON file.
+
+    Args:
+        fsfiles (Iterable[satpy.readers.FSFile]): Files read before, through
+            a caching filesystem.
+        out (str or pathlib.Path): JSON file to write.
+    """
+    trace = {}
+    for fsf in fsfiles:
+        trace[_get_trace_key(os.fspath(fsf))] = get_read_trace(
+                fsf.fs, os.fspath(fsf))
+    with open(out, "w") as fp:
+        json.dump(trace, fp, indent=1)
+
+
+def load_read_trace(src):
+    """Load read trace written by :func:`save_read_trace`.
+
+    Args:
+        src (str or pathlib.Path): JSON file to read.
+
+    Returns:
+        Dictionary mapping filename prefixes to lists of byte ranges.
+    """
+    with open(src, "r") as fp:
+        return json.load(fp)
+
+
+def prefetch_fsfiles(fsfiles, variables=("Rad", "DQF"), trace=None,
+                     max_workers=8):
+    """Prefetch byte ranges that reading ABI files will need.
+
+    For files of a sector and channel in the read trace, fetch the ranges
+    from the trace.  Otherwise, get the ranges from the HDF5 chunk index.
+    If ``h5py`` is not installed, files not in the trace are skipped.
+
+    Args:
+        fsfiles (Iterable[satpy.readers.FSFile]): Files from
+            :func:`sattools.abi.get_fsfiles`.
+        variables (Iterable[str]): Variables to get byte ranges for from
+            the chunk index.
+        trace (Mapping or str or pathlib.Path): Read trace, or JSON file
+            with read trace, see :func:`save_read_trace`.
+        max_workers (int): Maximum number of requests at the same time,
+            per file.
+
+    Returns:
+        Number of bytes fetched.
+    """
+    if trace is None:
+        trace = {}
+    elif not isinstance(trace, dict):
+        trace = load_read_trace(trace)
+    total = 0
+    with log.Span("prefetch.fsfiles") as sp:
+        for fsf in fsfiles:
+            path = os.fspath(fsf)
+            ranges = trace.get(_get_trace_key(path))
+            if ranges is None:
+                try:
+                    with fsf.open() as f:
+                        ranges = get_chunk_ranges(f, variables)
+                except ImportError:
+                    logger.warning("No read trace for "
+                                   f"{os.path.basename(path):s} and no "
+                                   "h5py for chunk index, not prefetching")
+                    continue
+            total += prefetch(fsf.fs, path, ranges, max_workers=max_workers)
+            sp.add(items=1)
+        sp.add(bytes=total)
+    return total
@@ -0,0 +1,97 @@
+"""Run or talk to the sattools job server."""
+
+import sys
+import json
+import pathlib
+import argparse
+import logging
+
+from .. import log
+from .. import server
+
+
+def get_parser_serve():
+    """Get the argument parser for the server."""
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument(
+            "--socket", action="store", type=pathlib.Path,
+            default=server.get_socket_path(),
+            help="Path of Unix socket to listen on.")
+
+    parser.add_argument(
+            "--workers", action="store", type=int, default=1,
+            help="Maximum number of jobs to run at the same time.  "
+                 "Jobs on the same files share readers, which are not "
+                 "thread-safe, so use more only for jobs on different "
+                 "files.")
+
+    parser.add_argument(
+            "--cache-dir", action="store", type=pathlib.Path,
+            help="Directory for resampling and overlay caches.")
+
+    parser.add_argument(
+            "--max-scenes", action="store", type=int, default=8,
+            help="Number of recently created scenes to keep.")
+
+    return parser
+
+
+def get_parser_submit():
+    """Get the argument parser for the client."""
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument(
+            "type", action="store", type=str,
+            choices=("show", "video", "video_files", "ping", "shutdown"),
+            help="Type of job.")
+
+    parser.add_argument(
+            "args", action="store", type=json.loads, nargs="?", default={},
+            help="Arguments for the job as JSON object, such as "
+                 "'{\"files\": [\"a.nc\"], \"areas\": [\"germ\"], "
+                 "\"composites\": [\"overview\"], \"outdir\": \"/tmp\"}'")
+
+    parser.add_argument(
+            "--socket", action="store", type=pathlib.Path,
+            default=server.get_socket_path(),
+            help="Path of Unix socket of the server.")
+
+    parser.add_argument(
+            "--timeout", action="store", type=float,
+            help="Seconds to wait for the job to finish.")
+
+    return parser
+
+
+def parse_cmdline(get_parser=get_parser_serve):
+    """Parse the command line."""
+    return get_parser().parse_args()
+
+
+def serve():
+    """Parse commandline and run the job server."""
+    p = parse_cmdline(get_parser=get_parser_serve)
+    log.setup_main_handler(
+        mods=("fogtools", "typhon", "fogpy", "sattools", "fcitools", "satpy",
+              "pyresample"),
+        level=logging.INFO)
+    server.serve(
+            socket_path=p.socket,
+            max_workers=p.workers,
+            cache_dir=p.cache_dir,
+            max_scenes=p.max_scenes)
+
+
+def submit():
+    """Parse commandline and submit a job to the job server."""
+    p = parse_cmdline(get_parser=get_parser_submit)
+    reply = server.submit(p.type, socket_path=p.socket, timeout=p.timeout,
+                          **p.args)
+    print(json.dumps(reply, indent=2))
+    if reply["status"] != "ok":
+        sys.exit(1)
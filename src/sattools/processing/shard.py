@@ -0,0 +1,158 @@
+"""Plan, run, or merge time shards of ABI + GLM video processing."""
+
+import sys
+import pathlib
+import argparse
+import logging
+
+from .. import log
+from .. import shard
+from .video import _timestamp
+
+
+def get_parser_plan():
+    """Get the argument parser for planning shards."""
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument(
+            "start_time", action="store", type=_timestamp,
+            help="Start time")
+
+    parser.add_argument(
+            "end_time", action="store", type=_timestamp,
+            help="End time")
+
+    parser.add_argument(
+            "spec_dir", action="store", type=pathlib.Path,
+            help="Directory where to write shard specifications.  Should "
+                 "be on storage shared by all nodes.")
+
+    parser.add_argument(
+            "out_dir", action="store", type=pathlib.Path,
+            help="Base directory for shard outputs.  Should be on storage "
+                 "shared by all nodes.")
+
+    parser.add_argument(
+            "--window", action="store", type=str, default="1h",
+            help="Maximum duration of each shard.")
+
+    parser.add_argument(
+            "--sector", action="store", type=str,
+            choices=["C", "F", "M1", "M2"], default="F",
+            help="Sector for which to show ABI.")
+
+    parser.add_argument(
+            "--area", action="store", type=str,
+            help="Area on which to project.")
+
+    parser.add_argument(
+            "--no-align-meso", action="store_false", dest="align_meso",
+            default=None,
+            help="Do not split shards where the MESO sector moves.")
+
+    parser.add_argument(
+            "--filename-pattern-video", action="store", type=str,
+            default="{name:s}-{start_time:%Y%m%d_%H%M}-"
+                    "{end_time:%Y%m%d_%H%M}.mp4",
+            help="Filename pattern for output video segments.")
+
+    parser.add_argument(
+            "--quicklook", action="store", type=int, metavar="FACTOR",
+            help="Quick-look mode: reduce resolution by averaging blocks "
+                 "of FACTOR×FACTOR pixels directly after loading.")
+
+    return parser
+
+
+def get_parser_run():
+    """Get the argument parser for running shards."""
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument(
+            "specs", action="store", type=pathlib.Path, nargs="+",
+            help="Shard specifications to run.")
+
+    return parser
+
+
+def get_parser_merge():
+    """Get the argument parser for merging shards."""
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument(
+            "spec_dir", action="store", type=pathlib.Path,
+            help="Directory with shard specifications.")
+
+    parser.add_argument(
+            "out_dir", action="store", type=pathlib.Path,
+            help="Directory where to write merged videos and playlists.")
+
+    parser.add_argument(
+            "--concat-out", action="store", type=str, default="{name}.mp4",
+            help="Filename pattern for merged videos.")
+
+    parser.add_argument(
+            "--playlist-out", action="store", type=str,
+            default="{name}.m3u8",
+            help="Filename pattern for merged playlists.")
+
+    return parser
+
+
+def parse_cmdline(get_parser=get_parser_plan):
+    """Parse the command line."""
+    return get_parser().parse_args()
+
+
+def _setup_logging():
+    log.setup_main_handler(
+        mods=("fogtools", "typhon", "fogpy", "sattools", "fcitools", "satpy",
+              "pyresample"),
+        level=logging.INFO)
+
+
+def plan():
+    """Parse commandline and write shard specifications."""
+    p = parse_cmdline(get_parser=get_parser_plan)
+    _setup_logging()
+    kwargs = {"vid_out": p.filename_pattern_video}
+    if p.area is not None:
+        kwargs["area"] = p.area
+    if p.quicklook is not None:
+        kwargs["quicklook"] = p.quicklook
+    specs = shard.plan_shards(
+            p.start_time, p.end_time, p.window, sector=p.sector,
+            out_dir=p.out_dir, align_meso=p.align_meso, **kwargs)
+    for path in shard.write_specs(specs, p.spec_dir):
+        print(path)
+
+
+def run():
+    """Parse commandline and run shards."""
+    p = parse_cmdline(get_parser=get_parser_run)
+    _setup_logging()
+    failed = False
+    for spec in p.specs:
+        try:
+            shard.run_shard(spec)
+        except Exception:
+            logging.getLogger(__name__).exception(f"Shard {spec!s} failed")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+def merge():
+    """Parse commandline and merge shard outputs."""
+    p = parse_cmdline(get_parser=get_parser_merge)
+    _setup_logging()
+    for path in shard.merge_shards(
+            p.spec_dir, p.out_dir, concat_out=p.concat_out,
+            playlist_out=p.playlist_out):
+        print(path)
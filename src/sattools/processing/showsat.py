@@ -1,10 +1,14 @@
 """Show satellite data with pytroll."""
 
+import sys
+import json
 import pathlib
 import argparse
+import contextlib
 from .. import vis
 from .. import log
 from .. import ptc
+from .. import batch
 
 
 def get_parser():
@@ -19,7 +23,8 @@ def get_parser():
 
     parser.add_argument(
             "files", action="store", type=pathlib.Path,
-            nargs="+", help="Input satellite files")
+            nargs="*", help="Input satellite files.  Not needed with "
+                            "--manifest.")
 
     parser.add_argument(
             "--composites", action="store", type=str,
@@ -57,12 +62,82 @@ def get_parser():
             help="What reader to use.  When not given. let Satpy "
                  "figure it out automatically.")
 
+    parser.add_argument(
+            "--quicklook", action="store", type=int, metavar="FACTOR",
+            help="Quick-look mode: reduce resolution by averaging blocks "
+                 "of FACTOR×FACTOR pixels directly after loading.")
+
+    parser.add_argument(
+            "--cog", action="store_true",
+            help="Write Cloud Optimized GeoTIFFs: tiled, compressed, "
+                 "and with overviews.")
+
+    parser.add_argument(
+            "--strategy", action="store", type=str,
+            choices=("composite_first", "resample_first", "auto"),
+            default="composite_first",
+            help="Whether to generate composites before or after "
+                 "resampling, or to choose based on estimated cost.")
+
+    parser.add_argument(
+            "--trace", action="store", type=pathlib.Path,
+            help="Record how long each processing stage takes.  Writes a "
+                 "Chrome trace JSON file to this path and logs a summary "
+                 "table at the end.")
+
+    parser.add_argument(
+            "--manifest", action="store", type=pathlib.Path,
+            help="Run the jobs listed in this YAML or JSON Lines file "
+                 "rather than a single job.  Options given on the command "
+                 "line serve as defaults for the jobs.  See "
+                 "sattools.batch for the format.")
+
+    parser.add_argument(
+            "--workers", action="store", type=int, default=1,
+            help="With --manifest, maximum number of jobs to run at the "
+                 "same time.")
+
+    parser.add_argument(
+            "--report", action="store", type=pathlib.Path,
+            help="With --manifest, write the outcome of each job to this "
+                 "JSON Lines file.")
+
     return parser
 
 
 def parse_cmdline():
     """Parse commandline arguments."""
-    return get_parser().parse_args()
+    parser = get_parser()
+    p = parser.parse_args()
+    if not p.files and not p.manifest:
+        parser.error("Either pass input files or --manifest")
+    return p
+
+
+def _run_manifest(p, areas):
+    """Run jobs from manifest, with command line options as defaults."""
+    defaults = {"outdir": str(p.outdir),
+                "channels": p.channels,
+                "composites": p.composites,
+                "areas": p.areas or [],
+                "filename_pattern": p.filename_pattern,
+                "reader": p.reader,
+                "coastline_dir": p.coastline_dir,
+                "show_only_coastlines": p.show_only_coastlines,
+                "quicklook": p.quicklook,
+                "cog": p.cog,
+                "strategy": p.strategy}
+    jobs = [{**defaults, **job} for job in batch.read_manifest(p.manifest)]
+    results = batch.run_jobs(jobs, max_workers=p.workers, areas=areas)
+    if p.report:
+        with p.report.open("w", encoding="utf-8") as fp:
+            for res in results:
+                fp.write(json.dumps(res) + "\n")
+    for res in results:
+        print(f"{res['name']:s}: {res['status']:s}",
+              res["error"] or ", ".join(res["files"]))
+    if any(res["status"] == "failed" for res in results):
+        sys.exit(1)
 
 
 def main():
@@ -70,14 +145,22 @@ def main():
     p = parse_cmdline()
     log.setup_main_handler()
     areas = ptc.get_all_areas()
-    files = vis.show(
-            files=p.files,
-            channels=p.channels,
-            composites=p.composites,
-            regions=[areas.get(area, area) for area in p.areas],
-            d_out=p.outdir,
-            reader=p.reader,
-            fn_out=p.filename_pattern,
-            path_to_coastlines=p.coastline_dir,
-            show_only_coastlines=p.show_only_coastlines)
+    trace = log.TraceContext(p.trace) if p.trace else contextlib.nullcontext()
+    with trace:
+        if p.manifest:
+            _run_manifest(p, areas)
+            return
+        files = vis.show(
+                files=p.files,
+                channels=p.channels,
+                composites=p.composites,
+                regions=[areas.get(area, area) for area in p.areas],
+                d_out=p.outdir,
+                reader=p.reader,
+                fn_out=p.filename_pattern,
+                path_to_coastlines=p.coastline_dir,
+                show_only_coastlines=p.show_only_coastlines,
+                quicklook=p.quicklook,
+                cog=p.cog,
+                strategy=p.strategy)
     print("Files written:", files)
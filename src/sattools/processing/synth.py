@@ -0,0 +1,132 @@
+"""Generate synthetic GLM and ABI archives for tests and benchmarks."""
+
+import pathlib
+import argparse
+import logging
+
+from .. import log
+from .. import synth
+from .video import _timestamp
+
+
+def _gap(s):
+    """Parse gap as START/END."""
+    (start, end) = s.split("/")
+    return (_timestamp(start), _timestamp(end))
+
+
+def get_parser():
+    """Get the argument parser."""
+    parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument(
+            "start_time", action="store", type=_timestamp,
+            help="Start time")
+
+    parser.add_argument(
+            "end_time", action="store", type=_timestamp,
+            help="End time")
+
+    parser.add_argument(
+            "--glm-sector", action="append", type=str,
+            choices=["C", "F", "M1", "M2"], default=[],
+            help="Write gridded GLM for sector below $NAS_DATA.  Can be "
+                 "given multiple times.")
+
+    parser.add_argument(
+            "--meso-location", action="store", type=float, nargs=2,
+            metavar=("LAT", "LON"), default=(30.0, -90.0),
+            help="Initial location of MESO sectors.")
+
+    parser.add_argument(
+            "--abi-sector", action="append", type=str,
+            choices=["C", "F", "M1", "M2"], default=[],
+            help="Write ABI L1b for sector.  Can be given multiple times.")
+
+    parser.add_argument(
+            "--chans", action="store", type=int, nargs="+", default=[14],
+            help="ABI channels to write.")
+
+    parser.add_argument(
+            "--lcfa", action="store_true",
+            help="Write GLM L2 LCFA.")
+
+    parser.add_argument(
+            "--bucket-dir", action="store", type=pathlib.Path,
+            help="Local directory posing as the root of the S3 bucket, for "
+                 "ABI and LCFA.")
+
+    parser.add_argument(
+            "--s3-endpoint", action="store", type=str,
+            help="S3 endpoint URL, such as of a moto server, for ABI and "
+                 "LCFA.  Used if --bucket-dir is not given.")
+
+    parser.add_argument(
+            "--density", action="store", type=float, default=1.0,
+            help="Fraction of files present.")
+
+    parser.add_argument(
+            "--gap", action="append", type=_gap, default=[],
+            metavar="START/END",
+            help="Period without files.  Can be given multiple times.")
+
+    parser.add_argument(
+            "--move-every", action="store", type=int,
+            help="Move MESO sectors every so many time slots.")
+
+    parser.add_argument(
+            "--shape", action="store", type=int, nargs=2, default=(20, 20),
+            metavar=("ROWS", "COLS"),
+            help="Grid size at 2 km resolution.")
+
+    parser.add_argument(
+            "--empty", action="store_true",
+            help="Create empty files, for benchmarks that only list files.")
+
+    return parser
+
+
+def parse_cmdline():
+    """Parse the command line."""
+    p = get_parser().parse_args()
+    if (p.abi_sector or p.lcfa) and not (p.bucket_dir or p.s3_endpoint):
+        get_parser().error("ABI or LCFA need --bucket-dir or --s3-endpoint")
+    return p
+
+
+def _get_fs(p):
+    if p.bucket_dir is not None:
+        from fsspec.implementations.local import LocalFileSystem
+        return (LocalFileSystem(), str(p.bucket_dir) + "/")
+    import s3fs
+    return (s3fs.S3FileSystem(
+        client_kwargs={"endpoint_url": p.s3_endpoint}), "")
+
+
+def main():
+    """Parse commandline and write synthetic archives."""
+    p = parse_cmdline()
+    log.setup_main_handler(
+        mods=("sattools",),
+        level=logging.INFO)
+    common = dict(density=p.density, gaps=p.gap, empty=p.empty)
+    for sector in p.glm_sector:
+        files = synth.make_glm_archive(
+                p.start_time, p.end_time, sector=sector,
+                lat=p.meso_location[0], lon=p.meso_location[1],
+                shape=tuple(p.shape), move_every=p.move_every, **common)
+        print(f"GLM {sector:s}: {len(files):d} files")
+    if p.abi_sector or p.lcfa:
+        (fs, prefix) = _get_fs(p)
+    for sector in p.abi_sector:
+        files = synth.make_abi_archive(
+                fs, p.start_time, p.end_time, sector=sector, chans=p.chans,
+                prefix=prefix, shape=tuple(p.shape),
+                move_every=p.move_every, **common)
+        print(f"ABI {sector:s}: {len(files):d} files")
+    if p.lcfa:
+        files = synth.make_lcfa_archive(
+                fs, p.start_time, p.end_time, prefix=prefix, **common)
+        print(f"LCFA: {len(files):d} files")
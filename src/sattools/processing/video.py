@@ -3,12 +3,24 @@
 import pathlib
 import argparse
 import logging
-
-import pandas
+import contextlib
 
 from .. import vis
 from .. import log
 from .. import io
+from .. import framecache
+
+
+def _timestamp(s):
+    """Parse timestamp, importing pandas only when needed."""
+    import pandas
+    return pandas.Timestamp(s)
+
+
+def _timedelta(s):
+    """Parse time interval, importing pandas only when needed."""
+    import pandas
+    return pandas.Timedelta(s)
 
 
 def _add_common_to_parser(parser):
@@ -28,6 +40,17 @@ def _add_common_to_parser(parser):
             "--coastline-dir", action="store", type=str,
             help="Path to directory with coastlines.")
 
+    parser.add_argument(
+            "--quicklook", action="store", type=int, metavar="FACTOR",
+            help="Quick-look mode: reduce resolution by averaging blocks "
+                 "of FACTOR×FACTOR pixels directly after loading.")
+
+    parser.add_argument(
+            "--trace", action="store", type=pathlib.Path,
+            help="Record how long each processing stage takes.  Writes a "
+                 "Chrome trace JSON file to this path and logs a summary "
+                 "table at the end.")
+
 
 def get_parser_files():
     """Get the argument parser for passing files."""
@@ -55,10 +78,10 @@ def get_parser_times():
             formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 
     parser.add_argument(
-            "start_time", action="store", type=pandas.Timestamp)
+            "start_time", action="store", type=_timestamp)
 
     parser.add_argument(
-            "end_time", action="store", type=pandas.Timestamp)
+            "end_time", action="store", type=_timestamp)
 
     parser.add_argument(
             "--area", action="store", type=str,
@@ -74,11 +97,48 @@ def get_parser_times():
             help="Directory where to write resulting images.",
             default=io.plotdir())
 
+    parser.add_argument(
+            "--frame-cache-dir", action="store", type=pathlib.Path,
+            help="Directory to cache rendered frames.  When given, frames "
+                 "that were rendered before are reused rather than "
+                 "rendered again.")
+
+    parser.add_argument(
+            "--frame-cache-size", action="store", type=float,
+            default=2048,
+            help="Maximum size of frame cache in MiB.")
+
+    parser.add_argument(
+            "--segment-duration", action="store", type=_timedelta,
+            help="Write video as segments covering this duration each "
+                 "(such as '1h'), with an HLS playlist per dataset.  "
+                 "Each segment is written as soon as it is ready, such that "
+                 "long periods can be processed in constant memory.")
+
+    parser.add_argument(
+            "--checkpoint", action="store", type=pathlib.Path,
+            help="With --segment-duration, record completed segments in "
+                 "this file.  When run again with the same checkpoint, "
+                 "continue with the first incomplete segment.")
+
+    parser.add_argument(
+            "--concat-out", action="store", type=str,
+            help="With --segment-duration, finally concatenate the "
+                 "segments into one video per dataset following this "
+                 "pattern, such as '{name}.mp4'.")
+
     _add_common_to_parser(parser)
 
     return parser
 
 
+def _trace_context(trace):
+    """Get context manager for tracing if requested."""
+    if trace:
+        return log.TraceContext(trace)
+    return contextlib.nullcontext()
+
+
 def parse_cmdline(get_parser=get_parser_files):
     """Parse the command line."""
     return get_parser().parse_args()
@@ -91,11 +151,13 @@ def video_files():
         mods=("fogtools", "typhon", "fogpy", "sattools", "fcitools", "satpy",
               "pyresample"),
         level=logging.INFO)
-    vis.show_video_abi_glm(
-            files=p.files,
-            img_out=p.filename_pattern_image,
-            vid_out=p.filename_pattern_video,
-            out_dir=p.outdir)
+    with _trace_context(p.trace):
+        vis.show_video_abi_glm(
+                files=p.files,
+                img_out=p.filename_pattern_image,
+                vid_out=p.filename_pattern_video,
+                out_dir=p.outdir,
+                quicklook=p.quicklook)
     print("Files written to:", p.outdir)
 
 
@@ -106,12 +168,23 @@ def video_times():
         mods=("fogtools", "typhon", "fogpy", "sattools", "fcitools", "satpy",
               "pyresample"),
         level=logging.DEBUG)
-    vis.show_video_abi_glm_times(
-            start_date=p.start_time,
-            end_date=p.end_time,
-            img_out=p.filename_pattern_image,
-            vid_out=p.filename_pattern_video,
-            out_dir=p.outdir,
-            sector=p.sector,
-            area=p.area)
+    if p.frame_cache_dir:
+        frame_cache = framecache.FrameCache(
+                p.frame_cache_dir, max_size=int(p.frame_cache_size*2**20))
+    else:
+        frame_cache = None
+    with _trace_context(p.trace):
+        vis.show_video_abi_glm_times(
+                start_date=p.start_time,
+                end_date=p.end_time,
+                img_out=p.filename_pattern_image,
+                vid_out=p.filename_pattern_video,
+                out_dir=p.outdir,
+                sector=p.sector,
+                area=p.area,
+                frame_cache=frame_cache,
+                quicklook=p.quicklook,
+                segment_duration=p.segment_duration,
+                checkpoint=p.checkpoint,
+                concat_out=p.concat_out)
     print("Files written to:", p.outdir)
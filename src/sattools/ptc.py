@@ -1,28 +1,443 @@
 """Utilities related to pytroll configuration."""
 
+import os
+import json
 import logging
-import os.path
+import pathlib
+import threading
+import collections.abc
 
-import pkg_resources
-import satpy
-import pyresample
+import numpy
+import yaml
+
+from . import io
+from .lazy import lazy_import
+
+satpy = lazy_import("satpy")
+pyresample = lazy_import("pyresample.area_config")
 
 logger = logging.getLogger(__name__)
 
+# increase when the structure of the cache file changes
+CATALOGUE_VERSION = 2
+
+_yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# catalogues returned by get_all_areas, see there
+_catalogues = {}
+_catalogues_lock = threading.Lock()
+
 
-def get_all_areas():
-    """Get a dictionary with all findable areas.
+def get_area_files():
+    """Get all area definition files on the satpy configuration path.
 
-    This relies on the satpy configuration path being set correctly.
+    Returns the satpy builtin ``areas.yaml`` followed by ``areas.yaml`` for
+    each directory on the satpy configuration path.  Areas in later files
+    take precedence over areas in earlier files.
     """
-    core = pkg_resources.resource_filename("satpy", "etc/areas.yaml")
+    # importlib.resources cannot do this on Python 3.8, as satpy.etc is not a
+    # package; satpy finds its builtin configuration the same way
+    core = os.path.join(os.path.dirname(satpy.__file__), "etc", "areas.yaml")
     others = [os.path.join(x, "areas.yaml") for x in
               satpy.config["config_path"]]
-    D = {}
-    for fn in [core] + others:
-        areas = pyresample.area_config.load_area(fn)
-        if isinstance(areas, pyresample.AreaDefinition):
-            # load_area doesn't return a list if it's just one...
-            areas = [areas]
-        D.update({ar.area_id: ar for ar in areas})
-    return D
+    return [core] + others
+
+
+def _read_area_file(fn):
+    """Read unparsed area definitions from area file."""
+    logger.debug(f"Indexing areas in {fn:s}")
+    with open(fn, "r", encoding="utf-8") as fp:
+        return yaml.load(fp, Loader=_yaml_loader) or {}
+
+
+def get_lonlat_bbox(ar, samples=50):
+    """Get lon/lat bounding box for an area.
+
+    The bounding box is based on the longitudes and latitudes of a grid of
+    ``samples`` × ``samples`` pixels.  Pixels not on the Earth, such as in
+    the corners of a geostationary full disk, are ignored.  For areas
+    crossing the antimeridian, the western longitude is larger than the
+    eastern longitude.
+
+    Args:
+        ar (pyresample.geometry.AreaDefinition): Area.
+        samples (int): Number of pixels to sample in each dimension.
+
+    Returns:
+        (lon_west, lat_south, lon_east, lat_north), or None if no sampled
+        pixel is on the Earth.
+    """
+    sub = ar[::max(ar.height // samples, 1), ::max(ar.width // samples, 1)]
+    (lons, lats) = sub.get_lonlats()
+    ok = numpy.isfinite(lons) & numpy.isfinite(lats)
+    if not ok.any():
+        return None
+    (lons, lats) = (lons[ok], lats[ok])
+    (latmin, latmax) = (float(lats.min()), float(lats.max()))
+    (lonmin, lonmax) = (float(lons.min()), float(lons.max()))
+    # if the box is narrower when longitudes are counted from 0 to 360, the
+    # area crosses the antimeridian
+    lons360 = lons % 360
+    if lons360.max() - lons360.min() < lonmax - lonmin:
+        (lonmin, lonmax) = (
+                (float(x) + 180) % 360 - 180
+                for x in (lons360.min(), lons360.max()))
+    return (lonmin, latmin, lonmax, latmax)
+
+
+def get_resolution(ar):
+    """Get approximate pixel size in metre at the centre of an area."""
+    (r, c) = (ar.height // 2, ar.width // 2)
+    (lon1, lat1) = numpy.deg2rad(ar.get_lonlat(r, c))
+    (lon2, lat2) = numpy.deg2rad(ar.get_lonlat(r, min(c+1, ar.width-1)))
+    (lon3, lat3) = numpy.deg2rad(ar.get_lonlat(min(r+1, ar.height-1), c))
+
+    def hav(lon1, lat1, lon2, lat2):
+        a = (numpy.sin((lat2-lat1)/2)**2 +
+             numpy.cos(lat1)*numpy.cos(lat2)*numpy.sin((lon2-lon1)/2)**2)
+        return 2 * 6371008.8 * numpy.arcsin(numpy.sqrt(a))
+    res = numpy.nanmean([hav(lon1, lat1, lon2, lat2),
+                         hav(lon1, lat1, lon3, lat3)])
+    return float(res) if numpy.isfinite(res) else None
+
+
+def _split_wrapping(boxes):
+    """Split boxes crossing the antimeridian in two.
+
+    Returns the boxes as an (N, 4) array and, for each, the index of the
+    box it came from.
+    """
+    boxes = numpy.asarray(boxes, dtype="f8").reshape(-1, 4)
+    wraps = boxes[:, 0] > boxes[:, 2]
+    west = boxes[wraps].copy()
+    west[:, 2] = 180
+    east = boxes[wraps].copy()
+    east[:, 0] = -180
+    idx = numpy.arange(boxes.shape[0])
+    return (numpy.concatenate([boxes[~wraps], west, east]),
+            numpy.concatenate([idx[~wraps], idx[wraps], idx[wraps]]))
+
+
+class AreaIndex:
+    """Spatial index over lon/lat bounding boxes.
+
+    This is a static R-tree packed with the Sort-Tile-Recursive algorithm:
+    boxes are sorted into vertical slices by longitude, and within each
+    slice by latitude, and then grouped into nodes of ``node_size`` boxes.
+    The same is repeated for the nodes until a single root remains.
+    Queries descend the tree level by level, testing all candidate nodes of
+    a level at once.
+
+    Boxes are given as (lon_west, lat_south, lon_east, lat_north).  A box
+    with lon_west > lon_east crosses the antimeridian.
+    """
+
+    def __init__(self, boxes, node_size=16):
+        """Build the index.
+
+        Args:
+            boxes (array_like): (N, 4) bounding boxes.
+            node_size (int): Maximum number of children per node.
+        """
+        (boxes, ids) = _split_wrapping(boxes)
+        self.node_size = node_size
+        order = self._pack(boxes)
+        self.ids = ids[order]
+        self.levels = [boxes[order]]
+        while self.levels[-1].shape[0] > 1:
+            self.levels.append(self._parents(self.levels[-1]))
+
+    def _pack(self, boxes):
+        """Get Sort-Tile-Recursive order for boxes."""
+        n = boxes.shape[0]
+        n_nodes = -(-n // self.node_size)
+        n_slices = int(numpy.ceil(numpy.sqrt(n_nodes)))
+        per_slice = n_slices * self.node_size
+        xc = boxes[:, 0] + boxes[:, 2]
+        yc = boxes[:, 1] + boxes[:, 3]
+        by_x = numpy.argsort(xc, kind="stable")
+        return numpy.concatenate(
+                [sl[numpy.argsort(yc[sl], kind="stable")]
+                 for sl in numpy.split(by_x, numpy.arange(
+                     per_slice, n, per_slice))])
+
+    def _parents(self, boxes):
+        """Get bounding boxes of groups of node_size boxes."""
+        starts = numpy.arange(0, boxes.shape[0], self.node_size)
+        return numpy.stack(
+                [numpy.minimum.reduceat(boxes[:, 0], starts),
+                 numpy.minimum.reduceat(boxes[:, 1], starts),
+                 numpy.maximum.reduceat(boxes[:, 2], starts),
+                 numpy.maximum.reduceat(boxes[:, 3], starts)], axis=1)
+
+    def query(self, box):
+        """Get indices of boxes intersecting box.
+
+        Args:
+            box (Sequence[float]): (lon_west, lat_south, lon_east, lat_north)
+
+        Returns:
+            Sorted array of indices into the boxes passed on creation.
+        """
+        (qboxes, _) = _split_wrapping(box)
+        found = [self._query(qb) for qb in qboxes]
+        return numpy.unique(numpy.concatenate(found))
+
+    def _query(self, qb):
+        cand = numpy.arange(self.levels[-1].shape[0])
+        for level in range(len(self.levels)-1, -1, -1):
+            b = self.levels[level][cand]
+            cand = cand[(b[:, 0] <= qb[2]) & (b[:, 2] >= qb[0]) &
+                        (b[:, 1] <= qb[3]) & (b[:, 3] >= qb[1])]
+            if level > 0:
+                n_below = self.levels[level-1].shape[0]
+                children = (cand[:, numpy.newaxis] * self.node_size +
+                            numpy.arange(self.node_size)).ravel()
+                cand = children[children < n_below]
+        return self.ids[cand]
+
+
+class AreaCatalogue(collections.abc.Mapping):
+    """Mapping from area names to area definitions.
+
+    Rather than parsing all area definitions in advance, the catalogue
+    first builds an index of area names with their unparsed definitions,
+    and creates an area definition only when it is requested.  The index is
+    cached on disk and an area file is parsed again only when its size or
+    modification time has changed.
+
+    The catalogue can also tell which areas cover a point or intersect a
+    box or another area, using a spatial index of the lon/lat bounding boxes
+    of the areas (see :class:`AreaIndex`).  The bounding boxes are stored
+    in the cache, such that they need to be calculated only once.
+
+    Example::
+
+        areas = AreaCatalogue()
+        ar = areas["germ"]  # only this area definition is created
+        names = areas.covering_point(10, 52)
+    """
+
+    def __init__(self, files=None, cache_dir=None):
+        """Initiate the area catalogue.
+
+        Args:
+            files (List[str or pathlib.Path]): Area files to index.  If not
+                given, use :func:`get_area_files`.
+            cache_dir (str or pathlib.Path): Directory for the index cache.  If
+                not given, use a subdirectory of the sattools cache directory.
+        """
+        self.files = [str(f) for f in (files or get_area_files())]
+        self.cache_file = pathlib.Path(
+                cache_dir or io.get_cache_dir(subdir="sattools")
+                ) / "area-catalogue.json"
+        self._index = None
+        self._source = None
+        self._file_entries = None
+        self._areas = {}
+        self._spatial_index = None
+
+    @property
+    def index(self):
+        """Dictionary of unparsed area definitions per area name."""
+        if self._index is None:
+            self._build_index()
+        return self._index
+
+    def _read_cache(self):
+        """Read cached file entries, or an empty dict if unusable."""
+        try:
+            with self.cache_file.open("r", encoding="utf-8") as fp:
+                cache = json.load(fp)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != CATALOGUE_VERSION:
+            return {}
+        return cache["files"]
+
+    def _write_cache(self):
+        """Write file entries to cache, atomically."""
+        cache = {"version": CATALOGUE_VERSION, "files": self._file_entries}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with io.atomic_write(self.cache_file, encoding="utf-8") as fp:
+                json.dump(cache, fp, default=str)
+        except OSError as e:
+            logger.warning(f"Could not write area catalogue cache: {e!s}")
+
+    def _build_index(self):
+        """Build index from cached or newly parsed area files."""
+        cached = self._read_cache()
+        entries = {}
+        changed = False
+        for fn in self.files:
+            try:
+                st = os.stat(fn)
+            except FileNotFoundError:
+                logger.debug(f"No area file at {fn:s}")
+                continue
+            entry = cached.get(fn)
+            if (entry is None or entry["mtime_ns"] != st.st_mtime_ns
+                    or entry["size"] != st.st_size):
+                entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                         "areas": _read_area_file(fn)}
+                changed = True
+            entries[fn] = entry
+        self._file_entries = entries
+        self._index = {}
+        self._source = {}
+        for (fn, entry) in entries.items():
+            self._index.update(entry["areas"])
+            self._source.update(dict.fromkeys(entry["areas"], fn))
+        if changed or entries.keys() != cached.keys():
+            self._write_cache()
+
+    def __getitem__(self, name):
+        """Get area definition for name, creating it if needed."""
+        if name not in self._areas:
+            params = self.index[name]
+            self._areas[name] = pyresample.area_config.load_area_from_string(
+                    yaml.safe_dump({name: params}), name)
+        return self._areas[name]
+
+    def __iter__(self):
+        """Iterate over area names."""
+        return iter(self.index)
+
+    def __len__(self):
+        """Number of areas in catalogue."""
+        return len(self.index)
+
+    def __contains__(self, name):
+        """Check whether area name is in catalogue, without creating it."""
+        return name in self.index
+
+    def _get_extents(self):
+        """Get bounding box and resolution for each area.
+
+        Calculates those not yet in the cache and updates the cache.
+        Returns a dictionary with, for each area, a list with the lon/lat
+        bounding box and the resolution in metre, or None for areas that do
+        not have a fixed extent (such as dynamic areas).
+        """
+        extents = {}
+        changed = False
+        for name in self.index:
+            entry = self._file_entries[self._source[name]]
+            cached = entry.setdefault("extents", {})
+            if name not in cached:
+                ar = self[name]
+                bbox = None
+                if isinstance(ar, pyresample.geometry.AreaDefinition):
+                    bbox = get_lonlat_bbox(ar)
+                cached[name] = (None if bbox is None
+                                else [*bbox, get_resolution(ar)])
+                changed = True
+            extents[name] = cached[name]
+        if changed:
+            self._write_cache()
+        return extents
+
+    @property
+    def spatial_index(self):
+        """Spatial index of area bounding boxes.
+
+        A tuple with the :class:`AreaIndex`, the names of the areas it
+        covers, and their resolutions.
+        """
+        if self._spatial_index is None:
+            extents = {k: v for (k, v) in self._get_extents().items()
+                       if v is not None}
+            names = numpy.array(list(extents), dtype=object)
+            ext = numpy.array([v for v in extents.values()],
+                              dtype="f8").reshape(-1, 5)
+            self._spatial_index = (AreaIndex(ext[:, :4]), names, ext[:, 4])
+        return self._spatial_index
+
+    def intersecting_box(self, box, rank=True):
+        """Get names of areas intersecting a lon/lat box.
+
+        Areas are matched by their lon/lat bounding boxes, so an area may be
+        reported even if it only covers a part of its bounding box.
+
+        Args:
+            box (Sequence[float]): (lon_west, lat_south, lon_east,
+                lat_north) in degrees.  If lon_west > lon_east, the box crosses
+                the antimeridian.
+            rank (bool): If true, sort areas from fine to coarse resolution.
+                Otherwise, sort by name.
+
+        Returns:
+            List[str] with area names.
+        """
+        (tree, names, res) = self.spatial_index
+        idx = tree.query(box)
+        if rank:
+            idx = idx[numpy.argsort(
+                numpy.nan_to_num(res[idx], nan=numpy.inf), kind="stable")]
+        else:
+            idx = idx[numpy.argsort(names[idx], kind="stable")]
+        return names[idx].tolist()
+
+    def covering_point(self, lon, lat, rank=True):
+        """Get names of areas covering a point.
+
+        Args:
+            lon (float): Longitude in degrees.
+            lat (float): Latitude in degrees.
+            rank (bool): If true, sort from fine to coarse resolution.
+
+        Returns:
+            List[str] with area names.
+        """
+        return self.intersecting_box((lon, lat, lon, lat), rank=rank)
+
+    def intersecting_area(self, ar, rank=True):
+        """Get names of areas intersecting another area.
+
+        Args:
+            ar (pyresample.geometry.AreaDefinition): Area to match.
+            rank (bool): If true, sort from fine to coarse resolution.
+
+        Returns:
+            List[str] with area names.
+        """
+        bbox = get_lonlat_bbox(ar)
+        if bbox is None:
+            return []
+        return self.intersecting_box(bbox, rank=rank)
+
+
+def get_all_areas(cache_dir=None):
+    """Get a mapping with all findable areas.
+
+    This relies on the satpy configuration path being set correctly.  Area
+    definitions are created only when requested, see
+    :class:`AreaCatalogue`.
+
+    The catalogue is kept for the lifetime of the process and returned
+    again by later calls, as long as the area files have the same size and
+    modification time.
+
+    Args:
+        cache_dir (str or pathlib.Path): Directory for the index cache.
+
+    Returns:
+        :class:`AreaCatalogue`
+    """
+    files = tuple(get_area_files())
+    stamp = []
+    for fn in files:
+        try:
+            st = os.stat(fn)
+        except FileNotFoundError:
+            stamp.append(None)
+        else:
+            stamp.append((st.st_mtime_ns, st.st_size))
+    key = (files, None if cache_dir is None else str(cache_dir))
+    with _catalogues_lock:
+        (old_stamp, cat) = _catalogues.get(key, (None, None))
+        if cat is None or old_stamp != stamp:
+            cat = AreaCatalogue(files, cache_dir=cache_dir)
+            _catalogues[key] = (stamp, cat)
+    return cat
@@ -0,0 +1,176 @@
+"""Reference indexes to read NetCDF files on S3 as Zarr with xarray.
+
+This is a standalone helper for code that reads ABI or GLM variables with
+xarray directly; satpy and the scenes in sattools do not use it.
+
+Opening an ABI or GLM NetCDF file on S3 with h5netcdf needs several small
+requests to parse the HDF5 metadata before any data are read.  For a video
+made from thousands of files, these round-trips dominate.
+
+A reference index, in the format of `kerchunk
+<https://fsspec.github.io/kerchunk/>`_, maps each variable of a file to the
+byte ranges of its chunks, and contains the metadata inline.  With it, a
+file can be opened as a Zarr store through
+``fsspec.implementations.reference.ReferenceFileSystem``: the metadata
+come from the index, and the chunks are read directly from the original
+file.  Nothing is converted or copied.
+
+Building an index needs the optional dependency ``kerchunk``.  Indexes
+are stored as JSON files, one per file, in a directory tree that mirrors
+the S3 bucket, such that all files of one hour share a directory.  Once
+built, opening a file needs only ``zarr``.
+
+Satpy's ``abi_l1b`` and ``glm_l2`` readers open files with h5netcdf and
+cannot read a Zarr store, so the scenes made by :mod:`sattools.abi`,
+:mod:`sattools.glm`, and :mod:`sattools.scutil` do not use these
+indexes.
+
+Example::
+
+    ds = refs.open_dataset(
+        "noaa-goes16/ABI-L1b-RadC/2020/001/00/OR_ABI-L1b-RadC-...nc")
+"""
+
+import concurrent.futures
+import json
+import os
+import pathlib
+
+import appdirs
+
+from . import io
+from . import s3
+from . import log
+from .lazy import lazy_import
+
+kerchunk = lazy_import("kerchunk.hdf")
+fsspec = lazy_import("fsspec.implementations.reference")
+xarray = lazy_import("xarray")
+zarr = lazy_import("zarr")
+
+
+def get_reference_path(path, index_dir=None):
+    """Get path of the reference index for a file.
+
+    Args:
+        path (str): Path of the file, such as on S3.  A protocol such as
+            ``s3://`` is ignored.
+        index_dir (str or pathlib.Path): Root of the reference indexes.  If
+            not given, use a directory in the user cache.
+
+    Returns:
+        pathlib.Path to the JSON file, which may or may not exist.
+    """
+    if index_dir is None:
+        index_dir = appdirs.user_cache_dir("sattools-references")
+    path = os.fspath(path).split("://")[-1].lstrip("/")
+    return pathlib.Path(index_dir) / (path + ".json")
+
+
+def make_references(path, fs, inline_threshold=300):
+    """Make reference index for a NetCDF file.
+
+    Reads the HDF5 metadata with ``kerchunk``.  The references point to
+    ``path`` without protocol, such that they can be resolved on any
+    filesystem that has the file at that path, such as a caching
+    filesystem wrapping S3.
+
+    Args:
+        path (str): Path of the file on the filesystem.
+        fs (fsspec.AbstractFileSystem): Filesystem to read the file from.
+        inline_threshold (int): Chunks smaller than this many bytes are
+            copied into the index.
+
+    Returns:
+        Dictionary with references.
+    """
+    with log.Span("refs.make", items=1), fs.open(path, "rb") as f:
+        return kerchunk.hdf.SingleHdf5ToZarr(
+                f, path, inline_threshold=inline_threshold).translate()
+
+
+def get_references(path, fs=None, index_dir=None):
+    """Get reference index for a file, building it if needed.
+
+    If the index exists, read it.  Otherwise, make it with
+    :func:`make_references` and store it.
+
+    Args:
+        path (str): Path of the file on the filesystem.
+        fs (fsspec.AbstractFileSystem): Filesystem to read the file from
+            if the index needs to be built.  Defaults to the shared S3
+            filesystem, see :mod:`sattools.s3`.
+        index_dir (str or pathlib.Path): Root of the reference indexes, see
+            :func:`get_reference_path`.
+
+    Returns:
+        Dictionary with references.
+    """
+    ref_path = get_reference_path(path, index_dir)
+    try:
+        with ref_path.open("r") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        pass
+    refs = make_references(path, fs or s3.get_filesystem())
+    ref_path.parent.mkdir(parents=True, exist_ok=True)
+    with io.atomic_write(ref_path, encoding="utf-8") as fp:
+        json.dump(refs, fp)
+    return refs
+
+
+def build_references(paths, fs=None, index_dir=None, max_workers=8):
+    """Build reference indexes for many files.
+
+    Files that already have an index are skipped.
+
+    Args:
+        paths (Iterable[str]): Paths of files on the filesystem.
+        fs (fsspec.AbstractFileSystem): Filesystem to read the files from.
+            Defaults to the shared S3 filesystem.
+        index_dir (str or pathlib.Path): Root of the reference indexes, see
+            :func:`get_reference_path`.
+        max_workers (int): Maximum number of files to index at the same
+            time.
+
+    Returns:
+        List of paths to the reference indexes.
+    """
+    paths = list(paths)
+    fs = fs or s3.get_filesystem()
+    with log.Span("refs.build", items=len(paths)), \
+            concurrent.futures.ThreadPoolExecutor(max_workers) as ex:
+        for _ in ex.map(lambda p: get_references(p, fs, index_dir), paths):
+            pass
+    return [get_reference_path(p, index_dir) for p in paths]
+
+
+def open_dataset(path, fs=None, index_dir=None, **kwargs):
+    """Open a NetCDF file as Zarr through its reference index.
+
+    The index is built if it does not exist yet, see
+    :func:`get_references`.  Data are read lazily from the original file,
+    only the chunks needed.
+
+    Args:
+        path (str): Path of the file on the filesystem.
+        fs (fsspec.AbstractFileSystem): Filesystem to read the data from,
+            such as a caching filesystem from
+            :func:`sattools.s3.get_caching_filesystem`.  Defaults to the
+            shared S3 filesystem.
+        index_dir (str or pathlib.Path): Root of the reference indexes, see
+            :func:`get_reference_path`.
+        **kwargs: Passed on to ``xarray.open_dataset``.
+
+    Returns:
+        xarray.Dataset
+    """
+    fs = fs or s3.get_filesystem()
+    refs = get_references(path, fs, index_dir)
+    rfs = fsspec.implementations.reference.ReferenceFileSystem(refs, fs=fs)
+    if int(zarr.__version__.split(".")[0]) >= 3:
+        # references describe a version 2 store, zarr 3 would look for
+        # version 3 metadata first; older versions do not know the option
+        kwargs.setdefault("zarr_format", 2)
+    return xarray.open_dataset(
+            rfs.get_mapper(""), engine="zarr", consolidated=False, **kwargs)
@@ -0,0 +1,127 @@
+"""Shared S3 filesystems.
+
+Reading ABI and GLM from NOAA's S3 bucket goes through ``s3fs``, wrapped
+in a caching filesystem from ``fsspec``.  Constructing these for every
+call means new connections for every call.  This module keeps one S3
+filesystem per process, with a connection pool that can be reused by
+all threads, and one caching filesystem per cache directory.
+
+Settings such as the endpoint URL, pool size, and timeouts are set
+centrally with :func:`configure`, before the first filesystem is made or
+followed by :func:`clear`.
+
+Example::
+
+    s3.configure(endpoint_url="http://localhost:5000", anon=False)
+    fs = s3.get_caching_filesystem("/tmp/cache")
+"""
+
+import threading
+
+from .lazy import lazy_import
+
+s3fs = lazy_import("s3fs")
+fsspec = lazy_import("fsspec.implementations.cached")
+
+#: Settings for the S3 filesystem, see :func:`configure`
+config = {
+        "anon": True,
+        "endpoint_url": None,
+        "max_pool_connections": 32,
+        "connect_timeout": 10,
+        "read_timeout": 60,
+        "max_attempts": 5}
+
+_lock = threading.Lock()
+_filesystem = None
+_caching = {}
+
+
+def configure(**kwargs):
+    """Change settings for the shared S3 filesystem.
+
+    Filesystems already made are dropped, such that the next call to
+    :func:`get_filesystem` uses the new settings.
+
+    Args:
+        anon (bool): Access S3 anonymously.
+        endpoint_url (str): S3 endpoint, such as of a local server.  If
+            None, use AWS.
+        max_pool_connections (int): Size of the connection pool.  Should be
+            at least the number of threads reading at the same time.
+        connect_timeout (float): Timeout for connecting in seconds.
+        read_timeout (float): Timeout for reading in seconds.
+        max_attempts (int): Maximum number of attempts per request.
+
+    Raises:
+        KeyError: for unknown settings.
+    """
+    for k in kwargs:
+        if k not in config:
+            raise KeyError(f"Unknown S3 setting: {k!s}")
+    config.update(kwargs)
+    clear()
+
+
+def clear():
+    """Drop the shared filesystems.
+
+    The next call to :func:`get_filesystem` or
+    :func:`get_caching_filesystem` makes new ones.  Tests that patch
+    ``s3fs.S3FileSystem`` need this.
+    """
+    global _filesystem
+    with _lock:
+        _filesystem = None
+        _caching.clear()
+
+
+def _make_filesystem():
+    return s3fs.S3FileSystem(
+            anon=config["anon"],
+            client_kwargs={"endpoint_url": config["endpoint_url"]},
+            config_kwargs={
+                "max_pool_connections": config["max_pool_connections"],
+                "connect_timeout": config["connect_timeout"],
+                "read_timeout": config["read_timeout"],
+                "retries": {"max_attempts": config["max_attempts"]}})
+
+
+def get_filesystem():
+    """Get the shared S3 filesystem.
+
+    Made on the first call, using the settings in :data:`config`.
+    """
+    global _filesystem
+    with _lock:
+        if _filesystem is None:
+            _filesystem = _make_filesystem()
+        return _filesystem
+
+
+def get_caching_filesystem(cache_dir, whole_file=False, **kwargs):
+    """Get the caching filesystem for a cache directory.
+
+    There is one caching filesystem per cache directory, wrapping the
+    shared S3 filesystem.  The first call for a directory makes it.
+
+    Args:
+        cache_dir (str or pathlib.Path): Where to cache.
+        whole_file (bool): If true, cache whole files with
+            ``fsspec.implementations.cached.WholeFileCacheFileSystem``.
+            Otherwise, cache blocks with ``CachingFileSystem``.
+        **kwargs: Passed on to the caching filesystem when it is made.
+
+    Returns:
+        The caching filesystem.
+    """
+    fs = get_filesystem()
+    key = (str(cache_dir), whole_file)
+    with _lock:
+        if key not in _caching:
+            cls = (fsspec.implementations.cached.WholeFileCacheFileSystem
+                   if whole_file
+                   else fsspec.implementations.cached.CachingFileSystem)
+            _caching[key] = cls(fs=fs, cache_storage=str(cache_dir),
+                                **kwargs)
+        return _caching[key]
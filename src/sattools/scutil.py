@@ -3,21 +3,24 @@
 import os
 import logging
 import numbers
-
-import satpy
-import fsspec
-import xarray
+import threading
+import collections
 
 from . import area
 from . import glm
 from . import abi
 from . import log
+from .lazy import lazy_import
+
+satpy = lazy_import("satpy.readers")
+fsspec = lazy_import("fsspec.implementations.local")
+xarray = lazy_import("xarray")
 
 logger = logging.getLogger(__name__)
 
 
 def get_resampled_multiscene(files, reader, load_first, load_next,
-                             scene_kwargs={}):
+                             scene_kwargs={}, quicklook=None):
     """Get a multiscene resampled to the area covering all scenes in it.
 
     Given a list of files where area may vary between files, get a multiscene
@@ -37,6 +40,8 @@ def get_resampled_multiscene(files, reader, load_first, load_next,
             wavelengths, what datasets are loaded subsequently.
         scene_kwargs (Mapping): keyword arguments to pass to reader.  Passed to
             ``satpy.MultiScene.from_files``.
+        quicklook (int or None): If given, reduce the resolution by this
+            factor before resampling, see :func:`get_quicklook_scene`.
 
     Returns:
         (multiscene, resampled multiscene)
@@ -49,12 +54,14 @@ def get_resampled_multiscene(files, reader, load_first, load_next,
             scene_kwargs=scene_kwargs,
             group_keys=["start_time"],
             time_threshold=35)  # every 10 minutes M1 starts 3 seconds late
-    with log.RaiseOnWarnContext(logging.getLogger("satpy")):
+    with log.Span("scutil.load"), \
+            log.RaiseOnWarnContext(logging.getLogger("satpy")):
         ms.load([load_first])
     logger.info("Calculating joint area")
     # turn warning message into error awaiting fix for
     # https://github.com/pytroll/satpy/issues/727
-    with log.RaiseOnWarnContext(logging.getLogger("satpy")):
+    with log.Span("scutil.load"), \
+            log.RaiseOnWarnContext(logging.getLogger("satpy")):
         # even though for the sake of area calculations it would be acceptable
         # to miss a scene here and there, I will want to load it for the
         # remaining scenes anyway for the safe of NUS calculation.  Even there
@@ -62,16 +69,63 @@ def get_resampled_multiscene(files, reader, load_first, load_next,
         # need if for calculation of NUS-1, NUS-2, NUS-5, NUS-15, etc., but
         # that is becoming too complicated to bookkeep, so just ensure I have
         # them always.
-        areas = set(area.flatten_areas(
-            _get_all_areas_from_multiscene(ms, load_first)))
-        joint = area.join_areadefs(*areas)
         ms.load(load_next, unload=False)
         # access to avoid https://github.com/pytroll/satpy/issues/1273
         # only here the warning message is actually logged
         # https://github.com/pytroll/satpy/issues/1444
         ms.scenes
+    if quicklook:
+        ms = get_quicklook_multiscene(ms, quicklook)
+    areas = set(area.flatten_areas(
+        _get_all_areas_from_multiscene(ms, load_first)))
+    joint = area.join_areadefs(*areas)
     logger.info("Resampling")
-    return (ms, ms.resample(joint, unload=False))
+    with log.Span("scutil.resample"):
+        mr = ms.resample(joint, unload=False)
+    return (ms, mr)
+
+
+def _stride(arr, axis, **kwargs):
+    """Take the first element of each aggregation window."""
+    idx = tuple(0 if i in axis else slice(None) for i in range(arr.ndim))
+    return arr[idx]
+
+
+def get_quicklook_scene(sc, factor, method="mean", generate=True):
+    """Get a reduced-resolution scene for quick-look purposes.
+
+    Reduce the resolution of all datasets in the scene by an integer factor,
+    either by averaging blocks of factor × factor pixels (``method="mean"``,
+    or any other function accepted by ``satpy.Scene.aggregate``) or by taking
+    every factor-th pixel (``method="stride"``).  This is lazy, so when
+    applied directly after loading, all subsequent compositing and resampling
+    happens at the reduced resolution.  Composites that could not yet be
+    generated, such as when loaded with ``generate=False``, are generated on
+    the reduced scene, unless ``generate`` is False.
+
+    Args:
+        sc (satpy.Scene): Scene to reduce.
+        factor (int): Reduction factor in both dimensions.
+        method (str or callable): How to aggregate.
+        generate (bool): Whether to generate pending composites.
+
+    Returns:
+        satpy.Scene
+    """
+    func = _stride if method == "stride" else method
+    new = sc.aggregate(func=func, x=factor, y=factor)
+    if generate:
+        new.generate_possible_composites(unload=True)
+    return new
+
+
+def get_quicklook_multiscene(ms, factor, method="mean"):
+    """Get a reduced-resolution multiscene.
+
+    Apply :func:`get_quicklook_scene` to each scene in the multiscene.
+    """
+    return satpy.MultiScene(
+            [get_quicklook_scene(sc, factor, method) for sc in ms.scenes])
 
 
 def _get_all_areas_from_multiscene(ms, datasets=None):
@@ -109,7 +163,7 @@ def prepare_abi_glm_ms_args(start_date, end_date, chans, sector="C"):
 
 def get_abi_glm_multiscenes(start_date, end_date, chans, sector,
                             from_glm=["flash_extent_density"],
-                            limit=None):
+                            limit=None, quicklook=None):
     """Get one or more multiscenes for period.
 
     Get multiscenes containing ABI and GLM in period.  If sector is M1 or M2,
@@ -119,16 +173,23 @@ def get_abi_glm_multiscenes(start_date, end_date, chans, sector,
     Note that the area for the GLM-based flash_extent_density could differ
     slightly from the one for the ABI channels, so you may have to resample the
     result.
+
+    If ``quicklook`` is given, the resolution of each multiscene is reduced by
+    this factor directly after loading, see :func:`get_quicklook_scene`.
     """
     if sector not in {"M1", "M2", "C", "F"}:
         raise ValueError(
                 f"Invalid sector.  Expected M1, M2, C, or F.  Got {sector:s}")
     if sector.startswith("M"):
-        yield from _get_abi_glm_meso_multiscenes(
+        mss = _get_abi_glm_meso_multiscenes(
                 start_date, end_date, chans, sector, from_glm, limit)
     else:
-        yield _get_abi_glm_nonmeso_multiscene(
-                start_date, end_date, chans, sector, from_glm)
+        mss = [_get_abi_glm_nonmeso_multiscene(
+                start_date, end_date, chans, sector, from_glm)]
+    for ms in mss:
+        if quicklook:
+            ms = get_quicklook_multiscene(ms, quicklook)
+        yield ms
 
 
 def _get_abi_glm_meso_multiscenes(start_date, end_date, chans, sector,
@@ -149,7 +210,8 @@ def _get_abi_glm_meso_multiscenes(start_date, end_date, chans, sector,
             reader=["abi_l1b"],
             group_keys=["start_time"],
             time_threshold=30)
-    with log.RaiseOnWarnContext(logging.getLogger("satpy")):
+    with log.Span("scutil.load"), \
+            log.RaiseOnWarnContext(logging.getLogger("satpy")):
         ms.load([f"C{chans[0]:>02d}"])
         ms.scenes
     for (cnt, split) in enumerate(abi.split_meso(ms)):
@@ -175,12 +237,24 @@ def _get_abi_glm_meso_multiscenes(start_date, end_date, chans, sector,
                 reader=["abi_l1b", "glm_l2"],
                 group_keys=["start_time"],
                 time_threshold=35)
-        with log.RaiseOnWarnContext(logging.getLogger("satpy")):
+        with log.Span("scutil.load"), \
+                log.RaiseOnWarnContext(logging.getLogger("satpy")):
             here_ms.load([f"C{c:>02d}" for c in chans] + from_glm)
             here_ms.scenes
+        for sc in here_ms.scenes:
+            # used to identify cached frames, see framecache.get_frame_key
+            sc.attrs["filenames"] = _get_scene_filenames(sc)
         yield here_ms
 
 
+def _get_scene_filenames(sc):
+    """Get the files that the readers of a scene read from."""
+    return [fh.filename
+            for rdr in sc._readers.values()
+            for fhs in rdr.file_handlers.values()
+            for fh in fhs]
+
+
 time_thresholds = {"C": 290, "F": 590}
 
 
@@ -204,7 +278,8 @@ def _get_abi_glm_nonmeso_multiscene(
     ms = get_collapsed_multiscene_from_groups(
             groups,
             [f"C{c:>02d}" for c in chans] + from_glm)
-    with log.RaiseOnWarnContext(logging.getLogger("satpy")):
+    with log.Span("scutil.load"), \
+            log.RaiseOnWarnContext(logging.getLogger("satpy")):
         ms.load([f"C{c:>02d}" for c in chans] + from_glm)
         ms.scenes
     return ms
@@ -220,6 +295,9 @@ def collapse_abi_glm_multiscene(ms):
     exactly one ABI and one GLM, by averaging GLM flash extent densities up to
     the next available ABI.
 
+    To process a long period without keeping all scenes in memory, use
+    :func:`collapse_abi_glm_scenes` instead.
+
     Args:
         ms (satpy.MultiScene)
             Multiscene for which averaging will be applied, where all scenes
@@ -229,16 +307,41 @@ def collapse_abi_glm_multiscene(ms):
         satpy.MultiScene
             New (shorter) MultiScene where each scene has both GLM and ABI.
     """
-    scenes = []
-    glm = {}
+    with log.Span("scutil.collapse") as sp:
+        scenes = list(collapse_abi_glm_scenes(ms.scenes))
+        sp.add(items=len(scenes))
+    return satpy.MultiScene(scenes)
+
+
+def collapse_abi_glm_scenes(old_scenes):
+    """Collapse scenes from an inhomogeneous ABI-GLM sequence.
+
+    Like :func:`collapse_abi_glm_multiscene`, but takes any iterable of
+    scenes and yields each collapsed scene as soon as its ABI is reached.
+    GLM flash extent densities are averaged with a running sum and a
+    running count of valid values per pixel, such that memory use does not
+    depend on how many scenes are collapsed or how many GLM scenes there
+    are per ABI scene, as long as the input scenes are generated one by one
+    and the output scenes are not kept.  As with ``mean(skipna=True)``,
+    missing values are skipped, and pixels missing everywhere are NaN.
+
+    Args:
+        old_scenes (Iterable[satpy.Scene])
+            Scenes that all have GLM but not all have ABI.
+
+    Yields:
+        satpy.Scene, each with both GLM and ABI.
+    """
+    glm_sum = {}
+    glm_n = {}
     abi_cont = {}
-    for old in ms.scenes:
+    files = []
+    for old in old_scenes:
+        files.extend(old.attrs.get("filenames", []))
         for did in sorted(old.keys()):
             if (sens := old[did].attrs["sensor"]) == "glm":
                 if did["name"] == "flash_extent_density":
-                    if did not in glm:
-                        glm[did] = []
-                    glm[did].append(old[did])
+                    _accumulate_glm(glm_sum, glm_n, did, old[did])
                 else:
                     raise ValueError("For GLM I can only handle "
                                      f"flash_extent_density, not {did!s}")
@@ -251,14 +354,39 @@ def collapse_abi_glm_multiscene(ms):
         # if I had new ABI, then make new scene collecting GLM...
         if abi_cont:
             sc = satpy.Scene()
+            if files:
+                sc.attrs["filenames"] = files
+                files = []
             for (did, val) in abi_cont.items():
                 sc[did] = val
-            for (did, vals) in glm.items():
-                sc[did] = xarray.concat(vals, "dummy").mean("dummy")
-            scenes.append(sc)
-            glm.clear()
+            with xarray.set_options(keep_attrs=True):
+                for (did, val) in glm_sum.items():
+                    sc[did] = val / glm_n[did].where(glm_n[did] > 0)
+            glm_sum.clear()
+            glm_n.clear()
             abi_cont.clear()
-    return satpy.MultiScene(scenes)
+            yield sc
+
+
+def _accumulate_glm(glm_sum, glm_n, did, val):
+    """Add GLM values to running sum and count of valid values.
+
+    Missing values count as zero in the sum and are not counted.  Arrays
+    are aligned with an outer join, such that no pixels are lost if
+    coordinates differ between scenes.
+    """
+    with xarray.set_options(keep_attrs=True):
+        new_sum = val.fillna(0)
+        new_n = val.notnull().astype("i4")
+        if did in glm_sum:
+            (old_sum, new_sum) = xarray.align(
+                    glm_sum[did], new_sum, join="outer", fill_value=0)
+            (old_n, new_n) = xarray.align(
+                    glm_n[did], new_n, join="outer", fill_value=0)
+            new_sum = old_sum + new_sum
+            new_n = old_n + new_n
+    glm_sum[did] = new_sum
+    glm_n[did] = new_n
 
 
 def get_collapsed_multiscene_from_groups(groups, to_load):
@@ -278,4 +406,56 @@ def _generate_scenes_for_collapsed_multiscene(
         sc = satpy.Scene(filenames=g)
         sc = glm.get_integrated_scene(g["glm_l2"], sc)
         sc.load(to_load)
+        # used to identify cached frames, see framecache.get_frame_key
+        sc.attrs["filenames"] = [f for fs in g.values() for f in fs]
         yield sc
+
+
+class SceneCache:
+    """Cache of the readers of recently created scenes.
+
+    Creating a scene means finding and opening the files with the reader,
+    which takes time.  A process running many jobs on the same files, such
+    as a long-lived job server, can keep the readers of the most recently
+    created scenes.  Each call returns a new scene using the cached readers,
+    such that loading datasets into it does not affect other users of the
+    same files.
+
+    The cache itself is thread-safe, but the readers are not: scenes for
+    the same files share their readers and must not load at the same time.
+    """
+
+    def __init__(self, max_size=8):
+        """Initiate a cache with room for max_size scenes."""
+        self.max_size = max_size
+        self._readers = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of scenes in cache."""
+        return len(self._readers)
+
+    def get_scene(self, filenames, reader=None):
+        """Get a new scene for filenames and reader.
+
+        The readers are created if they are not in the cache, and the least
+        recently used readers are dropped if the cache is full.
+        """
+        filenames = [str(f) for f in filenames]
+        key = (tuple(sorted(filenames)), reader)
+        with self._lock:
+            readers = self._readers.get(key)
+            if readers is not None:
+                self._readers.move_to_end(key)
+        if readers is None:
+            readers = satpy.Scene(
+                    filenames=filenames, reader=reader)._readers
+            with self._lock:
+                self._readers[key] = readers
+                while len(self._readers) > self.max_size:
+                    self._readers.popitem(last=False)
+        # Scene.copy would drop the readers, so that nothing can be loaded
+        sc = satpy.Scene()
+        sc._readers = readers
+        sc._dependency_tree = satpy.dependency_tree.DependencyTree(readers)
+        return sc
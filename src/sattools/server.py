@@ -0,0 +1,263 @@
+"""Long-lived job server keeping warm caches.
+
+Each new process pays for importing satpy, indexing the area definitions,
+loading the glmtools script, setting up S3 filesystems, calculating
+resampling lookup tables, and opening the input files.  For
+high-frequency imagery, that can take longer than the job itself.  The
+job server is a process that keeps all of this warm between jobs and
+accepts jobs on a local Unix socket.
+
+The protocol is JSON Lines: the client sends one line per job, with the
+job ``type`` and its ``args``, and for each job the server replies one
+line with the ``status`` ("ok" or "failed") and the ``result`` or
+``error``.  Job types are:
+
+``show``
+    Visualise files, with ``args`` as a job for :mod:`sattools.batch`.
+``video``
+    Video for a period, with ``args`` passed to
+    :func:`sattools.vis.show_video_abi_glm_times`.
+``video_files``
+    Video from a multiscene of files, with ``args`` passed to
+    :func:`sattools.vis.show_video_abi_glm`.
+``ping``
+    Check that the server is alive and get some statistics.
+``shutdown``
+    Stop the server.
+
+Example::
+
+    # in one process
+    server.serve()
+
+    # in another
+    server.submit("show", files=["a.nc"], composites=["overview"],
+                  areas=["germ"], outdir="/tmp")
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import pathlib
+import tempfile
+import threading
+import socketserver
+
+from . import ptc
+from . import glm
+from . import vis
+from . import batch
+from . import scutil
+from .lazy import lazy_import
+
+satpy = lazy_import("satpy")
+pandas = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+
+def get_socket_path():
+    """Get default path of the server socket.
+
+    Uses ``$XDG_RUNTIME_DIR`` if set, otherwise the temporary directory.
+    """
+    return pathlib.Path(
+            os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+            ) / f"sattools-{os.getuid():d}.sock"
+
+
+class WarmState:
+    """State kept warm between jobs.
+
+    Holds the area catalogue, the directory with the resampling and overlay
+    caches, and a cache of the readers of recently created scenes.  The
+    glmtools module is cached by :func:`sattools.glm.get_glmtool` and the S3
+    and caching filesystems are shared through :mod:`sattools.s3`, so that
+    those stay warm as long as the process lives.
+    """
+
+    def __init__(self, cache_dir=None, max_scenes=8):
+        """Initiate the warm state.
+
+        Args:
+            cache_dir (str or pathlib.Path): Directory for the resampling
+                and overlay caches, see
+                :func:`sattools.batch.prepare_cache_dir`.
+            max_scenes (int): How many recently created scenes to keep.
+        """
+        self.areas = ptc.get_all_areas()
+        self.cache_dir = batch.prepare_cache_dir(cache_dir)
+        self.scene_cache = scutil.SceneCache(max_scenes)
+        self.n_jobs = 0
+        self.started = time.time()
+
+    def warm_up(self):
+        """Do the expensive initialisation before the first job comes."""
+        satpy.Scene  # triggers the actual import
+        len(self.areas)  # builds the area index
+        try:
+            glm.get_glmtool()
+        except OSError as e:
+            logger.warning(f"Could not load glmtools: {e!s}")
+
+    def _convert_video_args(self, args):
+        """Convert arguments of video jobs from their JSON types."""
+        args = {**args, "out_dir": pathlib.Path(args["out_dir"])}
+        if args.get("area") in self.areas:
+            args["area"] = self.areas[args["area"]]
+        return args
+
+    def run(self, job_type, args):
+        """Run a job and get its result.
+
+        Raises an exception if the job fails.
+        """
+        self.n_jobs += 1
+        if job_type == "ping":
+            return {"pid": os.getpid(), "jobs": self.n_jobs,
+                    "uptime": time.time() - self.started,
+                    "scenes": len(self.scene_cache)}
+        if job_type == "show":
+            res = batch.run_job(args, self.areas, self.cache_dir,
+                                scene_cache=self.scene_cache)
+            if res["status"] != "ok":
+                raise RuntimeError(res["error"])
+            return res["files"]
+        if job_type == "video":
+            args = {**self._convert_video_args(args),
+                    "start_date": pandas.Timestamp(args["start_date"]),
+                    "end_date": pandas.Timestamp(args["end_date"])}
+            return vis.show_video_abi_glm_times(**args)
+        if job_type == "video_files":
+            return vis.show_video_abi_glm(**self._convert_video_args(args))
+        raise ValueError(f"Unknown job type: {job_type!s}")
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """Handle jobs sent over one connection."""
+
+    def handle(self):
+        """Read jobs line by line and reply to each."""
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            reply = self.server.handle_job(line)
+            self.wfile.write(
+                    json.dumps(reply, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if reply.get("result") == "shutting down":
+                break
+
+
+class JobServer(socketserver.ThreadingUnixStreamServer):
+    """Server accepting jobs on a Unix socket.
+
+    Each connection is handled in its own thread, but at most
+    ``max_workers`` jobs run at the same time.  Jobs on the same files
+    share the cached readers, see :class:`sattools.scutil.SceneCache`,
+    which are not thread-safe, and all jobs share the resampling and
+    overlay caches, which are not written atomically.  Therefore, use more
+    than one worker only if concurrent jobs are for different files and
+    areas.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, state, max_workers=1):
+        """Initiate the job server.
+
+        Args:
+            socket_path (str or pathlib.Path): Where to create the socket.
+            state (WarmState): State shared between jobs.
+            max_workers (int): Maximum number of jobs to run at the same
+                time.
+        """
+        self.socket_path = pathlib.Path(socket_path)
+        self.state = state
+        self._slots = threading.BoundedSemaphore(max_workers)
+        super().__init__(str(self.socket_path), JobHandler)
+
+    def handle_job(self, line):
+        """Run job from a line of JSON and get the reply."""
+        t0 = time.perf_counter()
+        try:
+            job = json.loads(line)
+            job_type = job["type"]
+            if job_type == "shutdown":
+                threading.Thread(target=self.shutdown).start()
+                result = "shutting down"
+            else:
+                with self._slots:
+                    result = self.state.run(job_type, job.get("args", {}))
+        except Exception as e:
+            logger.exception("Job failed")
+            return {"status": "failed",
+                    "error": f"{type(e).__name__:s}: {e!s}",
+                    "duration": time.perf_counter() - t0}
+        return {"status": "ok", "result": result,
+                "duration": time.perf_counter() - t0}
+
+    def server_close(self):
+        """Close the server and remove the socket."""
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def serve(socket_path=None, max_workers=1, cache_dir=None, max_scenes=8):
+    """Run job server until it is shut down.
+
+    Args:
+        socket_path (str or pathlib.Path): Where to create the socket.  If
+            not given, use :func:`get_socket_path`.
+        max_workers (int): Maximum number of jobs to run at the same time,
+            see :class:`JobServer`.
+        cache_dir (str or pathlib.Path): Directory for the resampling and
+            overlay caches.
+        max_scenes (int): How many recently created scenes to keep.
+    """
+    socket_path = pathlib.Path(socket_path or get_socket_path())
+    if socket_path.exists():
+        try:
+            submit("ping", socket_path=socket_path)
+        except OSError:
+            logger.info(f"Removing stale socket {socket_path!s}")
+            socket_path.unlink()
+        else:
+            raise FileExistsError(
+                    f"Server already running at {socket_path!s}")
+    state = WarmState(cache_dir=cache_dir, max_scenes=max_scenes)
+    state.warm_up()
+    with JobServer(socket_path, state, max_workers=max_workers) as server:
+        logger.info(f"Listening on {socket_path!s}")
+        server.serve_forever()
+    logger.info("Job server stopped")
+
+
+def submit(job_type, socket_path=None, timeout=None, **args):
+    """Submit a job to the job server and wait for the reply.
+
+    Args:
+        job_type (str): Type of job, see :mod:`sattools.server`.
+        socket_path (str or pathlib.Path): Socket of the server.  If not
+            given, use :func:`get_socket_path`.
+        timeout (float): Seconds to wait for the reply, or None to wait
+            forever.
+        **args: Arguments for the job.
+
+    Returns:
+        Dictionary with the reply from the server.
+    """
+    socket_path = socket_path or get_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        with sock.makefile("rwb") as fp:
+            fp.write(json.dumps({"type": job_type, "args": args},
+                                default=str).encode("utf-8") + b"\n")
+            fp.flush()
+            line = fp.readline()
+    if not line:
+        raise ConnectionError("Server closed connection without reply")
+    return json.loads(line)
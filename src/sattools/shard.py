@@ -0,0 +1,288 @@
+"""Split long periods into shards that can run on different nodes.
+
+A month of ABI/GLM video takes too long for a single machine.  This module
+splits the period into time shards, writes a job specification per shard,
+runs shards independently (on any node that sees the same NAS paths), and
+finally merges the outputs of all shards.
+
+The steps are:
+
+1. :func:`plan_shards` splits the period into fixed windows.  For MESO
+   sectors, it first splits where the MESO sector moves, such that no
+   shard straddles a move.
+2. :func:`write_specs` writes one JSON specification per shard.
+3. :func:`run_shard` runs one specification.  It records its outcome next
+   to the specification, such that a shard that is done is not run again.
+4. :func:`merge_shards` concatenates the video segments of all shards into
+   one video and playlist per dataset.
+
+A specification names the function to run by its dotted path, which is
+called with the shard ``start_date`` and ``end_date`` and the ``kwargs``
+from the specification.  By default this is
+:func:`sattools.vis.show_video_abi_glm_times`.  The ``kwargs`` always
+include an ``out_dir`` per shard, a ``segment_duration``, and a
+``checkpoint`` file, in which the function must record the video segments
+it wrote, see :func:`sattools.vis.show_video_abi_glm_times`.
+"""
+
+import os
+import json
+import logging
+import pathlib
+import importlib
+
+from . import io
+from . import abi
+from . import ptc
+from . import vis
+from .lazy import lazy_import
+
+pandas = lazy_import("pandas")
+satpy = lazy_import("satpy")
+
+logger = logging.getLogger(__name__)
+
+default_func = "sattools.vis.show_video_abi_glm_times"
+
+
+def find_meso_moves(start_date, end_date, sector, chan=14):
+    """Find periods during which the MESO sector does not move.
+
+    Reads the ABI data for one channel to find the area of each time slot,
+    see :func:`sattools.abi.split_meso`.
+
+    Returns:
+        List of (start, end) tuples of ``pandas.Timestamp``.
+    """
+    fsfiles = abi.get_fsfiles(start_date, end_date, sector=sector,
+                              chans=chan)
+    ms = satpy.MultiScene.from_files(
+            [str(x) for x in fsfiles],
+            reader=["abi_l1b"],
+            group_keys=["start_time"],
+            time_threshold=30)
+    ms.load([f"C{chan:>02d}"])
+    periods = []
+    for split in abi.split_meso(ms):
+        periods.append(
+                (pandas.Timestamp(split.scenes[0][f"C{chan:>02d}"].attrs[
+                    "start_time"]),
+                 pandas.Timestamp(split.scenes[-1][f"C{chan:>02d}"].attrs[
+                     "end_time"])))
+    # the periods should cover the full period, without gaps between them
+    if periods:
+        periods[0] = (pandas.Timestamp(start_date), periods[0][1])
+        periods[-1] = (periods[-1][0], pandas.Timestamp(end_date))
+        periods = [(periods[i][0], periods[i+1][0])
+                   for i in range(len(periods)-1)] + [periods[-1]]
+    return periods
+
+
+def plan_shards(start_date, end_date, window, sector="F", out_dir=".",
+                func=default_func, align_meso=None, **kwargs):
+    """Plan shards for a period.
+
+    Args:
+        start_date (datetime-like): Start of period.
+        end_date (datetime-like): End of period.
+        window (str or timedelta): Maximum duration of a shard.
+        sector (str): ABI sector, passed on to the shard function.
+        out_dir (str or pathlib.Path): Base output directory, which should
+            be on storage shared by all nodes.  Each shard gets its own
+            subdirectory.
+        func (str): Dotted path of the function to run for each shard.
+        align_meso (bool): Whether to split where the MESO sector moves.
+            Defaults to true for MESO sectors.
+        **kwargs: Further keyword arguments for the shard function.  For
+            MESO sectors, these must include the ``area`` to resample to,
+            because the native grid differs between shards.
+
+    Returns:
+        List of shard specifications (dictionaries).
+
+    Raises:
+        ValueError: for MESO sectors without ``area``.
+    """
+    if sector.startswith("M") and not kwargs.get("area"):
+        raise ValueError(
+                "Sharding a MESO sector needs an area, otherwise shards "
+                "where the sector moved have different frame sizes and "
+                "cannot be merged")
+    if align_meso is None:
+        align_meso = sector.startswith("M")
+    if align_meso:
+        periods = find_meso_moves(start_date, end_date, sector)
+    else:
+        periods = [(pandas.Timestamp(start_date), pandas.Timestamp(end_date))]
+    specs = []
+    for (p_start, p_end) in periods:
+        for (s_start, s_end) in vis.split_period(p_start, p_end, window):
+            shard = f"shard-{len(specs):05d}"
+            shard_dir = pathlib.Path(out_dir) / shard
+            sk = {"out_dir": str(shard_dir),
+                  "segment_duration": str(s_end - s_start),
+                  "checkpoint": str(shard_dir / "checkpoint.json"),
+                  "sector": sector,
+                  **kwargs}
+            specs.append({"shard": shard,
+                          "func": func,
+                          "start_date": s_start.isoformat(),
+                          "end_date": s_end.isoformat(),
+                          "out_dir": str(shard_dir),
+                          "kwargs": sk})
+    logger.info(f"Planned {len(specs):d} shards")
+    return specs
+
+
+def write_specs(specs, spec_dir):
+    """Write shard specifications as JSON files.
+
+    Returns the list of paths written.
+    """
+    spec_dir = pathlib.Path(spec_dir)
+    spec_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for spec in specs:
+        p = spec_dir / f"{spec['shard']:s}.json"
+        with p.open("w", encoding="utf-8") as fp:
+            json.dump(spec, fp, indent=1)
+        paths.append(p)
+    return paths
+
+
+def _get_func(path):
+    """Get function from dotted path."""
+    (mod, _, name) = path.rpartition(".")
+    return getattr(importlib.import_module(mod), name)
+
+
+def _status_path(spec_path, status):
+    spec_path = pathlib.Path(spec_path)
+    return spec_path.with_name(f"{spec_path.stem:s}.{status:s}.json")
+
+
+def run_shard(spec_path):
+    """Run a shard from its specification.
+
+    If the shard is already done, do nothing.  On success, write
+    ``<shard>.done.json`` next to the specification, with the result.  On
+    failure, write ``<shard>.failed.json`` with the error, and raise.
+
+    Args:
+        spec_path (str or pathlib.Path): Path to specification.
+
+    Returns:
+        The result of the shard function, or of the earlier run if the
+        shard was already done.
+    """
+    done = _status_path(spec_path, "done")
+    failed = _status_path(spec_path, "failed")
+    if done.exists():
+        logger.info(f"Shard {spec_path!s} already done")
+        with done.open("r", encoding="utf-8") as fp:
+            return json.load(fp)["result"]
+    with open(spec_path, "r", encoding="utf-8") as fp:
+        spec = json.load(fp)
+    pathlib.Path(spec["out_dir"]).mkdir(parents=True, exist_ok=True)
+    logger.info(f"Running shard {spec['shard']:s} for "
+                f"{spec['start_date']:s}--{spec['end_date']:s}")
+    kwargs = dict(spec["kwargs"])
+    if "out_dir" in kwargs:
+        kwargs["out_dir"] = pathlib.Path(kwargs["out_dir"])
+    if kwargs.get("segment_duration"):
+        kwargs["segment_duration"] = pandas.Timedelta(
+                kwargs["segment_duration"])
+    if isinstance(kwargs.get("area"), str):
+        areas = ptc.get_all_areas()
+        if kwargs["area"] in areas:
+            kwargs["area"] = areas[kwargs["area"]]
+    try:
+        result = _get_func(spec["func"])(
+                pandas.Timestamp(spec["start_date"]),
+                pandas.Timestamp(spec["end_date"]),
+                **kwargs)
+    except Exception as e:
+        _write_status(failed, {"shard": spec["shard"], "host": os.uname()[1],
+                               "error": f"{type(e).__name__:s}: {e!s}"})
+        raise
+    failed.unlink(missing_ok=True)
+    _write_status(done, {"shard": spec["shard"], "host": os.uname()[1],
+                         "result": result})
+    return result
+
+
+def _write_status(p, content):
+    """Write status file atomically."""
+    with io.atomic_write(p, encoding="utf-8") as fp:
+        json.dump(content, fp, default=str)
+
+
+def _get_frame_size(fn):
+    """Get the frame size of a video, reading only its header."""
+    import imageio_ffmpeg
+    gen = imageio_ffmpeg.read_frames(str(fn))
+    try:
+        return tuple(next(gen)["size"])
+    finally:
+        gen.close()
+
+
+def merge_shards(spec_dir, out_dir, concat_out="{name}.mp4",
+                 playlist_out="{name}.m3u8", fps=10):
+    """Merge video segments from all shards.
+
+    Collects the segments recorded in the checkpoint of each shard, in
+    the order of the shards, and concatenates them into one video per
+    dataset without re-encoding.  Also writes one playlist per dataset
+    referring to all segments.  All shards must be done, and all segments
+    of a dataset must have the same frame size.
+
+    Args:
+        spec_dir (str or pathlib.Path): Directory with shard
+            specifications.
+        out_dir (str or pathlib.Path): Where to write merged outputs.
+        concat_out (str): Pattern for merged video per dataset.
+        playlist_out (str): Pattern for merged playlist per dataset.
+        fps (int): Frames per second, for the playlist.
+
+    Returns:
+        List of files written.
+
+    Raises:
+        RuntimeError: if not all shards are done.
+        ValueError: if segments of a dataset differ in frame size.
+    """
+    spec_dir = pathlib.Path(spec_dir)
+    out_dir = pathlib.Path(out_dir)
+    specs = sorted(p for p in spec_dir.glob("shard-*.json")
+                   if p.suffixes == [".json"])
+    missing = [p.stem for p in specs if not _status_path(p, "done").exists()]
+    if missing:
+        raise RuntimeError("Shards not done: " + ", ".join(missing))
+    segments = {}
+    for p in specs:
+        with p.open("r", encoding="utf-8") as fp:
+            spec = json.load(fp)
+        with open(spec["kwargs"]["checkpoint"], "r", encoding="utf-8") as fp:
+            checkpoint = json.load(fp)
+        for key in sorted(checkpoint["segments"]):
+            for (name, fn, n) in checkpoint["segments"][key]:
+                segments.setdefault(name, []).append((fn, n))
+    for (name, segs) in segments.items():
+        sizes = {seg: _get_frame_size(seg) for (seg, _) in segs}
+        if len(set(sizes.values())) > 1:
+            raise ValueError(
+                    f"Cannot merge segments for {name:s} with different "
+                    "frame sizes: " + ", ".join(
+                        f"{seg!s}: {w:d}x{h:d}"
+                        for (seg, (w, h)) in sizes.items()))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for (name, segs) in segments.items():
+        fn = out_dir / playlist_out.format(name=name)
+        vis.write_playlist(fn, segs, fps, complete=True)
+        written.append(fn)
+        fn = out_dir / concat_out.format(name=name)
+        vis.concat_videos([seg for (seg, _) in segs], fn)
+        written.append(fn)
+    return written
@@ -0,0 +1,516 @@
+"""Generate synthetic ABI and GLM archives.
+
+Benchmarking the routines that find and fetch data, such as
+:func:`sattools.glm.ensure_glm_for_period`,
+:func:`sattools.glm.find_glm_coverage`, or
+:func:`sattools.abi.get_fsfiles`, needs archives of realistic size and
+layout.  This module writes fake but reader-compatible files:
+
+- gridded GLM files into the ``GLM-processed`` tree below ``$NAS_DATA``,
+  following :func:`sattools.glm.get_pattern_dwd_glm`, readable by satpy's
+  ``glm_l2`` reader;
+- ABI L1b files, following :func:`sattools.abi.get_pattern_s3_abi`,
+  readable by satpy's ``abi_l1b`` reader;
+- GLM L2 LCFA files, following :data:`sattools.glm.pattern_s3_glm_lcfa`.
+
+ABI and LCFA files are written to any fsspec filesystem, such as a local
+directory posing as the bucket, or a local S3 server from moto, see
+:func:`moto_s3`.
+
+The density of files, gaps in the archive, and moves of the MESO sector
+can be configured.  With ``empty=True``, files are created empty, which is
+much faster and sufficient for benchmarks that only list files.
+"""
+
+import os
+import logging
+import pathlib
+import tempfile
+import contextlib
+
+import numpy
+
+from . import abi
+from . import glm
+from .lazy import lazy_import
+
+pandas = lazy_import("pandas")
+xarray = lazy_import("xarray")
+pyproj = lazy_import("pyproj")
+pyresample = lazy_import("pyresample.geometry")
+satpy = lazy_import("satpy")
+s3fs = lazy_import("s3fs")
+
+logger = logging.getLogger(__name__)
+
+height = 35786023.0
+lon_0 = -75.0
+proj_dict = {"proj": "geos", "sweep": "x", "lon_0": lon_0, "h": height,
+             "x_0": 0, "y_0": 0, "ellps": "GRS80", "units": "m",
+             "no_defs": None, "type": "crs"}
+
+#: Time between ABI scans per sector in mode 6
+abi_period = {"F": "10min", "C": "5min", "M1": "1min", "M2": "1min"}
+
+#: Time covered by each GLM L2 LCFA file
+lcfa_period = "20s"
+
+#: Pixel size at nadir of ABI channels in metres
+abi_resolution = {1: 1000, 2: 500, 3: 1000, 5: 1000}
+
+#: Planck coefficients for ABI infrared channels (fk1, fk2, bc1, bc2), taken
+#: from channel 14 for all
+abi_planck = (8510.22, 1286.27, 0.22516, 0.9992)
+
+
+def make_area(shape=(5, 5), shift=0, resolution=2000, centre=None):
+    """Make an ABI fixed grid area.
+
+    Args:
+        shape (Tuple[int, int]): Number of rows and columns.
+        shift (int): Move the area by this many widths to the east, such as
+            to simulate a moving MESO sector.
+        resolution (float): Pixel size in metres.
+        centre (Tuple[float, float]): Longitude and latitude of the centre
+            before shifting.  Defaults to the sub-satellite point.
+    """
+    (rows, cols) = shape
+    (xc, yc) = (0, 0) if centre is None else pyproj.Proj(proj_dict)(*centre)
+    x0 = xc + (shift - 0.5) * cols * resolution
+    y0 = yc - 0.5 * rows * resolution
+    return pyresample.geometry.AreaDefinition(
+            "fribbulus xax", "fribbulus xax", "fribbulus xax", proj_dict,
+            cols, rows,
+            (x0, y0, x0 + cols*resolution, y0 + rows*resolution))
+
+
+def make_areas(n, shape=(5, 5), move_every=None, **kwargs):
+    """Yield areas for n time slots.
+
+    Args:
+        n (int): Number of time slots.
+        shape (Tuple[int, int]): Shape of each area.
+        move_every (int): Move the area every so many time slots, like a
+            MESO sector.  If not given, the area does not move.
+        **kwargs: Passed on to :func:`make_area`.
+    """
+    areas = {}
+    for i in range(n):
+        shift = i // move_every if move_every else 0
+        if shift not in areas:
+            areas[shift] = make_area(shape, shift, **kwargs)
+        yield areas[shift]
+
+
+def make_abi_glm_scenes(n, shape=(5, 5), abi_every=5, move_every=None,
+                        start=None):
+    """Yield scenes with GLM in every scene and ABI in some.
+
+    This is what :func:`sattools.scutil.get_abi_glm_multiscenes` produces
+    for ABI every ``abi_every`` minutes and GLM every minute, without
+    reading any files.  Each scene gets its own arrays, such that memory
+    use grows with the number of scenes kept, like for real data.  Pass
+    the generator to ``satpy.MultiScene`` to get a multiscene that creates
+    scenes only when iterated.
+
+    Args:
+        n (int): Number of scenes.
+        shape (Tuple[int, int]): Shape of each dataset.
+        abi_every (int): Include ABI in every so many scenes.
+        move_every (int): Move the area every so many scenes.
+        start (datetime.datetime): Start time of the first scene.  Defaults
+            to 1900-01-01.
+    """
+    start = pandas.Timestamp(start or "1900-01-01")
+    for (i, ar) in enumerate(make_areas(n, shape, move_every)):
+        attrs = {"start_time": start + pandas.Timedelta(minutes=i),
+                 "end_time": start + pandas.Timedelta(minutes=i+1),
+                 "platform_name": "GOES-16",
+                 "area": ar}
+        sc = satpy.Scene()
+        data = numpy.arange(shape[0]*shape[1], dtype="f4").reshape(shape)
+        sc["flash_extent_density"] = xarray.DataArray(
+                data, dims=("y", "x"),
+                attrs={**attrs, "name": "flash_extent_density",
+                       "sensor": "glm"})
+        if i % abi_every == 0:
+            sc["C14"] = xarray.DataArray(
+                    data.copy(), dims=("y", "x"),
+                    attrs={**attrs, "name": "C14", "sensor": "abi",
+                           "wavelength": (10.8, 11.2, 11.6)})
+        yield sc
+
+
+def format_pattern(pattern, start, end):
+    """Get filename from pattern for a period.
+
+    Fills the placeholders and wildcards in a pattern as used by typhon,
+    such as :data:`sattools.glm.pattern_s3_glm_lcfa`.  The wildcard after
+    the creation time marker ``_c`` becomes the end time, other wildcards
+    (tenths of seconds) become zero.
+    """
+    fields = {}
+    for (prefix, t) in (("", start), ("end_", end)):
+        for (k, fmt) in (("year", "%Y"), ("month", "%m"), ("day", "%d"),
+                         ("doy", "%j"), ("hour", "%H"), ("minute", "%M"),
+                         ("second", "%S")):
+            fields[prefix + k] = format(t, fmt)
+    return (pattern.replace("_c*", f"_c{end:%Y%j%H%M%S}0")
+                   .replace("*", "0")
+                   .format(**fields))
+
+
+def get_slots(start_date, end_date, period, density=1.0, gaps=(), seed=0):
+    """Get time slots present in a synthetic archive.
+
+    Args:
+        start_date (datetime-like): Start of period.
+        end_date (datetime-like): End of period.
+        period (str or timedelta): Duration of each slot.
+        density (float): Fraction of slots present, chosen at random.
+        gaps (Iterable[Tuple]): Periods (start, end) without any slots.
+            Slots overlapping a gap are left out.
+        seed (int): Seed for the random choice.
+
+    Returns:
+        List of (start, end) tuples of ``pandas.Timestamp``.
+    """
+    period = pandas.Timedelta(period)
+    starts = pandas.date_range(start_date, end_date, freq=period,
+                               inclusive="left")
+    keep = numpy.random.default_rng(seed).random(starts.size) < density
+    for (g_start, g_end) in gaps:
+        keep &= ~((starts < pandas.Timestamp(g_end)) &
+                  (starts + period > pandas.Timestamp(g_start)))
+    return [(s, s + period) for s in starts[keep]]
+
+
+def _get_xy(area):
+    """Get fixed grid coordinates in radians."""
+    (x, y) = area.get_proj_vectors()
+    return {"x": ("x", x/height), "y": ("y", y/height)}
+
+
+def _get_common_vars():
+    return {"goes_imager_projection": (
+                (), 0,
+                {"semi_major_axis": 6378137.0,
+                 "semi_minor_axis": 6356752.31414,
+                 "perspective_point_height": height,
+                 "longitude_of_projection_origin": lon_0,
+                 "latitude_of_projection_origin": 0.0,
+                 "sweep_angle_axis": "x"}),
+            "nominal_satellite_subpoint_lat": ((), 0.0),
+            "nominal_satellite_subpoint_lon": ((), lon_0),
+            "nominal_satellite_height": ((), height/1000)}
+
+
+def write_glm_grid(fn, start, end, area, data=None, seed=0):
+    """Write a gridded GLM file as written by glmtools.
+
+    The file can be read by satpy's ``glm_l2`` reader.
+
+    Args:
+        fn (str or pathlib.Path): Where to write the file.
+        start (datetime-like): Start time.
+        end (datetime-like): End time.
+        area (AreaDefinition): Fixed grid area, such as from
+            :func:`make_area`.
+        data (ndarray): Flash extent density.  Defaults to random counts.
+        seed (int): Seed for random counts.
+    """
+    if data is None:
+        data = numpy.random.default_rng(seed).poisson(
+                0.1, area.shape).astype("i2")
+    ds = xarray.Dataset(
+        {"flash_extent_density": (
+            ("y", "x"), data,
+            {"grid_mapping": "goes_imager_projection",
+             "_FillValue": numpy.int16(-1),
+             "standard_name": "flash_extent_density",
+             "units": "Count per nominal 3136 microradian^2 pixel per "
+                      "1.0 min"}),
+         **_get_common_vars()},
+        coords=_get_xy(area),
+        attrs={"time_coverage_start": f"{start:%Y-%m-%dT%H:%M:%S}Z",
+               "time_coverage_end": f"{end:%Y-%m-%dT%H:%M:%S}Z",
+               "spatial_resolution": "2km at nadir",
+               "platform_ID": "G16"})
+    ds.to_netcdf(fn)
+
+
+def write_abi_l1b(fn, start, end, chan, area, seed=0, chunks=None):
+    """Write an ABI L1b radiance file.
+
+    The file can be read by satpy's ``abi_l1b`` reader, with random
+    radiances.
+
+    Args:
+        fn (str or pathlib.Path): Where to write the file.
+        start (datetime-like): Start time.
+        end (datetime-like): End time.
+        chan (int): Channel number.
+        area (AreaDefinition): Fixed grid area, such as from
+            :func:`make_area`.
+        seed (int): Seed for random radiances.
+        chunks (Tuple[int, int]): If given, store radiances and quality
+            flags compressed in chunks of this shape, like NOAA does.
+            Otherwise, store them contiguously.
+    """
+    counts = numpy.random.default_rng(seed).integers(
+            100, 900, area.shape).astype("i2")
+    (fk1, fk2, bc1, bc2) = abi_planck if chan > 6 else (numpy.nan,)*4
+    ds = xarray.Dataset(
+        {"Rad": (
+            ("y", "x"), counts,
+            {"grid_mapping": "goes_imager_projection",
+             "_FillValue": numpy.int16(1023),
+             "_Unsigned": "true",
+             "scale_factor": numpy.float32(0.1),
+             "add_offset": numpy.float32(-1.0),
+             "units": "mW m-2 sr-1 (cm-1)-1",
+             "long_name": "ABI L1b Radiances"}),
+         "DQF": (("y", "x"), numpy.zeros(area.shape, "i1"),
+                 {"_FillValue": numpy.int8(-1)}),
+         "band_id": (("band",), [chan]),
+         "band_wavelength": (("band",), [float(chan)]),
+         "esun": ((), 2000.0),
+         "earth_sun_distance_anomaly_in_AU": ((), 1.0),
+         "kappa0": ((), 0.002),
+         "planck_fk1": ((), fk1),
+         "planck_fk2": ((), fk2),
+         "planck_bc1": ((), bc1),
+         "planck_bc2": ((), bc2),
+         "yaw_flip_flag": ((), numpy.int8(0)),
+         **_get_common_vars()},
+        coords=_get_xy(area),
+        attrs={"time_coverage_start": f"{start:%Y-%m-%dT%H:%M:%S.%f}Z",
+               "time_coverage_end": f"{end:%Y-%m-%dT%H:%M:%S.%f}Z",
+               "spatial_resolution":
+                   f"{abi_resolution.get(chan, 2000)/1000:.1g}km at nadir",
+               "platform_ID": "G16",
+               "orbital_slot": "GOES-East",
+               "instrument_ID": "FM1",
+               "scene_id": "Full Disk",
+               "production_site": "synthetic",
+               "timeline_ID": "ABI Mode 6"})
+    encoding = {}
+    if chunks is not None:
+        encoding = {v: {"chunksizes": chunks, "zlib": True}
+                    for v in ("Rad", "DQF")}
+    ds.to_netcdf(fn, encoding=encoding)
+
+
+def write_glm_lcfa(fn, start, end, n_flashes=10, seed=0):
+    """Write a GLM L2 LCFA file with random flashes.
+
+    Each flash has one group with one event, somewhere in the field of
+    view.
+
+    Args:
+        fn (str or pathlib.Path): Where to write the file.
+        start (datetime-like): Start time.
+        end (datetime-like): End time.
+        n_flashes (int): Number of flashes.
+        seed (int): Seed for random locations and energies.
+    """
+    rng = numpy.random.default_rng(seed)
+    lat = rng.uniform(-50, 50, n_flashes).astype("f4")
+    lon = rng.uniform(lon_0-50, lon_0+50, n_flashes).astype("f4")
+    energy = rng.uniform(1e-15, 1e-13, n_flashes).astype("f4")
+    offset = rng.uniform(
+            0, (pandas.Timestamp(end)-pandas.Timestamp(start)).total_seconds(),
+            n_flashes).astype("f4")
+    ids = numpy.arange(n_flashes, dtype="i4")
+    t_attrs = {"units": f"seconds since {start:%Y-%m-%d %H:%M:%S}"}
+    data_vars = {}
+    for (kind, dim) in (("event", "number_of_events"),
+                        ("group", "number_of_groups"),
+                        ("flash", "number_of_flashes")):
+        data_vars[f"{kind:s}_id"] = ((dim,), ids)
+        data_vars[f"{kind:s}_lat"] = ((dim,), lat)
+        data_vars[f"{kind:s}_lon"] = ((dim,), lon)
+        data_vars[f"{kind:s}_energy"] = ((dim,), energy)
+        if kind == "flash":
+            data_vars["flash_time_offset_of_first_event"] = (
+                    (dim,), offset, t_attrs)
+            data_vars["flash_time_offset_of_last_event"] = (
+                    (dim,), offset, t_attrs)
+        else:
+            data_vars[f"{kind:s}_time_offset"] = ((dim,), offset, t_attrs)
+    data_vars["event_parent_group_id"] = (("number_of_events",), ids)
+    data_vars["group_parent_flash_id"] = (("number_of_groups",), ids)
+    data_vars["product_time"] = ((), 0.0, t_attrs)
+    ds = xarray.Dataset(
+            data_vars,
+            attrs={"time_coverage_start": f"{start:%Y-%m-%dT%H:%M:%S.%f}Z",
+                   "time_coverage_end": f"{end:%Y-%m-%dT%H:%M:%S.%f}Z",
+                   "platform_ID": "G16",
+                   "orbital_slot": "GOES-East"})
+    ds.to_netcdf(fn)
+
+
+def make_glm_archive(start_date, end_date, sector="C", lat=None, lon=None,
+                     shape=(20, 20), density=1.0, gaps=(), move_every=None,
+                     empty=False, seed=0):
+    """Write gridded GLM files into the archive below ``$NAS_DATA``.
+
+    Writes one file per minute, following
+    :func:`sattools.glm.get_pattern_dwd_glm`.  For MESO sectors, the
+    files are written to the directory for the position of the sector,
+    which starts at ``lat``, ``lon`` and moves east every ``move_every``
+    minutes.
+
+    Args:
+        start_date (datetime-like): Start of period.
+        end_date (datetime-like): End of period.
+        sector (str): "C", "F", "M1", or "M2".
+        lat (float): Initial latitude of MESO sector.
+        lon (float): Initial longitude of MESO sector.
+        shape (Tuple[int, int]): Size of the grid.
+        density (float): Fraction of files present, see :func:`get_slots`.
+        gaps (Iterable[Tuple]): Periods without files.
+        move_every (int): Move the area every so many minutes.
+        empty (bool): Create empty files rather than NetCDF.
+        seed (int): Seed for random choices and contents.
+
+    Returns:
+        List of paths written.
+    """
+    slots = get_slots(start_date, end_date, "1min", density=density,
+                      gaps=gaps, seed=seed)
+    meso = sector.startswith("M")
+    centre = (lon, lat) if meso else None
+    first = pandas.Timestamp(start_date)
+    areas = {}
+    files = []
+    for (i, (start, end)) in enumerate(slots):
+        shift = (int((start - first) / pandas.Timedelta("1min")) //
+                 move_every if move_every else 0)
+        if shift not in areas:
+            areas[shift] = make_area(shape, shift, centre=centre)
+        ar = areas[shift]
+        if meso:
+            (c_lon, c_lat) = ar.get_lonlat(ar.height//2, ar.width//2)
+            pat = glm.get_pattern_dwd_glm(sector, lat=c_lat, lon=c_lon)
+        else:
+            pat = glm.get_pattern_dwd_glm(sector)
+        p = pathlib.Path(format_pattern(pat, start, end))
+        p.parent.mkdir(parents=True, exist_ok=True)
+        if empty:
+            p.touch()
+        else:
+            write_glm_grid(p, start, end, ar, seed=seed+i)
+        files.append(p)
+    logger.debug(f"Wrote {len(files):d} GLM files")
+    return files
+
+
+def _put(fs, path, write, *args, empty=False, **kwargs):
+    """Write a file with write function and upload it to fs."""
+    fs.makedirs(os.path.dirname(path), exist_ok=True)
+    if empty:
+        fs.touch(path)
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = os.path.join(tmpdir, os.path.basename(path))
+        write(tmp, *args, **kwargs)
+        fs.put(tmp, path)
+
+
+def make_abi_archive(fs, start_date, end_date, sector="F", chans=(14,),
+                     prefix="", shape=(20, 20), density=1.0, gaps=(),
+                     move_every=None, empty=False, seed=0):
+    """Write ABI L1b files to a filesystem posing as NOAA's S3 bucket.
+
+    Writes one file per channel per scan, following
+    :func:`sattools.abi.get_pattern_s3_abi`, with scans as often as in
+    ABI mode 6.  For MESO sectors, the area moves east every
+    ``move_every`` scans.
+
+    Args:
+        fs (fsspec.AbstractFileSystem): Where to write, such as an
+            ``s3fs.S3FileSystem`` or a local filesystem.
+        start_date (datetime-like): Start of period.
+        end_date (datetime-like): End of period.
+        sector (str): "C", "F", "M1", or "M2".
+        chans (Iterable[int]): Channels to write.
+        prefix (str): Prefix for paths, such as a local directory posing
+            as the root of the bucket.
+        shape (Tuple[int, int]): Size of the grid at 2 km.  Channels with
+            a finer resolution get correspondingly larger grids.
+        density (float): Fraction of scans present, see
+            :func:`get_slots`.
+        gaps (Iterable[Tuple]): Periods without files.
+        move_every (int): Move the area every so many scans.
+        empty (bool): Create empty files rather than NetCDF.
+        seed (int): Seed for random choices and contents.
+
+    Returns:
+        List of paths written.
+    """
+    slots = get_slots(start_date, end_date, abi_period[sector],
+                      density=density, gaps=gaps, seed=seed)
+    pat = abi.get_pattern_s3_abi(sector)
+    period = pandas.Timedelta(abi_period[sector])
+    first = pandas.Timestamp(start_date)
+    files = []
+    for (i, (start, end)) in enumerate(slots):
+        shift = (int((start - first) / period) // move_every
+                 if move_every else 0)
+        for c in chans:
+            factor = 2000 // abi_resolution.get(c, 2000)
+            ar = make_area((shape[0]*factor, shape[1]*factor), shift,
+                           resolution=abi_resolution.get(c, 2000))
+            p = prefix + format_pattern(
+                    pat.replace("M6C*", f"M6C{c:>02d}"), start, end)
+            _put(fs, p, write_abi_l1b, start, end, c, ar, empty=empty,
+                 seed=seed+i)
+            files.append(p)
+    logger.debug(f"Wrote {len(files):d} ABI files")
+    return files
+
+
+def make_lcfa_archive(fs, start_date, end_date, prefix="", density=1.0,
+                      gaps=(), n_flashes=10, empty=False, seed=0):
+    """Write GLM LCFA files to a filesystem posing as NOAA's S3 bucket.
+
+    Writes one file per 20 seconds, following
+    :data:`sattools.glm.pattern_s3_glm_lcfa`.  See
+    :func:`make_abi_archive` for the arguments.
+
+    Returns:
+        List of paths written.
+    """
+    slots = get_slots(start_date, end_date, lcfa_period, density=density,
+                      gaps=gaps, seed=seed)
+    files = []
+    for (i, (start, end)) in enumerate(slots):
+        p = prefix + format_pattern(glm.pattern_s3_glm_lcfa, start, end)
+        _put(fs, p, write_glm_lcfa, start, end, n_flashes=n_flashes,
+             empty=empty, seed=seed+i)
+        files.append(p)
+    logger.debug(f"Wrote {len(files):d} LCFA files")
+    return files
+
+
+@contextlib.contextmanager
+def moto_s3(bucket="noaa-goes16"):
+    """Run a local S3 server with moto and create a bucket.
+
+    Requires the optional dependency moto.  Yields an
+    ``s3fs.S3FileSystem`` connected to the server, whose endpoint URL is
+    available as ``fs.client_kwargs["endpoint_url"]``.
+    """
+    from moto.server import ThreadedMotoServer
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    try:
+        (host, port) = server.get_host_and_port()
+        fs = s3fs.S3FileSystem(
+                key="testing", secret="testing",
+                client_kwargs={"endpoint_url": f"http://{host:s}:{port:d}"})
+        fs.mkdir(bucket)
+        yield fs
+    finally:
+        server.stop()
@@ -1,6 +1,8 @@
 """Routines for interacting with typhon."""
 
-import satpy.readers
+from .lazy import lazy_import
+
+satpy = lazy_import("satpy.readers")
 
 
 def fileinfo2fspath(finfo):
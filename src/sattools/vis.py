@@ -1,13 +1,26 @@
 """Routines for satellite visualisation."""
+import os
+import copy
+import json
+import math
+import struct
 import pathlib
+import subprocess
 
-import xarray
 import numpy
-import satpy
-import pyresample.geometry
 import logging
 
+from . import io
+from . import log
+from . import ptc
 from . import scutil
+from . import framecache
+from .lazy import lazy_import
+
+xarray = lazy_import("xarray")
+pandas = lazy_import("pandas")
+satpy = lazy_import("satpy")
+pyresample = lazy_import("pyresample.geometry")
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +59,14 @@ overlay_args = {
 
 enh_args = {"decorate": decorate_args, "overlay": overlay_args}
 
+cog_args = {
+        "tiled": True,
+        "blockxsize": 512,
+        "blockysize": 512,
+        "compress": "deflate",
+        "overviews": [],  # automatic: powers of two down to 256 pixels
+        "overviews_resampling": "average"}
+
 
 def show(
         files,
@@ -57,7 +78,13 @@ def show(
         reader=None,
         path_to_coastlines=None,
         label="",
-        show_only_coastlines=False):
+        show_only_coastlines=False,
+        quicklook=None,
+        cog=False,
+        strategy="composite_first",
+        resample_cache_dir=None,
+        overlay_cache_dir=None,
+        scene_cache=None):
     """Visualise satellite data with pytroll.
 
     From a set of files containing satellite data, visualise channels and
@@ -101,22 +128,79 @@ def show(
             be taken for these images, or to an areadefinition that will be
             used.
 
+        quicklook (Optional[int]):
+            If set, reduce the resolution by this factor directly after
+            loading, before any compositing or resampling.  See
+            :func:`sattools.scutil.get_quicklook_scene`.
+
+        cog (Optional[bool]):
+            If true, write Cloud Optimized GeoTIFFs: tiled, internally
+            compressed, and with overviews, using the settings in
+            ``cog_args``.  Data are written in strips of one tile row at a
+            time, such that the full image need not be in memory at once.
+
+        strategy (Optional[str]):
+            How to produce composites for regions other than 'native'.
+            With "composite_first" (the default), composites are generated
+            on the native scene, then resampled.  With "resample_first",
+            only the prerequisites are loaded and resampled, and the
+            composites are generated on the target area.  With "auto",
+            choose for each region with :func:`estimate_composite_strategy`.
+
+        resample_cache_dir (Optional[str or pathlib.Path]):
+            If given, directory where the resampler stores its lookup
+            tables, such that later calls resampling between the same
+            areas can reuse them.
+
+        overlay_cache_dir (Optional[str or pathlib.Path]):
+            If given, directory where rendered coastlines are cached per
+            area, such that later calls need not draw them again.
+
+        scene_cache (Optional[sattools.scutil.SceneCache]):
+            If given, take the scene from this cache rather than creating
+            it from the files each time.
+
     Returns:
         Set of paths written
     """
     L = set()
-    sc = satpy.Scene(
-            filenames=[str(f) for f in files],
-            reader=reader)
+    if scene_cache is None:
+        sc = satpy.Scene(
+                filenames=[str(f) for f in files],
+                reader=reader)
+    else:
+        sc = scene_cache.get_scene(files, reader=reader)
     if path_to_coastlines is None:
         overlay = None
-    else:
+    elif overlay_cache_dir is None:
         overlay = {"coast_dir": path_to_coastlines, "color": "yellow"}
-    sc.load(channels)
-    sc.load(composites)
+    else:
+        overlay = {"coast_dir": path_to_coastlines,
+                   "overlays": {
+                       "coasts": {"outline": "yellow"},
+                       "cache": {"file": os.path.join(
+                           overlay_cache_dir, "coasts")}}}
+    resample_kwargs = {}
+    if resample_cache_dir is not None:
+        resample_kwargs["cache_dir"] = resample_cache_dir
+    if strategy not in ("composite_first", "resample_first", "auto"):
+        raise ValueError(f"Unknown strategy: {strategy!s}")
+    generate = strategy == "composite_first"
+    with log.Span("vis.load"):
+        if quicklook:
+            # composites are generated after reducing the resolution
+            sc.load(channels, generate=False)
+            sc.load(composites, generate=False)
+            sc = scutil.get_quicklook_scene(
+                    sc, quicklook, generate=generate)
+        else:
+            sc.load(channels, generate=generate)
+            sc.load(composites, generate=generate)
+    native = None
     if show_only_coastlines:
+        native = _get_native_scene(sc)
         try:
-            da = sc[show_only_coastlines]
+            da = native[show_only_coastlines]
         except (KeyError, ValueError, TypeError):
             ar = show_only_coastlines
         else:
@@ -133,41 +217,159 @@ def show(
     elif not sc.keys():
         return set()
     for la in regions:
+        if la == "native" or _choose_strategy(
+                sc, la, strategy) == "composite_first":
+            if native is None:
+                native = _get_native_scene(sc)
+            src = native
+        else:
+            src = sc
         if la == "native":
-            ls = sc
+            ls = src
             arid = la
         else:
-            ls = sc.resample(la)
+            with log.Span("vis.resample"):
+                ls = src.resample(la, **resample_kwargs)
             arid = ls[ls.keys().pop()].attrs["area"].area_id
         for dn in ls.keys():
             fn = pathlib.Path(d_out) / fn_out.format(
                     area=arid,
                     dataset=dn["name"],
                     label=label)
-            ls.save_dataset(
-                    dn,
-                    filename=str(fn),
-                    overlay=overlay)
+            with log.Span("vis.save", items=1):
+                if cog:
+                    _save_cog(ls, dn, fn, overlay)
+                else:
+                    ls.save_dataset(
+                            dn,
+                            filename=str(fn),
+                            overlay=overlay)
             L.add(fn)
     return L
 
 
+def _get_native_scene(sc):
+    """Get scene with composites generated on the native area.
+
+    Helper for :func:`show`.  If composites were loaded with
+    ``generate=False``, generate them on a copy of the scene.
+    """
+    if not sc.missing_datasets:
+        return sc
+    native = sc.copy()
+    native.generate_possible_composites(unload=True)
+    return native
+
+
+def _choose_strategy(sc, area, strategy):
+    """Choose composite strategy for area, helper for :func:`show`."""
+    if strategy == "auto":
+        return estimate_composite_strategy(sc, area)
+    return strategy
+
+
+def estimate_composite_strategy(sc, area):
+    """Estimate whether to composite or resample first.
+
+    For a scene in which composites have not yet been generated (loaded with
+    ``generate=False``), estimate whether it is cheaper to generate the
+    composites on the native scene and resample the results
+    ("composite_first"), or to resample the prerequisites and generate the
+    composites on the target area ("resample_first").  The estimate counts
+    the pixels processed, assuming that both resampling and compositing
+    scale with the number of input plus output pixels:
+
+    - composite first: all prerequisites (n_i pixels each) are composited
+      at the finest native resolution (n_c), and the result is resampled to
+      the target (n_t): sum(n_i) + n_c + n_t.
+    - resample first: each of the k prerequisites is resampled, and the
+      resampled inputs are composited: sum(n_i + n_t) + k*n_t.
+
+    Resampling first therefore wins when the target area is small compared
+    to the native resolution, in particular for composites combining many
+    channels.
+
+    Args:
+        sc (satpy.Scene): Scene with prerequisites loaded.
+        area (AreaDefinition or str): Target area.  Names are looked up in
+            the area catalogue, see :func:`sattools.ptc.get_all_areas`.  If
+            the area cannot be found or has no size, "composite_first" is
+            returned.
+
+    Returns:
+        str, either "composite_first" or "resample_first"
+    """
+    if not sc.missing_datasets:
+        return "composite_first"
+    if isinstance(area, str):
+        try:
+            area = ptc.get_all_areas()[area]
+        except KeyError:
+            logger.debug(f"Area {area:s} not found, cannot estimate cost")
+            return "composite_first"
+    if not hasattr(area, "size"):
+        return "composite_first"
+    sizes = [ds.attrs["area"].size for ds in sc.values()
+             if hasattr(ds.attrs.get("area"), "size")]
+    if not sizes:
+        return "composite_first"
+    n_t = area.size
+    cost_cf = sum(sizes) + max(sizes) + n_t
+    cost_rf = sum(sizes) + 2 * len(sizes) * n_t
+    logger.debug(f"Estimated cost composite first: {cost_cf:d}, "
+                 f"resample first: {cost_rf:d}")
+    return "resample_first" if cost_rf < cost_cf else "composite_first"
+
+
+def _save_cog(sc, dn, fn, overlay):
+    """Save dataset as Cloud Optimized GeoTIFF.
+
+    Helper for :func:`show`.  The dataset is rechunked to strips of one tile
+    row, such that dask writes tile row by tile row.  The scene passed in
+    keeps its chunks.  With an overlay, pycoast draws on the full image,
+    which is then computed at once, so that the data are not rechunked.
+    The overviews are built after the full resolution data are written,
+    then the file is rewritten with the overviews in front as required for
+    a COG.  Both steps work block by block on disk.
+    """
+    import rasterio.shutil
+    sc = sc.copy(datasets=[dn])
+    if overlay is None:
+        sc[dn] = sc[dn].chunk({"y": cog_args["blockysize"], "x": -1})
+    sc.save_dataset(
+            dn,
+            filename=str(fn),
+            overlay=overlay,
+            writer="geotiff",
+            **cog_args)
+    tmp = pathlib.Path(fn).with_suffix(".cog-tmp")
+    rasterio.shutil.copy(
+            str(fn), str(tmp), driver="GTiff", copy_src_overviews=True,
+            tiled=True, blockxsize=cog_args["blockxsize"],
+            blockysize=cog_args["blockysize"], compress=cog_args["compress"])
+    os.replace(tmp, fn)
+
+
 def show_video_abi_glm(
         files, out_dir,
         img_out="{name:s}-{start_time:%Y%m%d_%H%M}.tiff",
         vid_out="{name:s}-{start_time:%Y%m%d_%H%M}-"
                 "{end_time:%Y%m%d_%H%M}.mp4",
-        scene_kwargs={}):
+        scene_kwargs={},
+        quicklook=None):
     """Show a video.
 
-    Show a video with ABI MESO and GLM L2 C14_flash_extent_density.
+    Show a video with ABI MESO and GLM L2 C14_flash_extent_density.  If
+    ``quicklook`` is given, reduce the resolution by this factor after
+    loading.
     """
     (ms, mr) = scutil.get_resampled_multiscene(
             files,
             reader=["glm_l2", "abi_l1b"],
             load_first="C14",
             load_next=["C14_flash_extent_density"],
-            scene_kwargs=scene_kwargs)
+            scene_kwargs=scene_kwargs,
+            quicklook=quicklook)
 
     logger.info("Making an image")
     for (sc2, sc3) in zip(ms.scenes, mr.scenes):
@@ -183,6 +385,329 @@ def show_video_abi_glm(
     mr.save_animation(str(out_dir / vid_out), enh_args=enh_args)
 
 
+def _format_decoration(ds, decorate):
+    """Format text in decoration based on dataset attributes."""
+    if decorate is None or "decorate" not in decorate:
+        return decorate
+    deco_local = copy.deepcopy(decorate)
+    for deco in deco_local["decorate"]:
+        if "text" in deco and "txt" in deco["text"]:
+            deco["text"]["txt"] = deco["text"]["txt"].format(**ds.attrs)
+    return deco_local
+
+
+def _render_frame(ds, enh_args, fill_value=None):
+    """Render a single video frame from a dataset.
+
+    Returns the frame as a numpy array with dimensions (y, x[, bands]).
+    """
+    enh_args = enh_args.copy()
+    if "decorate" in enh_args:
+        enh_args["decorate"] = _format_decoration(ds, enh_args["decorate"])
+    img = satpy.writers.get_enhanced_image(ds, **enh_args)
+    (data, mode) = img.finalize(fill_value=fill_value)
+    if data.ndim == 3:
+        data = data.transpose("y", "x", "bands")
+    return data.values
+
+
+def _get_frame(sc, did, enh_args, fill_value, frame_cache=None):
+    """Get frame for dataset from cache or by rendering it."""
+    ds = sc[did]
+    if frame_cache is None:
+        return _render_frame(ds, enh_args, fill_value)
+    files = sc.attrs.get("filenames", ())
+    if not files:
+        # the key will contain a digest of the data, compute them only once
+        ds = ds.compute()
+    key = framecache.get_frame_key(
+            ds, files=files,
+            enh_args=enh_args, fill_value=fill_value)
+    frame = frame_cache.get(key)
+    if frame is None:
+        logger.debug(f"Rendering frame for {did!s} at "
+                     f"{ds.attrs.get('start_time')!s}")
+        with log.Span("vis.render", items=1):
+            frame = _render_frame(ds, enh_args, fill_value)
+        frame_cache.put(key, frame)
+    return frame
+
+
+def _save_animation(ms, filename, enh_args=None, fps=10, fill_value=None,
+                    frame_cache=None, **kwargs):
+    """Save animation, see :func:`save_animation`.
+
+    Returns a dictionary mapping each dataset name to a tuple with the
+    filename written and the number of frames in it.
+    """
+    import imageio
+    enh_args = enh_args or {}
+    written = {}
+    for did in ms.first_scene.keys():
+        scenes = [sc for sc in ms.scenes if did in sc]
+        attrs = scenes[0][did].attrs.copy()
+        if "end_time" in scenes[-1][did].attrs:
+            attrs["end_time"] = scenes[-1][did].attrs["end_time"]
+        fn = filename.format(**attrs)
+        logger.info(f"Writing animation to {fn:s}")
+        with log.Span("vis.encode", items=len(scenes)), \
+                imageio.get_writer(fn, fps=fps, **kwargs) as writer:
+            for sc in scenes:
+                writer.append_data(
+                        _get_frame(sc, did, enh_args, fill_value,
+                                   frame_cache))
+        written[did["name"]] = (fn, len(scenes))
+    return written
+
+
+def save_animation(ms, filename, enh_args=None, fps=10, fill_value=None,
+                   frame_cache=None, **kwargs):
+    """Save an animation, reusing cached frames.
+
+    Like ``satpy.MultiScene.save_animation``, but each frame is looked up in
+    a frame cache before it is rendered, such that only frames that are not
+    yet cached are computed.  Scenes lacking a dataset are skipped for that
+    dataset.
+
+    Args:
+        ms (satpy.MultiScene): Multiscene to animate.
+        filename (str): Filename pattern, formatted with the attributes of
+            the first dataset, with ``end_time`` taken from the last one.
+        enh_args (Mapping): Arguments passed to
+            ``satpy.writers.get_enhanced_image``, such as decorate and overlay
+            settings.
+        fps (int): Frames per second.
+        fill_value (int): Fill value to use rather than an alpha band.
+        frame_cache (FrameCache): Cache to use.  If not given, frames are
+            rendered without caching.
+        kwargs: Passed on to ``imageio.get_writer``.
+
+    Returns:
+        List of filenames written.
+    """
+    return [fn for (fn, _) in _save_animation(
+        ms, filename, enh_args=enh_args, fps=fps, fill_value=fill_value,
+        frame_cache=frame_cache, **kwargs).values()]
+
+
+def split_period(start_date, end_date, duration):
+    """Split period into consecutive windows of at most duration.
+
+    Returns a list of (start, end) tuples of ``pandas.Timestamp``.
+    """
+    edges = list(pandas.date_range(start_date, end_date, freq=duration))
+    if edges[-1] < end_date:
+        edges.append(pandas.Timestamp(end_date))
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _get_fmp4_ranges(fn):
+    """Get byte ranges of the parts of a fragmented MP4 file.
+
+    Walks the top-level boxes.  The initialisation section is everything
+    before the first ``moof`` box, the media are the ``moof`` and ``mdat``
+    boxes after it, up to any trailing ``mfra`` index.
+
+    Returns (init_size, media_start, media_end).
+    """
+    boxes = []
+    with open(fn, "rb") as fp:
+        while len(head := fp.read(8)) == 8:
+            (size, kind) = struct.unpack(">I4s", head)
+            start = fp.tell() - 8
+            if size == 1:  # 64-bit size follows the type
+                (size,) = struct.unpack(">Q", fp.read(8))
+            elif size == 0:  # box extends to end of file
+                size = os.fstat(fp.fileno()).st_size - start
+            boxes.append((kind, start, start + size))
+            fp.seek(start + size)
+    media = [(s, e) for (kind, s, e) in boxes if kind in (b"moof", b"mdat")]
+    if not media:
+        raise ValueError(f"Not a fragmented MP4 file: {fn!s}")
+    return (media[0][0], media[0][0], media[-1][1])
+
+
+def write_playlist(fn, segments, fps, complete):
+    """Write HLS playlist for video segments.
+
+    MPEG-TS and other segments are listed as they are, with HLS version 3.
+    Segments with a ``.mp4`` extension must be fragmented MP4, such as
+    written with ``-movflags frag_keyframe+empty_moov``.  They are listed
+    with HLS version 7, each with its initialisation section as
+    ``EXT-X-MAP`` and its media as byte range of the same file.
+
+    Args:
+        fn (pathlib.Path): Playlist to write.
+        segments (List[Tuple[str, int]]): Segment filenames and the number
+            of frames in each.
+        fps (int): Frames per second.
+        complete (bool): Whether the last segment has been written.  As
+            long as this is False, players will keep polling for more.
+    """
+    fn = pathlib.Path(fn)
+    durations = [n/fps for (_, n) in segments]
+    fmp4 = any(os.fspath(seg).endswith(".mp4") for (seg, _) in segments)
+    lines = ["#EXTM3U",
+             f"#EXT-X-VERSION:{7 if fmp4 else 3:d}",
+             "#EXT-X-PLAYLIST-TYPE:EVENT",
+             f"#EXT-X-TARGETDURATION:{math.ceil(max(durations, default=0)):d}",
+             "#EXT-X-MEDIA-SEQUENCE:0"]
+    for ((seg, _), dur) in zip(segments, durations):
+        rel = os.path.relpath(seg, fn.parent)
+        if fmp4:
+            (init, start, end) = _get_fmp4_ranges(seg)
+            lines.append(f'#EXT-X-MAP:URI="{rel:s}",BYTERANGE="{init:d}@0"')
+        lines.append(f"#EXTINF:{dur:.3f},")
+        if fmp4:
+            lines.append(f"#EXT-X-BYTERANGE:{end-start:d}@{start:d}")
+        lines.append(rel)
+    if complete:
+        lines.append("#EXT-X-ENDLIST")
+    with io.atomic_write(fn, encoding="utf-8") as fp:
+        fp.write("\n".join(lines) + "\n")
+
+
+def _read_checkpoint(fn, start_date, end_date, segment_duration,
+                     params=None):
+    """Read checkpoint of segmented video processing.
+
+    Returns a new, empty state if the checkpoint does not exist yet.
+    Raises ValueError if the checkpoint is for a different period, segment
+    duration, or other parameters.  The parameters in ``params``, such as
+    the area or the enhancement arguments, are compared as strings.
+    """
+    state = {"start": pandas.Timestamp(start_date).isoformat(),
+             "end": pandas.Timestamp(end_date).isoformat(),
+             "segment_duration": str(pandas.Timedelta(segment_duration)),
+             "params": {k: str(v) for (k, v) in (params or {}).items()},
+             "segments": {}}
+    try:
+        with open(fn, "r", encoding="utf-8") as fp:
+            old = json.load(fp)
+    except FileNotFoundError:
+        return state
+    for k in ("start", "end", "segment_duration"):
+        if old[k] != state[k]:
+            raise ValueError(
+                    f"Checkpoint {fn!s} is for {k:s} {old[k]:s}, "
+                    f"not {state[k]:s}")
+    old_params = old.get("params", {})
+    for k in sorted(state["params"].keys() | old_params.keys()):
+        if old_params.get(k) != state["params"].get(k):
+            raise ValueError(
+                    f"Checkpoint {fn!s} is for {k:s} "
+                    f"{old_params.get(k)!s}, not {state['params'].get(k)!s}")
+    logger.info(f"Resuming from checkpoint {fn!s} with "
+                f"{len(old['segments']):d} segments done")
+    return old
+
+
+def _write_checkpoint(fn, state):
+    """Write checkpoint of segmented video processing atomically."""
+    with io.atomic_write(fn, encoding="utf-8") as fp:
+        json.dump(state, fp, indent=1)
+
+
+def concat_videos(files, fn_out):
+    """Concatenate video files without re-encoding.
+
+    Uses the ffmpeg concat demuxer, copying the encoded streams, so the
+    files must have been written with the same codec and settings, such as
+    video segments written by :func:`show_video_abi_glm_times`.
+
+    Args:
+        files (List[str or pathlib.Path]): Video files to concatenate.
+        fn_out (str or pathlib.Path): Output video file.
+    """
+    import imageio_ffmpeg
+    fn_out = pathlib.Path(fn_out)
+    lst = fn_out.with_suffix(".concat.txt")
+    lst.write_text("".join(
+        "file '{}'\n".format(os.path.abspath(f).replace("'", "'\\''"))
+        for f in files))
+    logger.info(f"Concatenating {len(files):d} segments to {fn_out!s}")
+    try:
+        subprocess.run(
+                [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+                 "-f", "concat", "-safe", "0", "-i", str(lst),
+                 "-c", "copy", str(fn_out)],
+                check=True)
+    finally:
+        lst.unlink()
+
+
+def _show_video_segments(
+        start_date, end_date, out_dir, img_out, vid_out, playlist_out,
+        segment_duration, sector, area, enh_args, frame_cache, quicklook,
+        checkpoint=None, concat_out=None, fps=10):
+    """Show ABI/GLM video as segments with playlist.
+
+    Helper for :func:`show_video_abi_glm_times`.  Each segment is loaded,
+    encoded, and released before the next segment is loaded, and the
+    playlists are updated after each segment.  With a checkpoint, segments
+    already done are skipped.
+
+    Returns the list of playlists and concatenated videos written.
+    """
+    kwargs = {}
+    if vid_out.endswith(".mp4"):
+        # fragmented MP4 is readable while still being written
+        kwargs["output_params"] = ["-movflags", "frag_keyframe+empty_moov"]
+    state = None
+    if checkpoint is not None:
+        state = _read_checkpoint(
+                checkpoint, start_date, end_date, segment_duration,
+                params={"sector": sector, "area": area, "enh_args": enh_args,
+                        "quicklook": quicklook, "vid_out": vid_out})
+    segments = {}
+    for (seg_start, seg_end) in split_period(
+            start_date, end_date, segment_duration):
+        key = seg_start.isoformat()
+        done = state["segments"].get(key) if state else None
+        if done is not None and all(os.path.exists(fn)
+                                    for (_, fn, _) in done):
+            logger.info(f"Segment {seg_start:%Y-%m-%d %H:%M}--"
+                        f"{seg_end:%Y-%m-%d %H:%M} already done")
+            for (name, fn, n) in done:
+                segments.setdefault(name, []).append((fn, n))
+            continue
+        logger.info(f"Processing segment {seg_start:%Y-%m-%d %H:%M}--"
+                    f"{seg_end:%Y-%m-%d %H:%M}")
+        outputs = []
+        for ms in scutil.get_abi_glm_multiscenes(
+                seg_start, seg_end, chans=[14], sector=sector,
+                from_glm=["C14_yellow_lightning"], quicklook=quicklook):
+            ls = ms.resample(area) if area else ms
+            if not segments:
+                ls.scenes[0].save_datasets(
+                        filename=str(out_dir / img_out),
+                        overlay=enh_args.get("overlay", None))
+            with log.Span("vis.segment", items=len(ls.scenes)):
+                written = _save_animation(
+                        ls, str(out_dir / vid_out), enh_args=enh_args,
+                        fps=fps, frame_cache=frame_cache, **kwargs)
+            for (name, seg) in written.items():
+                segments.setdefault(name, []).append(seg)
+                outputs.append([name, *seg])
+                write_playlist(out_dir / playlist_out.format(name=name),
+                               segments[name], fps, complete=False)
+            del ms, ls  # release memory before loading the next segment
+        if state is not None:
+            state["segments"][key] = outputs
+            _write_checkpoint(checkpoint, state)
+    written = []
+    for (name, segs) in segments.items():
+        fn = out_dir / playlist_out.format(name=name)
+        write_playlist(fn, segs, fps, complete=True)
+        written.append(fn)
+    if concat_out is not None:
+        for (name, segs) in segments.items():
+            fn = out_dir / concat_out.format(name=name)
+            concat_videos([seg for (seg, _) in segs], fn)
+            written.append(fn)
+    return written
+
+
 def show_video_abi_glm_times(
         start_date, end_date, out_dir,
         img_out="{platform_name}-{sensor}-{name}-"
@@ -191,20 +716,70 @@ def show_video_abi_glm_times(
                 "{start_time:%Y%m%d%H%M%S}-{end_time:%Y%m%d%H%M%S}.mp4",
         sector="F",
         area=None,
-        enh_args=enh_args):
-    """Show a ABI/GLM video between start_date and end_date."""
+        enh_args=enh_args,
+        frame_cache=None,
+        quicklook=None,
+        segment_duration=None,
+        playlist_out="{name}.m3u8",
+        checkpoint=None,
+        concat_out=None):
+    """Show a ABI/GLM video between start_date and end_date.
+
+    If ``segment_duration`` is given, the period is processed in consecutive
+    segments of this duration (anything accepted by ``pandas.date_range`` as
+    ``freq``).  Each segment is loaded, written to its own video file
+    (following the pattern ``vid_out``), and released before the next segment
+    is loaded, such that memory use does not grow with the length of the
+    period.  After each segment, an HLS playlist per dataset is updated
+    (following the pattern ``playlist_out``), see :func:`write_playlist`.
+    Segments with a ``.mp4`` extension are written as fragmented MP4,
+    which HLS players support from version 7.
+
+    With segments, a ``checkpoint`` file can record which segments are
+    complete and what they wrote.  If processing fails halfway, calling
+    this function again with the same checkpoint, period, segment
+    duration, and other arguments resumes with the first incomplete
+    segment.  Resuming with a different sector, area, enhancement
+    arguments, quicklook factor, or ``vid_out`` raises a ValueError.  If
+    ``concat_out`` is given, the segments for each dataset are finally
+    concatenated into one video following this pattern (such as
+    ``"{name}.mp4"``), copying rather than re-encoding the video streams.
+
+    If ``quicklook`` is given, reduce the resolution by this factor after
+    loading, see :func:`sattools.scutil.get_quicklook_scene`.
+
+    If ``frame_cache`` is given, it should be a
+    :class:`~sattools.framecache.FrameCache`.  Frames are then taken from the
+    cache when available and only missing frames are rendered.
+    """
+    if segment_duration is not None:
+        return _show_video_segments(
+                start_date, end_date, out_dir, img_out, vid_out,
+                playlist_out, segment_duration, sector, area, enh_args,
+                frame_cache, quicklook, checkpoint=checkpoint,
+                concat_out=concat_out)
+    if checkpoint is not None or concat_out is not None:
+        raise ValueError("Checkpoints and concatenation need segments, "
+                         "pass segment_duration")
     ms = next(scutil.get_abi_glm_multiscenes(
             start_date,
             end_date,
             chans=[14],
             sector=sector,
-            from_glm=["C14_yellow_lightning"]))
+            from_glm=["C14_yellow_lightning"],
+            quicklook=quicklook))
     if area:
-        ls = ms.resample(area)
-        ls.scenes
+        with log.Span("vis.resample"):
+            ls = ms.resample(area)
+            ls.scenes
     else:
         ls = ms
     ls.scenes[0].save_datasets(
             filename=str(out_dir / img_out),
             overlay=enh_args.get("overlay", None))
-    ls.save_animation(str(out_dir / vid_out), enh_args=enh_args)
+    if frame_cache is None:
+        with log.Span("vis.encode", items=len(ls.scenes)):
+            ls.save_animation(str(out_dir / vid_out), enh_args=enh_args)
+    else:
+        save_animation(ls, str(out_dir / vid_out), enh_args=enh_args,
+                       frame_cache=frame_cache)
@@ -19,6 +19,15 @@ def setUp(tmp_path, monkeypatch):
     monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "scratch"))
 
 
+@pytest.fixture(autouse=True)
+def clear_s3():
+    """Drop shared S3 filesystems, as tests patch s3fs.S3FileSystem."""
+    from sattools import s3
+    s3.clear()
+    yield
+    s3.clear()
+
+
 @pytest.fixture
 def fakearea():
     """Make a 5x5 pixel area for full disc ABI."""
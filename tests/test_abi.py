@@ -45,6 +45,8 @@ def test_get_fs_and_files(sS, tmp_path, monkeypatch, sector):
             datetime.datetime(1900, 1, 1, 1),
             sector=sector,
             chans=12) == []
+    # filesystems are reused
+    sS.assert_called_once()
 
 
 def test_split_meso(fake_multiscene_vary_meso):
@@ -60,3 +62,76 @@ def test_split_meso(fake_multiscene_vary_meso):
     for did in fake_multiscene_vary_meso.first_scene.keys():
         for ms in L:
             assert len({sc[did].attrs["area"] for sc in ms}) == 1
+
+
+@pytest.fixture
+def abi_file(tmp_path):
+    """Write a chunked ABI file of 800 by 800 pixels."""
+    import pandas
+    from sattools import synth
+    p = tmp_path / ("OR_ABI-L1b-RadC-M6C14_G16_s19000010000000_"
+                    "e19000010005000_c19000010005000.nc")
+    synth.write_abi_l1b(
+            p, pandas.Timestamp("1900-01-01T00:00"),
+            pandas.Timestamp("1900-01-01T00:05"), 14,
+            synth.make_area((800, 800)), chunks=(50, 50))
+    return p
+
+
+def test_get_roi_scene(abi_file):
+    """Test getting a scene cropped to a region of interest."""
+    import numpy
+    import satpy
+    from sattools import synth
+    from sattools.abi import get_roi_scene
+    full = satpy.Scene(filenames=[str(abi_file)], reader="abi_l1b")
+    full.load(["C14"])
+    roi = synth.make_area((40, 40), resolution=2000, centre=(-73, 1))
+    sc = get_roi_scene([str(abi_file)], roi, ["C14"])
+    assert sc["C14"].shape == (41, 41)
+    assert len(sc["C14"].chunks[0]) <= 2
+    (sx, sy) = full["C14"].attrs["area"].get_area_slices(roi)
+    numpy.testing.assert_array_equal(sc["C14"], full["C14"][sy, sx])
+    sc = get_roi_scene([str(abi_file)], (-76, -1, -74, 1), ["C14"])
+    assert 0 < sc["C14"].shape[0] < 150
+
+
+def test_get_roi_scene_chunks(tmp_path):
+    """Test that dask chunks match on-disk chunks and cropping selects few."""
+    import netCDF4
+    import pandas
+    from sattools import synth
+    from sattools.abi import get_roi_scene
+    p = tmp_path / ("OR_ABI-L1b-RadF-M6C14_G16_s19000010000000_"
+                    "e19000010005000_c19000010005000.nc")
+    synth.write_abi_l1b(
+            p, pandas.Timestamp("1900-01-01T00:00"),
+            pandas.Timestamp("1900-01-01T00:05"), 14,
+            synth.make_area((904, 904)), chunks=(226, 226))
+    with netCDF4.Dataset(p) as ds:
+        disk = ds["Rad"].chunking()
+    # a region of interest covering everything keeps all dask chunks
+    sc = get_roi_scene([str(p)], synth.make_area((904, 904)), ["C14"])
+    assert sc["C14"].data.chunksize == tuple(disk)
+    roi = synth.make_area((40, 40), resolution=2000, centre=(-73, 1))
+    sc = get_roi_scene([str(p)], roi, ["C14"])
+    assert sc["C14"].data.numblocks == (1, 1)
+
+
+def test_get_roi_scene_reads_roi(abi_file, tmp_path):
+    """Test that only chunks overlapping the region are downloaded."""
+    pytest.importorskip("h5py")
+    import os
+    from fsspec.implementations.local import LocalFileSystem
+    from fsspec.implementations.cached import CachingFileSystem
+    from satpy.readers import FSFile
+    from sattools import synth
+    from sattools.abi import get_roi_scene
+    from sattools.prefetch import get_read_trace
+    fs = CachingFileSystem(fs=LocalFileSystem(),
+                           cache_storage=str(tmp_path / "cache"))
+    roi = synth.make_area((40, 40), resolution=2000, centre=(-73, 1))
+    sc = get_roi_scene([FSFile(str(abi_file), fs=fs)], roi, ["C14"])
+    sc["C14"].values
+    read = sum(e - s for (s, e) in get_read_trace(fs, str(abi_file)))
+    assert read < os.path.getsize(abi_file) / 4
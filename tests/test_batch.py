@@ -0,0 +1,114 @@
+"""Test running batches of jobs."""
+
+import json
+import pathlib
+import unittest.mock
+
+import pytest
+
+
+def test_read_manifest(tmp_path):
+    """Test reading job manifests."""
+    from sattools.batch import read_manifest
+    (tmp_path / "jobs.yaml").write_text("""
+defaults:
+  outdir: /tmp/out
+  areas: [eurol]
+jobs:
+  - files: [a.nc, b.nc]
+    composites: [overview]
+  - files: c*.nc
+    areas: [germ]
+""")
+    jobs = read_manifest(tmp_path / "jobs.yaml")
+    assert jobs == [
+            {"outdir": "/tmp/out", "areas": ["eurol"],
+             "files": ["a.nc", "b.nc"], "composites": ["overview"]},
+            {"outdir": "/tmp/out", "areas": ["germ"], "files": "c*.nc"}]
+    (tmp_path / "jobs.yaml").write_text("- files: [a.nc]\n- files: [b.nc]\n")
+    assert read_manifest(tmp_path / "jobs.yaml") == [
+            {"files": ["a.nc"]}, {"files": ["b.nc"]}]
+    (tmp_path / "jobs.jsonl").write_text(
+            '{"files": ["a.nc"]}\n\n{"files": ["b.nc"], "cog": true}\n')
+    assert read_manifest(tmp_path / "jobs.jsonl") == [
+            {"files": ["a.nc"]}, {"files": ["b.nc"], "cog": True}]
+
+
+@unittest.mock.patch("sattools.vis.show", autospec=True)
+def test_run_jobs(svs, tmp_path):
+    """Test running jobs in a worker pool."""
+    from sattools.batch import run_jobs
+    for i in range(3):
+        (tmp_path / f"in{i:d}.nc").touch()
+    areas = {"germ": unittest.mock.sentinel.germ}
+
+    def fake_show(files, **kwargs):
+        if len(files) == 1:
+            raise ValueError("Not enough files")
+        return {pathlib.Path(f"{f!s}.tif") for f in files}
+    svs.side_effect = fake_show
+    jobs = [{"files": str(tmp_path / "in*.nc"), "outdir": tmp_path,
+             "composites": ["overview"], "areas": ["germ", "native"]},
+            {"name": "single", "files": [tmp_path / "in0.nc"],
+             "outdir": tmp_path},
+            {"files": str(tmp_path / "nothing*.nc"), "outdir": tmp_path},
+            {"files": [], "outdir": tmp_path, "banana": True}]
+    res = run_jobs(jobs, max_workers=2, areas=areas,
+                   cache_dir=tmp_path / "cache")
+    assert [r["name"] for r in res] == ["0", "single", "2", "3"]
+    assert [r["status"] for r in res] == ["ok", "failed", "failed", "failed"]
+    assert res[0]["files"] == [str(tmp_path / f"in{i:d}.nc.tif")
+                               for i in range(3)]
+    assert res[0]["error"] is None
+    assert res[1]["error"] == "ValueError: Not enough files"
+    assert res[2]["error"].startswith("FileNotFoundError")
+    assert "banana" in res[3]["error"]
+    assert all(r["duration"] >= 0 for r in res)
+    assert svs.call_count == 2
+    kwargs = svs.call_args_list[0][1]
+    assert kwargs["regions"] == [unittest.mock.sentinel.germ, "native"]
+    assert kwargs["composites"] == ["overview"]
+    assert kwargs["channels"] == []
+    # each worker has its own caches
+    cache_dirs = {c[1]["resample_cache_dir"].parent
+                  for c in svs.call_args_list}
+    assert cache_dirs <= {tmp_path / "cache" / "worker-0",
+                          tmp_path / "cache" / "worker-1"}
+    assert kwargs["overlay_cache_dir"] == (
+            kwargs["resample_cache_dir"].parent / "overlay")
+    assert kwargs["resample_cache_dir"].is_dir()
+    json.dumps(res)  # reportable
+    run_jobs(jobs[:1], areas=areas, cache_dir=tmp_path / "cache")
+    assert svs.call_args[1]["resample_cache_dir"] == (
+            tmp_path / "cache" / "resample")
+
+
+@unittest.mock.patch("sattools.ptc.get_all_areas", autospec=True)
+@unittest.mock.patch("sattools.vis.show", autospec=True)
+@unittest.mock.patch("sattools.processing.showsat.parse_cmdline",
+                     autospec=True)
+def test_showsat_manifest(spp, svs, spg, tmp_path, capsys):
+    """Test running show-sat with a manifest."""
+    import sattools.processing.showsat
+    spg.return_value = {}
+    (tmp_path / "jobs.jsonl").write_text(
+        '{"files": ["a.nc"], "name": "a"}\n'
+        '{"files": ["b.nc"], "areas": ["native"], "name": "b"}\n')
+    spp.return_value = sattools.processing.showsat.get_parser().parse_args(
+            [str(tmp_path / "out"), "--manifest", str(tmp_path / "jobs.jsonl"),
+             "-a", "germ", "--composites", "fog", "--report",
+             str(tmp_path / "report.jsonl"), "--workers", "2"])
+    svs.return_value = {tmp_path / "out" / "fog.tif"}
+    sattools.processing.showsat.main()
+    assert svs.call_count == 2
+    calls = sorted(svs.call_args_list, key=lambda c: c[1]["files"])
+    assert calls[0][1]["regions"] == ["germ"]
+    assert calls[0][1]["composites"] == ["fog"]
+    assert calls[1][1]["regions"] == ["native"]
+    with (tmp_path / "report.jsonl").open() as fp:
+        report = [json.loads(line) for line in fp]
+    assert [r["status"] for r in report] == ["ok", "ok"]
+    assert "a: ok" in capsys.readouterr().out
+    svs.side_effect = OSError("disk full")
+    with pytest.raises(SystemExit):
+        sattools.processing.showsat.main()
@@ -0,0 +1,70 @@
+"""Test time coverage."""
+
+import numpy
+import pandas
+import pytest
+
+pI = pandas.Interval
+pT = pandas.Timestamp
+
+
+def _t(m):
+    return pT("1900-01-01T00:00") + pandas.Timedelta(minutes=m)
+
+
+def _cov(*pairs):
+    from sattools.coverage import Coverage
+    return Coverage([_t(s) for (s, _) in pairs], [_t(e) for (_, e) in pairs])
+
+
+def test_merge():
+    """Test that unsorted, overlapping, and touching intervals merge."""
+    from sattools.coverage import Coverage
+    cov = _cov((5, 6), (0, 1), (1, 2), (8, 9), (3, 7), (4, 5), (10, 10))
+    assert list(cov) == [pI(_t(0), _t(2)), pI(_t(3), _t(7)),
+                         pI(_t(8), _t(9))]
+    assert len(cov) == 3
+    assert cov.duration == pandas.Timedelta(minutes=7)
+    assert cov.starts.dtype == numpy.dtype("M8[ns]")
+    assert cov == Coverage.from_intervals(
+            [pI(_t(3), _t(7)), (_t(0), _t(2)), pI(_t(8), _t(9))])
+    assert len(Coverage()) == 0
+    assert list(Coverage.from_intervals([])) == []
+    assert "00:02" in repr(cov)
+    with pytest.raises(ValueError):
+        Coverage([_t(0)], [])
+
+
+def test_union_intersection():
+    """Test union and intersection."""
+    from sattools.coverage import Coverage
+    a = _cov((0, 2), (4, 6), (8, 10))
+    b = _cov((1, 5), (9, 12), (20, 21))
+    assert a | b == _cov((0, 6), (8, 12), (20, 21))
+    assert a & b == _cov((1, 2), (4, 5), (9, 10))
+    assert a & Coverage() == Coverage()
+    assert a & _cov((-5, 30)) == a
+    assert a.clip(_t(1), _t(9)) == _cov((1, 2), (4, 6), (8, 9))
+
+
+def test_gaps():
+    """Test finding gaps."""
+    a = _cov((0, 2), (4, 6), (8, 10))
+    assert list(a.gaps(_t(0), _t(12))) == [
+            pI(_t(2), _t(4)), pI(_t(6), _t(8)), pI(_t(10), _t(12))]
+    assert list(a.gaps(_t(1), _t(5))) == [pI(_t(2), _t(4))]
+    assert list(a.gaps(_t(0), _t(2))) == []
+    assert list(_cov().gaps("1900-01-01T00:00", "1900-01-01T00:05")) == [
+            pI(_t(0), _t(5))]
+
+
+def test_is_fully_covered():
+    """Test checking full coverage."""
+    a = _cov((0, 2), (2, 6), (8, 10))
+    assert a.is_fully_covered(_t(0), _t(6))
+    assert a.is_fully_covered(_t(1), _t(3))
+    assert not a.is_fully_covered(_t(5), _t(9))
+    assert not a.is_fully_covered(_t(-1), _t(1))
+    assert not a.is_fully_covered(_t(11), _t(12))
+    assert a.is_fully_covered(_t(7), _t(7))
+    assert not _cov().is_fully_covered(_t(0), _t(1))
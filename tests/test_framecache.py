@@ -0,0 +1,79 @@
+"""Test the frame cache."""
+
+import datetime
+import unittest.mock
+
+import numpy
+import xarray
+
+
+def _mkds(fakearea, **attrs):
+    return xarray.DataArray(
+            numpy.zeros((5, 5)),
+            dims=("y", "x"),
+            attrs={"area": fakearea, "name": "C14",
+                   "start_time": datetime.datetime(1900, 1, 1),
+                   **attrs})
+
+
+def test_get_frame_key(fakearea, tmp_path):
+    """Test calculating keys for frames."""
+    from sattools.framecache import get_frame_key
+    ds = _mkds(fakearea)
+    k1 = get_frame_key(ds)
+    assert k1 == get_frame_key(_mkds(fakearea))
+    assert k1 != get_frame_key(
+            _mkds(fakearea, start_time=datetime.datetime(1900, 1, 2)))
+    assert k1 != get_frame_key(ds, enh_args={"overlay": {"coast_dir": "x"}})
+    f = tmp_path / "input.nc"
+    f.write_bytes(b"abc")
+    k2 = get_frame_key(ds, files=[f])
+    assert k1 != k2
+    assert k2 == get_frame_key(ds, files=[str(f)])
+    f.write_bytes(b"abcdef")
+    assert k2 != get_frame_key(ds, files=[f])
+    assert k1 != get_frame_key(ds, files=["s3://noaa-goes16/whatever.nc"])
+    # without files, the data distinguish frames
+    assert k1 != get_frame_key(ds.copy(data=ds.values + 1))
+    assert get_frame_key(ds, files=[f]) == get_frame_key(
+            ds.copy(data=ds.values + 1), files=[f])
+
+
+def test_file_identity(tmp_path):
+    """Test identities of files on fsspec filesystems."""
+    from fsspec.implementations.local import LocalFileSystem
+    from satpy.readers import FSFile
+    from sattools.framecache import file_identity
+    f = tmp_path / "input.nc"
+    f.write_bytes(b"abc")
+    fsf = FSFile(str(f), fs=LocalFileSystem())
+    ident = file_identity(fsf)
+    assert ident[:2] == [str(f), 3]
+    f.write_bytes(b"abcdef")
+    assert file_identity(fsf) != ident
+    fs = unittest.mock.MagicMock()
+    fs.info.return_value = {"size": 3, "ETag": '"abc123"'}
+    assert file_identity(FSFile("noaa-goes16/x.nc", fs=fs)) == [
+            "noaa-goes16/x.nc", 3, '"abc123"']
+    fs.info.side_effect = FileNotFoundError
+    assert file_identity(FSFile("noaa-goes16/x.nc", fs=fs)) == [
+            "noaa-goes16/x.nc"]
+
+
+def test_frame_cache(tmp_path):
+    """Test storing, retrieving, and evicting frames."""
+    from sattools.framecache import FrameCache
+    fc = FrameCache(tmp_path / "cache", max_size=1000)
+    assert fc.size == 0
+    assert fc.get("aa00") is None
+    arr = numpy.arange(100, dtype="uint8").reshape(10, 10)
+    fc.put("aa00", arr)
+    assert "aa00" in fc
+    numpy.testing.assert_array_equal(fc.get("aa00"), arr)
+    fc.put("aa00", arr)
+    assert fc.size == FrameCache(tmp_path / "cache").size
+    for k in ("bb01", "cc02", "dd03", "ee04", "ff05"):
+        fc.put(k, arr)
+    assert fc.size <= 1000
+    assert "ff05" in fc
+    assert "bb01" not in fc
@@ -60,6 +60,7 @@ def test_get_pattern(tmp_path, monkeypatch):
 def test_ensure_glm_lcfa(sS, au, lcfa_pattern, lcfa_files, tmp_path, caplog,
                          monkeypatch):
     """Test ensuring GLM LCFA is created."""
+    from sattools import s3
     from sattools.glm import ensure_glm_lcfa_for_period
     from fsspec.implementations.local import LocalFileSystem
     from typhon.files.fileset import NoFilesError
@@ -75,6 +76,7 @@ def test_ensure_glm_lcfa(sS, au, lcfa_pattern, lcfa_files, tmp_path, caplog,
                         datetime.datetime(1900, 1, 1, 0, 0, 0),
                         datetime.datetime(1900, 1, 1, 0, 6, 0)):
                     pass
+        s3.clear()  # drop the patched caching filesystem
         with caplog.at_level(logging.DEBUG):
             files = list(ensure_glm_lcfa_for_period(
                     datetime.datetime(1900, 1, 1, 0, 0, 0),
@@ -207,6 +209,97 @@ def test_find_coverage(glm_files, tmp_path, monkeypatch):
             pI(pT("1900-01-01T00:04:00"), pT("1900-01-01T00:05:00"))]
 
 
+@patch("sattools.glm.run_glmtools")
+@patch("appdirs.user_cache_dir")
+@patch("s3fs.S3FileSystem")
+def test_ensure_glm_for_periods(sS, au, sgr, glm_files, lcfa_pattern,
+                                lcfa_files, tmp_path, monkeypatch):
+    """Test ensuring GLM for many periods at once."""
+    from sattools.glm import ensure_glm_for_periods, get_pattern_dwd_glm
+    from fsspec.implementations.local import LocalFileSystem
+    monkeypatch.setenv("NAS_DATA", str(tmp_path / "nas"))
+    au.return_value = str(tmp_path / "whole-file-cache")
+    sS.return_value = LocalFileSystem()
+
+    def fake_run(files, max_files, sector="C", lat=None, lon=None):
+        """Create files when testing."""
+        _mk_test_files(get_pattern_dwd_glm(sector, lat=lat, lon=lon),
+                       [int(f.name[20:22]) for f in files])
+    sgr.side_effect = fake_run
+    t = [datetime.datetime(1900, 1, 1, 0, m) for m in range(7)]
+    periods = [(t[0], t[6]), (t[3], t[6], "C"), (t[0], t[3], "M1", 1.2, 2.3)]
+    with patch("sattools.glm.pattern_s3_glm_lcfa", lcfa_pattern):
+        results = ensure_glm_for_periods(periods, max_files=100)
+        sS.assert_called_once()
+        cache = tmp_path / "whole-file-cache"
+        assert sgr.call_args_list == [
+                call([cache / "lcfa-fake-19000101000200-000300.nc"],
+                     max_files=100, sector="C"),
+                call([cache / "lcfa-fake-19000101000400-000500.nc"],
+                     max_files=100, sector="C"),
+                call([cache / "lcfa-fake-19000101000100-000200.nc",
+                      cache / "lcfa-fake-19000101000200-000300.nc"],
+                     max_files=100, sector="M1", lat=1.2, lon=2.3)]
+        assert [len(r) for r in results] == [6, 3, 3]
+        assert all(isinstance(f, str) for r in results for f in r)
+        assert results[1][0].startswith(os.fspath(
+                tmp_path / "nas" / "GLM-processed" / "C" / "1min" / "1900" /
+                "01" / "01" / "00" / "OR_GLM-L2-GLMC-M3_G16_s1900001000300"))
+        # all covered now, nothing to do
+        sgr.reset_mock()
+        assert ensure_glm_for_periods(periods) == results
+        sgr.assert_not_called()
+        sgr.side_effect = None
+        with pytest.raises(RuntimeError, match="M2"):
+            ensure_glm_for_periods([(t[1], t[2], "M2", 1.2, 2.3)])
+
+
+def test_get_coverage(glm_files, tmp_path, monkeypatch):
+    """Test getting merged GLM time coverage."""
+    from sattools.glm import get_glm_coverage
+    monkeypatch.setenv("NAS_DATA", str(tmp_path / "nas"))
+    cov = get_glm_coverage(
+        datetime.datetime(1900, 1, 1, 0, 0, 0),
+        datetime.datetime(1900, 1, 1, 0, 6, 0),
+        sector="C")
+    assert list(cov) == [
+            pandas.Interval(pandas.Timestamp("1900-01-01T00:00:00"),
+                            pandas.Timestamp("1900-01-01T00:02:00")),
+            pandas.Interval(pandas.Timestamp("1900-01-01T00:03:00"),
+                            pandas.Timestamp("1900-01-01T00:04:00")),
+            pandas.Interval(pandas.Timestamp("1900-01-01T00:05:00"),
+                            pandas.Timestamp("1900-01-01T00:06:00"))]
+    assert cov.is_fully_covered(datetime.datetime(1900, 1, 1, 0, 0, 30),
+                                datetime.datetime(1900, 1, 1, 0, 2, 0))
+
+
+def test_locate_glm_files(tmp_path, monkeypatch):
+    """Test locating GLM files by listing hour directories."""
+    from sattools.glm import locate_glm_files, _parse_times
+    from sattools.synth import make_glm_archive
+    monkeypatch.setenv("NAS_DATA", str(tmp_path / "nas"))
+    pT = pandas.Timestamp
+    files = make_glm_archive(
+            pT("1900-01-01T00:50"), pT("1900-01-01T03:10"), empty=True,
+            gaps=[(pT("1900-01-01T01:30"), pT("1900-01-01T02:30"))])
+    (files[0].parent / "README").touch()
+    (files[0].parent / "OR_GLM-L2-GLMC-M3_G16_sbroken.nc").touch()
+    with patch("os.scandir", wraps=os.scandir) as osd:
+        (cov, paths) = locate_glm_files(
+                pT("1900-01-01T00:55:30"), pT("1900-01-01T03:00"))
+    # hours 00 to 03, each listed once
+    assert osd.call_count == 4
+    assert paths == [str(f) for f in files[5:70]]
+    assert list(cov) == [
+            pandas.Interval(pT("1900-01-01T00:55"), pT("1900-01-01T01:30")),
+            pandas.Interval(pT("1900-01-01T02:30"), pT("1900-01-01T03:00"))]
+    assert locate_glm_files(pT("1900-01-02"), pT("1900-01-03"))[1] == []
+    numpy.testing.assert_array_equal(
+            _parse_times(["2020060235959", "1900001000000"]),
+            numpy.array(["2020-02-29T23:59:59", "1900-01-01T00:00:00"],
+                        dtype="M8[s]"))
+
+
 def test_find_gaps(glm_files, monkeypatch, tmp_path):
     """Test finding GLM time coverage gaps."""
     from sattools.glm import find_glm_coverage_gaps
@@ -260,8 +353,9 @@ def test_find_gaps(glm_files, monkeypatch, tmp_path):
 
 def test_run_glmtools(tmp_path, caplog, monkeypatch):
     """Test running glmtools."""
-    from sattools.glm import run_glmtools
+    from sattools.glm import run_glmtools, _load_glmtool
     monkeypatch.setenv("NAS_DATA", str(tmp_path / "nas"))
+    _load_glmtool.cache_clear()
     with patch("sattools.glm.load_file") as sgl:
         mocks = [MagicMock() for _ in range(5)]
         sgl.return_value.grid_setup.return_value = mocks
@@ -290,6 +384,7 @@ def test_run_glmtools(tmp_path, caplog, monkeypatch):
         run_glmtools([tmp_path / "lcfa1.nc", tmp_path / "lcfa2.nc"],
                      max_files=1)
         assert mocks[0].call_count == 2
+    _load_glmtool.cache_clear()
 
 
 @patch("importlib.util.spec_from_file_location", autospec=True)
@@ -300,6 +395,16 @@ def test_load_file(ium, ius):
     load_file("module", "/dev/null")
 
 
+@patch("sattools.glm.load_file", autospec=True)
+def test_get_glmtool(sgl):
+    """Test that glmtools script is loaded only once."""
+    from sattools.glm import get_glmtool, _load_glmtool
+    _load_glmtool.cache_clear()
+    assert get_glmtool() is get_glmtool()
+    sgl.assert_called_once()
+    _load_glmtool.cache_clear()
+
+
 def test_get_integrated_glm(tmp_path):
     """Test getting integrated GLM."""
     from sattools.glm import get_integrated_scene
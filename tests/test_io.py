@@ -72,3 +72,20 @@ def test_datadir(tmp_path, monkeypatch):
     pd = nas_data_out(tmp_path / "fionnay", subdir="datum", create=True)
     assert pd == tmp_path / "fionnay" / "datum"
     assert pd.exists()
+
+
+def test_atomic_write(tmp_path):
+    """Test writing files atomically."""
+    import pytest
+    from sattools.io import atomic_write
+    p = tmp_path / "out.json"
+    with atomic_write(p, encoding="utf-8") as fp:
+        fp.write("tofu")
+        assert not p.exists()
+    assert p.read_text() == "tofu"
+    with pytest.raises(ValueError):
+        with atomic_write(p, "wb") as fp:
+            fp.write(b"tempeh")
+            raise ValueError
+    assert p.read_text() == "tofu"
+    assert os.listdir(tmp_path) == ["out.json"]
@@ -0,0 +1,32 @@
+"""Test lazy importing."""
+
+import os
+import sys
+import subprocess
+
+
+def test_lazy_import():
+    """Test that modules are imported at first use."""
+    from sattools.lazy import lazy_import, LazyModule
+    mod = lazy_import("json")
+    assert mod is sys.modules["json"]
+    sys.modules.pop("xml.dom.minidom", None)
+    mod = lazy_import("xml.dom.minidom")
+    assert isinstance(mod, LazyModule)
+    assert mod.__name__ == "xml"
+    assert "xml.dom.minidom" not in sys.modules
+    assert mod.dom.minidom.parseString("<a/>").documentElement.tagName == "a"
+    assert "xml.dom.minidom" in sys.modules
+
+
+def test_cli_imports_lazily():
+    """Test that importing the command line tools avoids heavy imports."""
+    heavy = ("satpy", "pyresample", "pandas", "xarray", "typhon", "s3fs")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    for mod in ("sattools.processing.showsat", "sattools.processing.video"):
+        out = subprocess.run(
+                [sys.executable, "-c",
+                 f"import sys, {mod:s}; "
+                 f"print(*[m for m in {heavy!r} if m in sys.modules])"],
+                env=env, check=True, capture_output=True, text=True)
+        assert out.stdout.strip() == ""
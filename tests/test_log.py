@@ -1,6 +1,9 @@
 """Test functionality related to logging."""
+import os
 import datetime
 import logging
+import logging.handlers
+import concurrent.futures
 import unittest.mock
 import pytest
 
@@ -92,3 +95,128 @@ def test_raise_on_warn_context():
         with pytest.raises(sattools.log.WarningLoggedError,
                            match="the mantle is toxic"):
             logger.warning("the mantle is toxic")
+
+
+def test_raise_on_warn_context_local():
+    """Test that raising on warning is local to thread and task."""
+    import asyncio
+    import sattools.log
+    logger = logging.getLogger("vuodnabahta.lagoon")
+    with sattools.log.RaiseOnWarnContext(logger):
+        n_handlers = len(logger.handlers)
+    # handler remains installed but does nothing outside context
+    with sattools.log.RaiseOnWarnContext(logger):
+        assert len(logger.handlers) == n_handlers
+        # other threads are not affected
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            executor.submit(logger.warning, "no problem").result()
+        with pytest.raises(sattools.log.WarningLoggedError):
+            logger.warning("problem")
+    logger.warning("no problem")
+    assert len(logger.handlers) == n_handlers
+
+    # per thread
+    def warn_in_context():
+        with sattools.log.RaiseOnWarnContext(logger):
+            logger.warning("problem")
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        with pytest.raises(sattools.log.WarningLoggedError):
+            executor.submit(warn_in_context).result()
+    logger.warning("no problem")
+
+    # per asyncio task
+    async def warn(strict):
+        if strict:
+            with sattools.log.RaiseOnWarnContext(logger):
+                await asyncio.sleep(0.01)
+                logger.warning("problem")
+        else:
+            await asyncio.sleep(0)
+            logger.warning("no problem")
+
+    async def main():
+        return await asyncio.gather(
+                warn(True), warn(False), return_exceptions=True)
+    res = asyncio.run(main())
+    assert isinstance(res[0], sattools.log.WarningLoggedError)
+    assert res[1] is None
+
+
+def test_setup_handler_queue(tmp_path):
+    """Test setting up handlers writing from a listener thread."""
+    import sattools.log
+    listener = sattools.log.setup_main_handler(
+            ["pomelo"], filename=tmp_path / "test.log", queue=True)
+    logger = logging.getLogger("pomelo")
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+    logger.debug("sweet")
+    assert listener.running
+    listener.stop()
+    assert not listener.running
+    assert "sweet" in (tmp_path / "test.log").read_text()
+    listener.stop()  # again at exit
+    logger.removeHandler(logger.handlers[0])
+
+
+def _log_from_worker(i):
+    logging.getLogger("sattools.worker").debug(f"worker {i:d}")
+    return os.getpid()
+
+
+def test_log_context_queue(tmp_path):
+    """Test logging to file from worker processes through a queue."""
+    import sattools.log
+    with sattools.log.LogToTimeFile(tmp_path / "ah", queue=True) as c:
+        logging.getLogger("tofu").debug("tofu")
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=2,
+                initializer=sattools.log.setup_worker_handler,
+                initargs=(c.queue,)) as executor:
+            pids = set(executor.map(_log_from_worker, range(4)))
+    assert os.getpid() not in pids
+    text = (tmp_path / "ah").read_text()
+    assert "tofu" in text
+    for i in range(4):
+        assert f"worker {i:d}" in text
+    assert "Closing logfile" in text
+    assert not any(isinstance(h, logging.handlers.QueueHandler)
+                   for h in logging.getLogger().handlers)
+
+
+def test_trace_context(tmp_path, caplog):
+    """Test tracing of stages."""
+    import json
+    import sattools.log
+    # without trace context, spans do nothing
+    with sattools.log.Span("banana") as sp:
+        sp.add(items=1)
+    with caplog.at_level(logging.INFO):
+        with sattools.log.TraceContext(tmp_path / "trace.json") as tc:
+            with sattools.log.Span("fruit.apple", items=2) as sp:
+                with sattools.log.Span("fruit.banana", bytes=100):
+                    pass
+                sp.add(items=3, bytes=10)
+            with sattools.log.Span("fruit.banana", bytes=50):
+                pass
+    assert "fruit.apple" in caplog.text
+    assert "banana" in tc.tracer.summary()
+    assert len(tc.tracer.spans) == 3
+    with (tmp_path / "trace.json").open("r") as fp:
+        js = json.load(fp)
+    events = js["traceEvents"]
+    assert [ev["name"] for ev in events] == [
+            "fruit.banana", "fruit.apple", "fruit.banana"]
+    assert all(ev["ph"] == "X" for ev in events)
+    assert events[0]["args"] == {"bytes": 100, "parent": "fruit.apple"}
+    assert events[1]["args"] == {"items": 5, "bytes": 10}
+    assert events[1]["dur"] >= events[0]["dur"]
+    assert events[1]["ts"] <= events[0]["ts"]
+    lines = tc.tracer.summary().split("\n")
+    ban = [li for li in lines if li.startswith("fruit.banana")][0]
+    assert ban.split()[1] == "2"
+    assert ban.split()[-2:] == ["150", "0"]
+    # no longer tracing
+    with sattools.log.Span("fruit.cherry"):
+        pass
+    assert len(tc.tracer.spans) == 3
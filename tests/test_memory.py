@@ -0,0 +1,159 @@
+"""Test memory measurement and memory budgets.
+
+The budget tests process synthetic inputs of increasing size and check
+that the peak memory traced by tracemalloc grows sublinearly with the
+number of scenes.  Each function is called once before measuring, such
+that imports and caches filled on the first call do not count.
+"""
+
+import unittest.mock
+
+import numpy
+import pandas
+import pytest
+
+start = pandas.Timestamp("1900-01-01T00:00")
+
+
+def _get_peaks(func, sizes, setup=None, retained=False):
+    """Get traced peak per size, after a warm-up call.
+
+    If ``setup`` is given, it prepares the input for each size outside of
+    the measurement.  If ``retained`` is true, subtract the memory still
+    allocated at the end, such as for the return value.
+    """
+    from sattools.memory import measure
+    setup = setup or (lambda n: n)
+    func(setup(min(sizes)))
+    peaks = {}
+    for n in sizes:
+        inp = setup(n)
+        (_, mm) = measure(func, inp)
+        peaks[n] = mm.traced_peak - (mm.traced_retained if retained else 0)
+        del inp
+    return peaks
+
+
+def test_get_rss():
+    """Test getting the resident set size."""
+    from sattools.memory import get_rss
+    rss = get_rss()
+    assert rss > 1_000_000
+    with unittest.mock.patch("builtins.open", side_effect=OSError):
+        assert get_rss() > 1_000_000
+
+
+def test_memory_monitor():
+    """Test measuring memory in a block."""
+    from sattools.memory import MemoryMonitor, measure
+    with MemoryMonitor(interval=0.001) as mm:
+        x = numpy.ones(10_000_000, dtype="u1")
+        x[:] = 2
+        del x
+        y = numpy.zeros(100, dtype="u1")
+    assert 10_000_000 <= mm.traced_peak < 11_000_000
+    assert mm.traced_retained < 1_000_000
+    assert mm.rss_peak >= 0
+    (res, mm) = measure(numpy.ones, 1_000_000, dtype="u1")
+    assert res.size == 1_000_000
+    assert mm.traced_retained >= 1_000_000
+    del y
+
+
+def test_memory_monitor_nested(monkeypatch):
+    """Test nested measurement, with and without tracemalloc.reset_peak."""
+    import tracemalloc
+    from sattools.memory import MemoryMonitor
+    for reset in (True, False):
+        if not reset:
+            monkeypatch.delattr(tracemalloc, "reset_peak")
+        with MemoryMonitor(interval=0.001):
+            x = numpy.ones(10_000_000, dtype="u1")
+            del x
+            with MemoryMonitor(interval=0.001) as mm:
+                y = numpy.ones(100_000, dtype="u1")
+                del y
+        assert 100_000 <= mm.traced_peak < 1_000_000
+
+
+def test_check_sublinear():
+    """Test checking sublinear growth."""
+    from sattools.memory import check_sublinear
+    check_sublinear({10: 1000, 100: 3000, 1000: 1000})
+    with pytest.raises(MemoryError, match="size 100"):
+        check_sublinear({10: 1000, 100: 4000})
+    check_sublinear({10: 1000, 100: 9000}, exponent=1)
+
+
+@pytest.mark.parametrize("n_small,n_large", [(10, 100)])
+def test_collapse_budget(n_small, n_large):
+    """Test memory collapsing scenes with ABI every five minutes."""
+    from sattools import synth, scutil
+    from sattools.memory import check_sublinear
+
+    def collapse(n):
+        for sc in scutil.collapse_abi_glm_scenes(
+                synth.make_abi_glm_scenes(n, shape=(100, 100))):
+            sc["flash_extent_density"].values
+
+    def make_ms(n):
+        import satpy
+        return satpy.MultiScene(list(synth.make_abi_glm_scenes(
+            n, shape=(100, 100))))
+
+    check_sublinear(_get_peaks(collapse, [n_small, n_large]))
+    # the multiscene keeps all scenes, but should use little beyond that
+    check_sublinear(_get_peaks(
+        scutil.collapse_abi_glm_multiscene, [n_small, n_large],
+        setup=make_ms, retained=True))
+
+
+@pytest.mark.parametrize("n_small,n_large", [(5, 40)])
+def test_integrated_scene_budget(tmp_path, monkeypatch, n_small, n_large):
+    """Test memory summing GLM files."""
+    import xarray
+    from sattools import synth, glm
+    from sattools.memory import check_sublinear
+    monkeypatch.setenv("NAS_DATA", str(tmp_path / "nas"))
+    files = synth.make_glm_archive(
+            start, start + pandas.Timedelta(minutes=n_large),
+            shape=(200, 200))
+
+    def integrate(n):
+        return glm.get_integrated_scene(files[:n])
+
+    sc = integrate(n_small)
+    expected = 0
+    for f in files[:n_small]:
+        with xarray.open_dataset(f) as ds:
+            assert ds.sizes["x"] == 200
+            expected = expected + ds["flash_extent_density"].values
+    numpy.testing.assert_allclose(sc["flash_extent_density"], expected)
+    check_sublinear(_get_peaks(integrate, [n_small, n_large]))
+
+
+@pytest.mark.parametrize("n_small,n_large", [(10, 40)])
+def test_show_video_segments_budget(tmp_path, n_small, n_large):
+    """Test memory showing a segmented video."""
+    import satpy
+    from sattools import synth, vis
+    from sattools.memory import check_sublinear
+
+    def fake_multiscenes(start_date, end_date, **kwargs):
+        n = int((end_date - start_date) / pandas.Timedelta("1min"))
+        yield satpy.MultiScene(list(synth.make_abi_glm_scenes(
+            n, shape=(100, 100), abi_every=1, start=start_date)))
+
+    def show(n):
+        out = tmp_path / f"out{n:d}"
+        out.mkdir(exist_ok=True)
+        return vis.show_video_abi_glm_times(
+                start, start + pandas.Timedelta(minutes=n), out,
+                enh_args={"enhance": False}, segment_duration="5min")
+
+    with unittest.mock.patch("sattools.scutil.get_abi_glm_multiscenes",
+                             new=fake_multiscenes):
+        peaks = _get_peaks(show, [n_small, n_large])
+        written = show(n_small)
+    assert len(written) == 2
+    check_sublinear(peaks)
@@ -0,0 +1,110 @@
+"""Test prefetching into the block cache."""
+
+import os
+import unittest.mock
+
+import pytest
+
+fn = "OR_ABI-L1b-RadC-M6C14_G16_s20200010000000_e20200010002000_c1.nc"
+
+
+@pytest.fixture
+def fs_block(tmp_path):
+    """Get a caching filesystem wrapping the local filesystem."""
+    from fsspec.implementations.local import LocalFileSystem
+    from fsspec.implementations.cached import CachingFileSystem
+    return CachingFileSystem(fs=LocalFileSystem(),
+                             cache_storage=str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def src(tmp_path):
+    """Write a file with 100 kB of random bytes."""
+    p = tmp_path / fn
+    p.write_bytes(os.urandom(100_000))
+    return os.fspath(p)
+
+
+def test_missing_runs():
+    """Test getting runs of missing blocks."""
+    from sattools.prefetch import _get_missing_runs, _blocks_to_ranges
+    assert _blocks_to_ranges({0, 1, 2, 5, 9}, 10, 95) == [
+            (0, 30), (50, 60), (90, 95)]
+    assert _get_missing_runs([(5, 25), (52, 53), (90, 200)], {1}, 10, 95,
+                             100) == [(0, 10), (20, 30), (50, 60), (90, 95)]
+    assert _get_missing_runs([(0, 95)], {4}, 10, 95, 20) == [
+            (0, 20), (20, 40), (50, 70), (70, 90), (90, 95)]
+    assert _get_missing_runs([(10, 10)], set(), 10, 95, 20) == []
+
+
+def test_prefetch(fs_block, src):
+    """Test prefetching byte ranges."""
+    from sattools.prefetch import prefetch, get_read_trace
+    with open(src, "rb") as fp:
+        content = fp.read()
+    assert get_read_trace(fs_block, src) == []
+    n = prefetch(fs_block, src, [(0, 10), (50_000, 70_000)],
+                 max_request=8192)
+    bs = 8192  # local filesystem default
+    assert n == bs + (70_000 // bs + 1 - 50_000 // bs) * bs
+    trace = get_read_trace(fs_block, src)
+    assert trace == [(0, bs), (6 * bs, 9 * bs)]
+    # second time, nothing is fetched
+    assert prefetch(fs_block, src, [(0, 10), (50_000, 70_000)]) == 0
+    # reading cached blocks does not touch the source
+    with unittest.mock.patch.object(
+            fs_block.fs, "cat_file", side_effect=AssertionError), \
+            unittest.mock.patch.object(
+                    fs_block.fs, "cat_ranges", side_effect=AssertionError), \
+            fs_block.open(src, "rb") as f:
+        f.seek(55_000)
+        assert f.read(1000) == content[55_000:56_000]
+    # until the end of the file
+    assert prefetch(fs_block, src, [(90_000, 200_000)]) == 100_000 - 10 * bs
+    with fs_block.open(src, "rb") as f:
+        f.seek(99_990)
+        assert f.read() == content[99_990:]
+
+
+def test_prefetch_fsfiles(fs_block, src, tmp_path, caplog):
+    """Test prefetching FSFiles from a read trace."""
+    import satpy.readers
+    from sattools.prefetch import (
+            prefetch_fsfiles, save_read_trace, load_read_trace, prefetch)
+    fsf = satpy.readers.FSFile(src, fs=fs_block)
+    prefetch(fs_block, src, [(0, 100)])
+    save_read_trace([fsf], tmp_path / "trace.json")
+    trace = load_read_trace(tmp_path / "trace.json")
+    assert trace == {"OR_ABI-L1b-RadC-M6C14_G16": [[0, 8192]]}
+    trace["OR_ABI-L1b-RadC-M6C14_G16"].append([8192, 20_000])
+    assert prefetch_fsfiles([fsf], trace=trace) == 2 * 8192
+    other = src.replace("C14", "C08")
+    os.rename(src, other)
+    fsf = satpy.readers.FSFile(other, fs=fs_block)
+    with unittest.mock.patch("sattools.prefetch.get_chunk_ranges",
+                             side_effect=ImportError):
+        assert prefetch_fsfiles([fsf], trace=tmp_path / "trace.json") == 0
+    assert "no h5py" in caplog.text
+    with unittest.mock.patch("sattools.prefetch.get_chunk_ranges",
+                             return_value=[(0, 100)]) as sgcr:
+        assert prefetch_fsfiles([fsf]) == 8192
+    assert sgcr.call_args[0][1] == ("Rad", "DQF")
+
+
+def test_get_chunk_ranges(tmp_path):
+    """Test getting byte ranges from the chunk index."""
+    h5py = pytest.importorskip("h5py")
+    import numpy
+    from sattools.prefetch import get_chunk_ranges
+    p = tmp_path / "test.nc"
+    with h5py.File(p, "w") as h5:
+        h5.create_dataset("Rad", data=numpy.arange(100*100).reshape(100, 100),
+                          chunks=(50, 50))
+        h5.create_dataset("DQF", data=numpy.zeros((10, 10), dtype="u1"))
+    ranges = get_chunk_ranges(p)
+    assert len(ranges) == 5
+    with open(p, "rb") as fp:
+        content = fp.read()
+    (s, e) = ranges[0]
+    assert numpy.frombuffer(content[s:e], dtype="i8")[:3].tolist() == [0, 1, 2]
+    assert get_chunk_ranges(p, ["foo"]) == []
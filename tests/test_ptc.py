@@ -1,5 +1,7 @@
 """Tests related to pytroll interaction."""
 
+import pytest
+
 fake_areas = [
         """
 new-england-2000:
@@ -40,6 +42,129 @@ def test_get_areas(caplog, tmp_path):
 
     with satpy.config.set(config_path=[tmp_path / "a", tmp_path / "b"]):
         D = sattools.ptc.get_all_areas()
+        assert sattools.ptc.get_all_areas() is D
     assert "new-england-2000" in D  # first
     assert "new-england-3000" in D  # second
     assert "germ" in D  # builtin
+    assert sattools.ptc.get_all_areas() is not D  # other config path
+    # changed area file gives new catalogue
+    with (tmp_path / "b" / "areas.yaml").open(mode="at") as fp:
+        fp.write("\n")
+    with satpy.config.set(config_path=[tmp_path / "a", tmp_path / "b"]):
+        assert sattools.ptc.get_all_areas() is not D
+
+
+def test_area_catalogue(tmp_path):
+    """Test area catalogue with cached index."""
+    import os
+    import unittest.mock
+    import pyresample
+    import sattools.ptc
+    fn = tmp_path / "areas.yaml"
+    fn.write_text(fake_areas[0])
+    cat = sattools.ptc.AreaCatalogue([fn], cache_dir=tmp_path / "cache")
+    with unittest.mock.patch("pyresample.area_config.load_area_from_string",
+                             wraps=pyresample.area_config.
+                             load_area_from_string) as pal:
+        assert "new-england-2000" in cat
+        assert list(cat) == ["new-england-2000"]
+        pal.assert_not_called()
+        ar = cat["new-england-2000"]
+        assert ar.width == 897
+        assert cat["new-england-2000"] is ar
+        pal.assert_called_once()
+    assert (tmp_path / "cache" / "area-catalogue.json").exists()
+
+    # second catalogue uses cached index without parsing the file
+    cat = sattools.ptc.AreaCatalogue([fn], cache_dir=tmp_path / "cache")
+    with unittest.mock.patch("sattools.ptc._read_area_file") as sr:
+        assert len(cat) == 1
+        assert cat["new-england-2000"].height == 585
+        sr.assert_not_called()
+
+    # changed file is parsed again
+    fn.write_text(fake_areas[0] + "\n" + fake_areas[1])
+    st = fn.stat()
+    os.utime(fn, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    cat = sattools.ptc.AreaCatalogue([fn], cache_dir=tmp_path / "cache")
+    assert set(cat) == {"new-england-2000", "new-england-3000"}
+    assert cat["new-england-3000"].width == 598
+    with pytest.raises(KeyError):
+        cat["new-england-4000"]
+
+
+def test_area_index():
+    """Test spatial index against brute force."""
+    import numpy
+    import sattools.ptc
+    rng = numpy.random.default_rng(42)
+    lon0 = rng.uniform(-180, 180, 500)
+    lat0 = rng.uniform(-90, 80, 500)
+    boxes = numpy.stack(
+            [lon0, lat0, (lon0 + rng.uniform(0, 30, 500) + 180) % 360 - 180,
+             numpy.minimum(lat0 + rng.uniform(0, 30, 500), 90)], axis=1)
+    tree = sattools.ptc.AreaIndex(boxes, node_size=4)
+    assert len(tree.levels) > 2
+    wraps = boxes[:, 0] > boxes[:, 2]
+    for q in [(0, 0, 10, 10), (-10, 50, -10, 50), (170, -20, -170, 20)]:
+        if q[0] <= q[2]:
+            lon_ok = numpy.where(
+                    wraps,
+                    (boxes[:, 0] <= q[2]) | (boxes[:, 2] >= q[0]),
+                    (boxes[:, 0] <= q[2]) & (boxes[:, 2] >= q[0]))
+        else:
+            lon_ok = wraps | (boxes[:, 2] >= q[0]) | (boxes[:, 0] <= q[2])
+        lat_ok = (boxes[:, 1] <= q[3]) & (boxes[:, 3] >= q[1])
+        numpy.testing.assert_array_equal(
+                tree.query(q), numpy.nonzero(lon_ok & lat_ok)[0])
+
+
+def test_area_catalogue_spatial(tmp_path):
+    """Test finding areas in catalogue by location."""
+    import unittest.mock
+    import pyresample
+    import sattools.ptc
+    fn = tmp_path / "areas.yaml"
+    fn.write_text(fake_areas[0] + "\n" + fake_areas[1] + """
+pacific:
+  description: Pacific around the antimeridian
+  projection:
+    proj: eqc
+    lon_0: 180
+    ellps: WGS84
+  shape:
+    width: 100
+    height: 100
+  area_extent:
+    lower_left_xy: [-1000000, -1000000]
+    upper_right_xy: [1000000, 1000000]
+dynamic:
+  description: Dynamic area
+  projection:
+    proj: omerc
+    ellps: WGS84
+  resolution: 1000
+""")
+    cat = sattools.ptc.AreaCatalogue([fn], cache_dir=tmp_path / "cache")
+    assert cat.covering_point(-75, 42) == [
+            "new-england-2000", "new-england-3000"]
+    assert cat.covering_point(-75, 42, rank=False) == [
+            "new-england-2000", "new-england-3000"]
+    assert cat.covering_point(10, 52) == []
+    assert cat.covering_point(179, 1) == ["pacific"]
+    assert cat.covering_point(-179, -1) == ["pacific"]
+    assert cat.intersecting_box((170, -50, -100, 50)) == ["pacific"]
+    assert cat.intersecting_box((-100, 30, -70, 40)) == [
+            "new-england-2000", "new-england-3000"]
+    assert cat.intersecting_area(cat["pacific"]) == ["pacific"]
+    ar = pyresample.create_area_def(
+            "box", 4326, resolution=0.1,
+            area_extent=[-74, 40, -72, 43], units="degrees")
+    assert cat.intersecting_area(ar) == [
+            "new-england-2000", "new-england-3000"]
+    # extents are cached, no need to create areas again
+    cat = sattools.ptc.AreaCatalogue([fn], cache_dir=tmp_path / "cache")
+    with unittest.mock.patch(
+            "pyresample.area_config.load_area_from_string") as pal:
+        assert cat.covering_point(-179, -1) == ["pacific"]
+        pal.assert_not_called()
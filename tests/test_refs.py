@@ -0,0 +1,139 @@
+"""Test reference indexes."""
+
+import os
+import json
+import unittest.mock
+
+import numpy
+import pytest
+
+path = ("noaa-goes16/ABI-L1b-RadC/2020/001/00/"
+        "OR_ABI-L1b-RadC-M6C14_G16_s20200010001000_e1_c1.nc")
+
+
+@pytest.fixture
+def refs(tmp_path):
+    """Make references as kerchunk would, to chunks in one local file.
+
+    Writes a Zarr store, then concatenates its chunks into one file and
+    refers to them by offset, with the metadata inline.
+    """
+    import xarray
+    ds = xarray.Dataset(
+            {"Rad": (("y", "x"), numpy.arange(100, dtype="f4").reshape(
+                10, 10), {"units": "W m-2"})},
+            coords={"x": numpy.arange(10.0), "y": numpy.arange(10.0)})
+    ds["Rad"].encoding["chunks"] = (5, 5)
+    ds.to_zarr(tmp_path / "s.zarr", zarr_format=2, consolidated=False)
+    blob = tmp_path / "blob.nc"
+    out = {}
+    offset = 0
+    with blob.open("wb") as fp:
+        for (root, _, files) in os.walk(tmp_path / "s.zarr"):
+            for f in sorted(files):
+                key = os.path.relpath(os.path.join(root, f),
+                                      tmp_path / "s.zarr")
+                with open(os.path.join(root, f), "rb") as fp_in:
+                    content = fp_in.read()
+                if f.startswith(".z"):
+                    out[key] = content.decode("utf-8")
+                else:
+                    fp.write(content)
+                    out[key] = [os.fspath(blob), offset, len(content)]
+                    offset += len(content)
+    return {"version": 1, "refs": out}
+
+
+def test_get_reference_path(tmp_path):
+    """Test path to reference index."""
+    from sattools.refs import get_reference_path
+    p = get_reference_path(path, tmp_path)
+    assert p == tmp_path / (path + ".json")
+    assert get_reference_path("s3://" + path, tmp_path) == p
+    assert get_reference_path("/" + path, tmp_path) == p
+    assert get_reference_path(path).name.endswith(".nc.json")
+
+
+def test_get_references(tmp_path, refs):
+    """Test getting, building, and storing references."""
+    from sattools.refs import get_references, build_references
+    with unittest.mock.patch("sattools.refs.make_references",
+                             return_value=refs) as srm:
+        assert get_references(path, "fs", tmp_path) == refs
+        srm.assert_called_once_with(path, "fs")
+        assert get_references(path, "fs", tmp_path) == refs
+        srm.assert_called_once()
+        other = path.replace("C14", "C08")
+        written = build_references([path, other], "fs", tmp_path)
+        assert srm.call_count == 2
+    assert [p.name for p in written] == [os.path.basename(p) + ".json"
+                                         for p in (path, other)]
+    with written[1].open("r") as fp:
+        assert json.load(fp) == refs
+    assert os.listdir(written[0].parent) == sorted(
+            p.name for p in written)
+
+
+def test_open_dataset(tmp_path, refs):
+    """Test opening a file through its references."""
+    from fsspec.implementations.local import LocalFileSystem
+    from fsspec.implementations.cached import CachingFileSystem
+    from sattools.refs import open_dataset
+    fs = CachingFileSystem(fs=LocalFileSystem(),
+                           cache_storage=os.fspath(tmp_path / "cache"))
+    with unittest.mock.patch("sattools.refs.make_references",
+                             return_value=refs) as srm:
+        ds = open_dataset(path, fs=fs, index_dir=tmp_path)
+        assert ds["Rad"].attrs["units"] == "W m-2"
+        numpy.testing.assert_array_equal(
+                ds["Rad"][9, :].values, numpy.arange(90, 100))
+        open_dataset(path, fs=fs, index_dir=tmp_path)
+    srm.assert_called_once()
+
+
+def test_open_dataset_zarr2(tmp_path, refs):
+    """Test that zarr_format is passed only to zarr 3 and later."""
+    from fsspec.implementations.local import LocalFileSystem
+    from sattools.refs import open_dataset
+    with unittest.mock.patch("sattools.refs.make_references",
+                             return_value=refs), \
+            unittest.mock.patch("sattools.refs.xarray") as srx, \
+            unittest.mock.patch("sattools.refs.zarr") as srz:
+        srz.__version__ = "2.18.3"
+        open_dataset(path, fs=LocalFileSystem(), index_dir=tmp_path)
+        assert "zarr_format" not in srx.open_dataset.call_args[1]
+        srz.__version__ = "3.0.0"
+        open_dataset(path, fs=LocalFileSystem(), index_dir=tmp_path)
+        assert srx.open_dataset.call_args[1]["zarr_format"] == 2
+
+
+def test_make_references(tmp_path):
+    """Test making references with kerchunk."""
+    pytest.importorskip("kerchunk")
+    import xarray
+    from fsspec.implementations.local import LocalFileSystem
+    from sattools.refs import make_references, open_dataset
+    p = tmp_path / "test.nc"
+    xarray.Dataset({"Rad": (("y", "x"), numpy.ones((10, 10)))}).to_netcdf(
+            p, engine="h5netcdf")
+    fs = LocalFileSystem()
+    assert "Rad/.zarray" in make_references(os.fspath(p), fs)["refs"]
+    ds = open_dataset(os.fspath(p), fs=fs, index_dir=tmp_path / "idx")
+    numpy.testing.assert_array_equal(ds["Rad"].values, 1)
+
+
+def test_open_dataset_from_index(tmp_path, refs):
+    """Test opening through an index written before, without kerchunk."""
+    from fsspec.implementations.local import LocalFileSystem
+    from sattools.refs import open_dataset, get_reference_path
+    ref_path = get_reference_path(path, tmp_path / "idx")
+    ref_path.parent.mkdir(parents=True)
+    with ref_path.open("w") as fp:
+        json.dump(refs, fp)
+    with unittest.mock.patch("sattools.refs.make_references",
+                             side_effect=AssertionError):
+        ds = open_dataset(path, fs=LocalFileSystem(),
+                          index_dir=tmp_path / "idx")
+    numpy.testing.assert_array_equal(
+            ds["Rad"][:5, 5:].values,
+            numpy.arange(100).reshape(10, 10)[:5, 5:])
@@ -0,0 +1,53 @@
+"""Test shared S3 filesystems."""
+
+import unittest.mock
+
+import pytest
+
+
+@pytest.fixture
+def config():
+    """Restore S3 settings after the test."""
+    from sattools import s3
+    orig = s3.config.copy()
+    yield s3.config
+    s3.configure(**orig)
+
+
+@unittest.mock.patch("s3fs.S3FileSystem")
+def test_get_filesystem(sS, config):
+    """Test that the S3 filesystem is shared and configurable."""
+    from sattools import s3
+    fs = s3.get_filesystem()
+    assert fs is s3.get_filesystem()
+    sS.assert_called_once()
+    assert sS.call_args[1]["anon"]
+    assert sS.call_args[1]["config_kwargs"]["max_pool_connections"] == 32
+    s3.configure(endpoint_url="http://localhost:5000", read_timeout=5)
+    s3.get_filesystem()
+    assert sS.call_count == 2
+    assert sS.call_args[1]["client_kwargs"]["endpoint_url"] == \
+        "http://localhost:5000"
+    assert sS.call_args[1]["config_kwargs"]["read_timeout"] == 5
+    with pytest.raises(KeyError):
+        s3.configure(pool_size=3)
+
+
+@unittest.mock.patch("s3fs.S3FileSystem")
+def test_get_caching_filesystem(sS, tmp_path):
+    """Test one caching filesystem per cache directory."""
+    from fsspec.implementations.local import LocalFileSystem
+    from fsspec.implementations.cached import (
+            CachingFileSystem, WholeFileCacheFileSystem)
+    from sattools import s3
+    sS.side_effect = LocalFileSystem
+    fs = s3.get_caching_filesystem(tmp_path / "a", cache_check=600)
+    assert isinstance(fs, CachingFileSystem)
+    assert fs is s3.get_caching_filesystem(tmp_path / "a")
+    assert fs is not s3.get_caching_filesystem(tmp_path / "b")
+    wfs = s3.get_caching_filesystem(tmp_path / "a", whole_file=True)
+    assert isinstance(wfs, WholeFileCacheFileSystem)
+    sS.assert_called_once()
+    s3.clear()
+    assert fs is not s3.get_caching_filesystem(tmp_path / "a")
+    assert sS.call_count == 2
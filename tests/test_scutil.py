@@ -117,6 +117,7 @@ def test_get_multiscenes(tmp_path):
         assert "C08" in mss[0].first_scene
         assert "C10" in mss[0].first_scene
         assert "flash_extent_density" in mss[0].first_scene
+        assert mss[0].first_scene.attrs["filenames"]
 
         assert list(get_abi_glm_multiscenes(
                 datetime.datetime(1900, 1, 1, 0, 0),
@@ -153,7 +154,8 @@ def test_collapse_multiscene():
         [satpy.tests.utils.make_fake_scene(
             cont_full if i % 3 == 0 else cont_part)
             for i in range(6)])
-    for sc in in_.scenes:
+    for (i, sc) in enumerate(in_.scenes):
+        sc.attrs["filenames"] = [f"file{i:d}"]
         sc["flash_extent_density"].attrs["sensor"] = "glm"
         if "strawberry" in sc:
             sc["strawberry"].attrs["sensor"] = "abi"
@@ -166,11 +168,35 @@ def test_collapse_multiscene():
     # cannot directly compare multiscene or scene, see
     # https://github.com/pytroll/satpy/issues/1583
     assert len(out.scenes) == len(ref.scenes)
+    assert out.scenes[1].attrs["filenames"] == ["file1", "file2", "file3"]
     for (outscene, refscene) in zip(out.scenes, ref.scenes):
         assert (outscene.to_xarray_dataset() ==
                 refscene.to_xarray_dataset()).all()
 
 
+def test_collapse_scenes_nan():
+    """Test that collapsing skips missing GLM values like mean does."""
+    import xarray
+    from sattools.scutil import collapse_abi_glm_scenes
+    fed = [numpy.array([[1, numpy.nan, numpy.nan]]),
+           numpy.array([[3, 5, numpy.nan]])]
+    in_ = [satpy.tests.utils.make_fake_scene(
+            {"flash_extent_density": f, "strawberry": numpy.ones((1, 3))}
+            if i == 1 else {"flash_extent_density": f})
+           for (i, f) in enumerate(fed)]
+    for sc in in_:
+        sc["flash_extent_density"].attrs["sensor"] = "glm"
+        if "strawberry" in sc:
+            sc["strawberry"].attrs["sensor"] = "abi"
+    (out,) = collapse_abi_glm_scenes(in_)
+    ref = xarray.concat([sc["flash_extent_density"] for sc in in_],
+                        "dummy").mean("dummy")
+    numpy.testing.assert_array_equal(out["flash_extent_density"], ref)
+    numpy.testing.assert_array_equal(out["flash_extent_density"],
+                                     [[2, 5, numpy.nan]])
+    assert out["flash_extent_density"].attrs["sensor"] == "glm"
+
+
 def test_get_collapsed_multiscene_from_groups(tmp_path):
     """Test getting a collapsed multiscene from groups."""
     from sattools.scutil import get_collapsed_multiscene_from_groups
@@ -207,3 +233,63 @@ def test_get_collapsed_multiscene_from_groups(tmp_path):
         numpy.testing.assert_array_almost_equal(
                 sc["C14"].data,
                 numpy.full((10, 10), 142.031245))
+
+
+def test_get_quicklook_scene(fakescene, fake_multiscene3):
+    """Test getting a reduced resolution scene."""
+    from sattools.scutil import get_quicklook_scene, get_quicklook_multiscene
+    sc = get_quicklook_scene(fakescene, 5)
+    assert sc["raspberry"].shape == (1, 1)
+    assert sc["raspberry"].attrs["area"].shape == (1, 1)
+    numpy.testing.assert_array_equal(sc["raspberry"], [[12]])
+    sc = get_quicklook_scene(fakescene, 5, method="stride")
+    numpy.testing.assert_array_equal(sc["raspberry"], [[0]])
+    ms = get_quicklook_multiscene(fake_multiscene3, 5)
+    assert len(ms.scenes) == 3
+    assert ms.first_scene["C14"].shape == (1, 1)
+
+
+def test_scene_cache(tmp_path):
+    """Test cache of readers of recently created scenes."""
+    import pandas
+    from sattools import synth
+    from sattools.scutil import SceneCache
+    files = []
+    for i in range(4):
+        p = tmp_path / (f"OR_ABI-L1b-RadC-M6C14_G16_s1900001000{i:d}000_"
+                        "e19000010005000_c19000010005000.nc")
+        synth.write_abi_l1b(
+                p, pandas.Timestamp("1900-01-01T00:00"),
+                pandas.Timestamp("1900-01-01T00:05"), 14, synth.make_area(),
+                seed=i)
+        files.append(p)
+    cache = SceneCache(max_size=2)
+    sc1 = cache.get_scene(files[:1], reader="abi_l1b")
+    sc1.load(["C14"])
+    sc2 = cache.get_scene(files[:1], reader="abi_l1b")
+    assert "C14" not in sc2
+    sc2.load(["C14"])
+    numpy.testing.assert_array_equal(sc1["C14"], sc2["C14"])
+    assert sc2._readers is sc1._readers
+    assert len(cache) == 1
+    cache.get_scene(files[1:2], reader="abi_l1b")
+    cache.get_scene(files[2:3], reader="abi_l1b")
+    assert len(cache) == 2
+    sc3 = cache.get_scene(files[:1], reader="abi_l1b")
+    assert sc3._readers is not sc1._readers
+    sc3.load(["C14"])
+    numpy.testing.assert_array_equal(sc1["C14"], sc3["C14"])
+
+
+def test_get_scene_filenames(tmp_path):
+    """Test getting the files a scene reads from."""
+    import pandas
+    from sattools import synth
+    from sattools.scutil import _get_scene_filenames
+    p = tmp_path / ("OR_ABI-L1b-RadC-M6C14_G16_s19000010000000_"
+                    "e19000010005000_c19000010005000.nc")
+    synth.write_abi_l1b(
+            p, pandas.Timestamp("1900-01-01T00:00"),
+            pandas.Timestamp("1900-01-01T00:05"), 14, synth.make_area())
+    sc = satpy.Scene(filenames=[str(p)], reader="abi_l1b")
+    assert _get_scene_filenames(sc) == [str(p)]
@@ -0,0 +1,119 @@
+"""Test the job server."""
+
+import time
+import pathlib
+import threading
+import unittest.mock
+
+import pytest
+
+
+@pytest.fixture
+def job_server(tmp_path):
+    """Run a job server in a thread."""
+    from sattools import server
+    sock = tmp_path / "s.sock"
+    thread = threading.Thread(
+            target=server.serve,
+            kwargs={"socket_path": sock, "cache_dir": tmp_path / "cache"})
+    thread.start()
+    for _ in range(500):
+        if sock.exists():
+            break
+        time.sleep(0.01)
+    yield sock
+    thread.join(timeout=0.1)
+    if thread.is_alive():
+        try:
+            server.submit("shutdown", socket_path=sock)
+        except OSError:  # already shutting down
+            pass
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert not sock.exists()
+
+
+@unittest.mock.patch("sattools.vis.show", autospec=True)
+def test_server(svs, job_server, tmp_path):
+    """Test submitting jobs to the server."""
+    from sattools import server
+    reply = server.submit("ping", socket_path=job_server)
+    assert reply["status"] == "ok"
+    assert reply["result"]["jobs"] == 1
+    svs.return_value = {tmp_path / "out.tif"}
+    reply = server.submit("show", socket_path=job_server, files=["a.nc"],
+                          outdir=str(tmp_path), areas=["germ"])
+    assert reply["status"] == "ok"
+    assert reply["result"] == [str(tmp_path / "out.tif")]
+    kwargs = svs.call_args[1]
+    assert kwargs["regions"][0].area_id == "germ"
+    assert kwargs["scene_cache"] is not None
+    assert kwargs["resample_cache_dir"] == tmp_path / "cache" / "resample"
+    svs.side_effect = OSError("disk full")
+    reply = server.submit("show", socket_path=job_server, files=["a.nc"],
+                          outdir=str(tmp_path))
+    assert reply["status"] == "failed"
+    assert "disk full" in reply["error"]
+    reply = server.submit("banana", socket_path=job_server)
+    assert reply["status"] == "failed"
+    assert reply["error"] == "ValueError: Unknown job type: banana"
+    with pytest.raises(FileExistsError):
+        server.serve(socket_path=job_server)
+    reply = server.submit("shutdown", socket_path=job_server)
+    assert reply["result"] == "shutting down"
+
+
+@unittest.mock.patch("sattools.vis.show_video_abi_glm_times", autospec=True)
+def test_server_video(svs, job_server, tmp_path):
+    """Test submitting a video job to the server."""
+    import pandas
+    from sattools import server
+    svs.return_value = [tmp_path / "C14.m3u8"]
+    reply = server.submit(
+            "video", socket_path=job_server,
+            start_date="1900-01-01T00:00", end_date="1900-01-01T01:00",
+            out_dir=str(tmp_path), area="germ", segment_duration=None)
+    assert reply["status"] == "ok"
+    assert reply["result"] == [str(tmp_path / "C14.m3u8")]
+    kwargs = svs.call_args[1]
+    assert kwargs["start_date"] == pandas.Timestamp("1900-01-01T00:00")
+    assert kwargs["out_dir"] == pathlib.Path(tmp_path)
+    assert kwargs["area"].area_id == "germ"
+
+
+@unittest.mock.patch("sattools.vis.show_video_abi_glm", autospec=True)
+def test_server_video_files(svs, job_server, tmp_path):
+    """Test submitting a video job for files to the server."""
+    from sattools import server
+    reply = server.submit(
+            "video_files", socket_path=job_server, files=["a.nc", "b.nc"],
+            out_dir=str(tmp_path))
+    assert reply["status"] == "ok"
+    kwargs = svs.call_args[1]
+    assert kwargs["files"] == ["a.nc", "b.nc"]
+    assert kwargs["out_dir"] == pathlib.Path(tmp_path)
+
+
+@unittest.mock.patch("argparse.ArgumentParser", autospec=True)
+def test_get_parser(ap):
+    """Test argument parsers."""
+    from sattools.processing.server import (
+            parse_cmdline, get_parser_serve, get_parser_submit)
+    parse_cmdline(get_parser_serve)
+    assert ap.return_value.add_argument.call_count == 4
+    ap.reset_mock()
+    parse_cmdline(get_parser_submit)
+    assert ap.return_value.add_argument.call_count == 4
+
+
+def test_submit_cli(job_server, capsys):
+    """Test submitting jobs from the command line."""
+    from sattools.processing import server
+    with unittest.mock.patch("sys.argv", ["show-sat-submit", "ping",
+                                          "--socket", str(job_server)]):
+        server.submit()
+    assert '"status": "ok"' in capsys.readouterr().out
+    with unittest.mock.patch("sys.argv", ["show-sat-submit", "show", "{}",
+                                          "--socket", str(job_server)]):
+        with pytest.raises(SystemExit):
+            server.submit()
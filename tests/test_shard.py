@@ -0,0 +1,184 @@
+"""Test sharded processing."""
+
+import json
+import unittest.mock
+import multiprocessing
+import concurrent.futures
+
+import numpy
+import pytest
+
+
+def fake_video(start_date, end_date, out_dir, segment_duration, checkpoint,
+               sector, fail=False, size=16):
+    """Write a small video segment and checkpoint, like a real shard."""
+    import imageio
+    if fail:
+        raise OSError("disk full")
+    segments = []
+    for name in ("C14", "flash_extent_density"):
+        fn = out_dir / f"{name:s}-{start_date:%H%M}.mp4"
+        with imageio.get_writer(fn, fps=10) as writer:
+            for _ in range(3):
+                writer.append_data(numpy.zeros((size, size, 3), "u1"))
+        segments.append([name, str(fn), 3])
+    with open(checkpoint, "w", encoding="utf-8") as fp:
+        json.dump({"segments": {start_date.isoformat(): segments}}, fp)
+    return [s[1] for s in segments]
+
+
+def test_plan_shards(tmp_path):
+    """Test planning shards."""
+    from sattools.shard import plan_shards
+    specs = plan_shards("1900-01-01T00:00", "1900-01-01T02:30", "1h",
+                        out_dir=tmp_path, area="germ")
+    assert len(specs) == 3
+    assert [s["shard"] for s in specs] == [
+            "shard-00000", "shard-00001", "shard-00002"]
+    assert specs[0]["func"] == "sattools.vis.show_video_abi_glm_times"
+    assert specs[2]["start_date"] == "1900-01-01T02:00:00"
+    assert specs[2]["end_date"] == "1900-01-01T02:30:00"
+    assert specs[1]["kwargs"]["out_dir"] == str(tmp_path / "shard-00001")
+    assert specs[1]["kwargs"]["checkpoint"] == str(
+            tmp_path / "shard-00001" / "checkpoint.json")
+    assert specs[1]["kwargs"]["area"] == "germ"
+    assert specs[1]["kwargs"]["sector"] == "F"
+    json.dumps(specs)
+    with unittest.mock.patch("sattools.shard.find_meso_moves",
+                             autospec=True) as sf:
+        import pandas
+        sf.return_value = [
+                (pandas.Timestamp("1900-01-01T00:00"),
+                 pandas.Timestamp("1900-01-01T00:40")),
+                (pandas.Timestamp("1900-01-01T00:40"),
+                 pandas.Timestamp("1900-01-01T02:30"))]
+        specs = plan_shards("1900-01-01T00:00", "1900-01-01T02:30", "1h",
+                            sector="M1", out_dir=tmp_path, area="germ")
+        with pytest.raises(ValueError, match="needs an area"):
+            plan_shards("1900-01-01T00:00", "1900-01-01T02:30", "1h",
+                        sector="M1", out_dir=tmp_path)
+    assert [(s["start_date"][11:16], s["end_date"][11:16])
+            for s in specs] == [
+                    ("00:00", "00:40"), ("00:40", "01:40"),
+                    ("01:40", "02:30")]
+
+
+def test_find_meso_moves(tmp_path):
+    """Test finding when the MESO sector moves."""
+    import pandas
+    from sattools.shard import find_meso_moves
+
+    def fake_scene(start):
+        sc = unittest.mock.MagicMock()
+        sc["C14"].attrs = {
+                "start_time": pandas.Timestamp(start),
+                "end_time": pandas.Timestamp(start) + pandas.Timedelta("1min")}
+        return sc
+    splits = [unittest.mock.MagicMock(), unittest.mock.MagicMock()]
+    splits[0].scenes = [fake_scene("1900-01-01T00:00"),
+                        fake_scene("1900-01-01T00:09")]
+    splits[1].scenes = [fake_scene("1900-01-01T00:10"),
+                        fake_scene("1900-01-01T00:29")]
+    with unittest.mock.patch("sattools.abi.get_fsfiles", autospec=True), \
+            unittest.mock.patch("satpy.MultiScene", autospec=True), \
+            unittest.mock.patch("sattools.abi.split_meso",
+                                autospec=True) as sas:
+        sas.return_value = iter(splits)
+        periods = find_meso_moves("1900-01-01T00:00", "1900-01-01T00:30",
+                                  "M1")
+    assert periods == [
+            (pandas.Timestamp("1900-01-01T00:00"),
+             pandas.Timestamp("1900-01-01T00:10")),
+            (pandas.Timestamp("1900-01-01T00:10"),
+             pandas.Timestamp("1900-01-01T00:30"))]
+
+
+def test_run_merge_shards(tmp_path):
+    """Test running shards in several processes and merging them."""
+    import imageio
+    import pandas
+    from sattools.shard import plan_shards, write_specs, run_shard, \
+        merge_shards
+    specs = plan_shards("1900-01-01T00:00", "1900-01-01T04:00", "1h",
+                        out_dir=tmp_path / "out",
+                        func="tests.test_shard.fake_video")
+    paths = write_specs(specs, tmp_path / "specs")
+    assert len(paths) == 4
+    with pytest.raises(RuntimeError, match="shard-00000"):
+        merge_shards(tmp_path / "specs", tmp_path / "merged")
+    # each process acts as a node seeing the same shared directories
+    with concurrent.futures.ProcessPoolExecutor(
+            2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = list(executor.map(run_shard, paths))
+    assert len(results) == 4
+    assert (tmp_path / "specs" / "shard-00003.done.json").exists()
+    # done shards are not run again
+    with unittest.mock.patch("tests.test_shard.fake_video") as tf:
+        assert run_shard(paths[0]) == results[0]
+    tf.assert_not_called()
+    written = merge_shards(tmp_path / "specs", tmp_path / "merged")
+    assert len(written) == 4
+    reader = imageio.get_reader(tmp_path / "merged" / "C14.mp4")
+    assert reader.count_frames() == 12
+    playlist = (tmp_path / "merged" / "C14.m3u8").read_text()
+    assert playlist.count("#EXTINF:0.300,") == 4
+    assert "C14-0300.mp4" in playlist
+    # segments with different frame sizes cannot be merged
+    fake_video(pandas.Timestamp(specs[1]["start_date"]), None,
+               tmp_path / "out" / "shard-00001", None,
+               tmp_path / "ignored.json", "F", size=32)
+    with pytest.raises(ValueError, match="32x32"):
+        merge_shards(tmp_path / "specs", tmp_path / "merged")
+
+
+def test_run_shard_fail(tmp_path):
+    """Test that failures are recorded."""
+    from sattools.shard import plan_shards, write_specs, run_shard
+    specs = plan_shards("1900-01-01T00:00", "1900-01-01T01:00", "1h",
+                        out_dir=tmp_path / "out", fail=True,
+                        func="tests.test_shard.fake_video")
+    (path,) = write_specs(specs, tmp_path)
+    with pytest.raises(OSError):
+        run_shard(path)
+    with (tmp_path / "shard-00000.failed.json").open() as fp:
+        assert json.load(fp)["error"] == "OSError: disk full"
+    assert not (tmp_path / "shard-00000.done.json").exists()
+
+
+@unittest.mock.patch("argparse.ArgumentParser", autospec=True)
+def test_get_parser(ap):
+    """Test argument parsers."""
+    from sattools.processing.shard import (
+            parse_cmdline, get_parser_plan, get_parser_run, get_parser_merge)
+    parse_cmdline(get_parser_plan)
+    assert ap.return_value.add_argument.call_count == 10
+    ap.reset_mock()
+    parse_cmdline(get_parser_run)
+    assert ap.return_value.add_argument.call_count == 1
+    ap.reset_mock()
+    parse_cmdline(get_parser_merge)
+    assert ap.return_value.add_argument.call_count == 4
+
+
+def test_cli(tmp_path, capsys):
+    """Test planning, running, and merging from the command line."""
+    from sattools.processing import shard
+    with unittest.mock.patch("sys.argv", [
+            "show-sat-shard-plan", "1900-01-01T00:00", "1900-01-01T02:00",
+            str(tmp_path / "specs"), str(tmp_path / "out"),
+            "--area", "germ"]):
+        shard.plan()
+    assert len(capsys.readouterr().out.split()) == 2
+    with unittest.mock.patch("sattools.vis.show_video_abi_glm_times",
+                             autospec=True) as svs, \
+            unittest.mock.patch("sys.argv", [
+                "show-sat-shard-run", str(tmp_path / "specs" /
+                                          "shard-00001.json")]):
+        svs.return_value = []
+        shard.run()
+    assert svs.call_args[1]["area"].area_id == "germ"
+    with unittest.mock.patch("sys.argv", [
+            "show-sat-shard-merge", str(tmp_path / "specs"),
+            str(tmp_path / "merged")]):
+        with pytest.raises(RuntimeError):
+            shard.merge()
@@ -8,7 +8,7 @@ def test_get_parser(ap):
     """Test getting argument parser."""
     import sattools.processing.showsat
     sattools.processing.showsat.parse_cmdline()
-    assert ap.return_value.add_argument.call_count == 9
+    assert ap.return_value.add_argument.call_count == 16
 
 
 @patch("satpy.Scene", autospec=True)
@@ -0,0 +1,162 @@
+"""Test generating synthetic archives."""
+
+import os
+import unittest.mock
+
+import numpy
+import pandas
+import pytest
+
+start = pandas.Timestamp("1900-01-01T00:00")
+end = pandas.Timestamp("1900-01-01T00:30")
+
+
+def test_make_abi_glm_scenes():
+    """Test making scenes without files."""
+    from sattools.synth import make_abi_glm_scenes
+    scenes = list(make_abi_glm_scenes(12, abi_every=5, move_every=10))
+    assert len(scenes) == 12
+    assert [len(sc.keys()) for sc in scenes[:6]] == [2, 1, 1, 1, 1, 2]
+    assert scenes[11]["flash_extent_density"].attrs["start_time"] == \
+        pandas.Timestamp("1900-01-01T00:11")
+    assert scenes[10]["C14"].attrs["area"] != scenes[0]["C14"].attrs["area"]
+    assert scenes[0]["C14"].attrs["sensor"] == "abi"
+    assert not numpy.shares_memory(scenes[0]["C14"].values,
+                                   scenes[1]["flash_extent_density"].values)
+
+
+def test_format_pattern():
+    """Test filling a typhon pattern."""
+    from sattools.synth import format_pattern
+    from sattools.glm import pattern_s3_glm_lcfa
+    assert format_pattern(
+            pattern_s3_glm_lcfa, start, start + pandas.Timedelta("20s")) == (
+            "noaa-goes16/GLM-L2-LCFA/1900/001/00/OR_GLM-L2-LCFA_G16_"
+            "s19000010000000_e19000010000200_c19000010000200.nc")
+
+
+def test_get_slots():
+    """Test choosing time slots."""
+    from sattools.synth import get_slots
+    slots = get_slots(start, end, "5min")
+    assert len(slots) == 6
+    assert slots[-1] == (pandas.Timestamp("1900-01-01T00:25"), end)
+    slots = get_slots(start, end, "1min",
+                      gaps=[("1900-01-01T00:10", "1900-01-01T00:12:30")])
+    assert len(slots) == 27
+    assert (pandas.Timestamp("1900-01-01T00:12"),
+            pandas.Timestamp("1900-01-01T00:13")) not in slots
+    slots = get_slots(start, end + pandas.Timedelta("1000min"), "1min",
+                      density=0.5)
+    assert 400 < len(slots) < 600
+    assert slots == get_slots(start, end + pandas.Timedelta("1000min"),
+                              "1min", density=0.5)
+
+
+def test_make_glm_archive(tmp_path, monkeypatch):
+    """Test writing gridded GLM into the NAS tree."""
+    import satpy
+    from sattools.synth import make_glm_archive
+    from sattools.glm import find_glm_coverage_gaps, find_glm_coverage
+    monkeypatch.setenv("NAS_DATA", str(tmp_path / "nas"))
+    files = make_glm_archive(
+            start, end, gaps=[("1900-01-01T00:10", "1900-01-01T00:15")])
+    assert len(files) == 25
+    assert list(find_glm_coverage_gaps(start, end)) == [
+            pandas.Interval(pandas.Timestamp("1900-01-01T00:10"),
+                            pandas.Timestamp("1900-01-01T00:15"))]
+    sc = satpy.Scene(filenames=[str(files[0])], reader="glm_l2")
+    sc.load(["flash_extent_density"])
+    assert sc["flash_extent_density"].shape == (20, 20)
+    assert sc["flash_extent_density"].attrs["start_time"] == start
+    files = make_glm_archive(start, end, sector="M1", lat=30, lon=-90,
+                             move_every=10, empty=True)
+    assert len({f.parents[5] for f in files}) == 3
+    assert files[0].parents[5].name == "30.0_-90.0"
+    assert len(list(find_glm_coverage(
+        start, end, sector="M1", lat=30, lon=-90))) == 10
+
+
+def test_make_abi_archive(tmp_path, monkeypatch):
+    """Test writing ABI to a directory posing as a bucket."""
+    import satpy
+    from fsspec.implementations.local import LocalFileSystem
+    from sattools.synth import make_abi_archive
+    from sattools.abi import get_fsfiles
+    files = make_abi_archive(LocalFileSystem(), start, end, chans=(2, 14),
+                             prefix=str(tmp_path) + "/", density=0.5)
+    assert 0 < len(files) < 6
+    sc = satpy.Scene(filenames=files[:2], reader="abi_l1b")
+    sc.load(["C02", "C14"])
+    assert sc["C02"].shape == (80, 80)
+    assert sc["C14"].shape == (20, 20)
+    assert sc["C14"].attrs["area"].proj_dict["proj"] == "geos"
+    assert 200 < float(sc["C14"].mean()) < 400
+    monkeypatch.chdir(tmp_path)
+    with unittest.mock.patch("s3fs.S3FileSystem") as sS:
+        sS.side_effect = LocalFileSystem
+        assert len(get_fsfiles(start, end, sector="F", chans=14)) == \
+            len(files) // 2
+    files = make_abi_archive(LocalFileSystem(), start, end, sector="M1",
+                             move_every=10, prefix=str(tmp_path) + "/",
+                             empty=True)
+    assert len(files) == 30
+    assert os.path.getsize(files[0]) == 0
+
+
+def test_make_lcfa_archive(tmp_path, monkeypatch):
+    """Test writing LCFA to a directory posing as a bucket."""
+    import xarray
+    from fsspec.implementations.local import LocalFileSystem
+    from sattools.synth import make_lcfa_archive
+    from sattools.glm import ensure_glm_lcfa_for_period
+    files = make_lcfa_archive(LocalFileSystem(), start, end,
+                              prefix=str(tmp_path / "bucket") + "/",
+                              n_flashes=5)
+    assert len(files) == 90
+    with xarray.open_dataset(files[0]) as ds:
+        assert ds.sizes["number_of_flashes"] == 5
+    monkeypatch.chdir(tmp_path / "bucket")
+    with unittest.mock.patch("s3fs.S3FileSystem") as sS:
+        sS.side_effect = LocalFileSystem
+        assert len(list(ensure_glm_lcfa_for_period(
+            start, start + pandas.Timedelta("1min")))) == 3
+
+
+def test_moto_s3():
+    """Test writing to a local S3 server."""
+    pytest.importorskip("moto")
+    from sattools.synth import moto_s3, make_lcfa_archive
+    with moto_s3() as fs:
+        files = make_lcfa_archive(fs, start, start + pandas.Timedelta("1min"),
+                                  empty=True)
+        assert fs.ls("noaa-goes16/GLM-L2-LCFA/1900/001/00") == files
+
+
+@unittest.mock.patch("argparse.ArgumentParser", autospec=True)
+def test_get_parser(ap):
+    """Test argument parser."""
+    from sattools.processing.synth import get_parser
+    get_parser()
+    assert ap.return_value.add_argument.call_count == 14
+
+
+def test_main(tmp_path, monkeypatch, capsys):
+    """Test generating archives from the command line."""
+    from sattools.processing import synth
+    monkeypatch.setenv("NAS_DATA", str(tmp_path / "nas"))
+    with unittest.mock.patch("sys.argv", [
+            "show-sat-synth", "1900-01-01T00:00", "1900-01-01T00:10",
+            "--glm-sector", "C", "--glm-sector", "M1", "--abi-sector", "C",
+            "--lcfa", "--bucket-dir", str(tmp_path / "bucket"),
+            "--gap", "1900-01-01T00:05/1900-01-01T00:06", "--empty"]):
+        synth.main()
+    assert capsys.readouterr().out.splitlines() == [
+            "GLM C: 9 files", "GLM M1: 9 files", "ABI C: 1 files",
+            "LCFA: 27 files"]
+    assert len(list((tmp_path / "nas").rglob("*.nc"))) == 18
+    with unittest.mock.patch("sys.argv", [
+            "show-sat-synth", "1900-01-01T00:00", "1900-01-01T00:10",
+            "--lcfa"]):
+        with pytest.raises(SystemExit):
+            synth.main()
@@ -12,10 +12,10 @@ def test_get_parser(ap):
     from sattools.processing.video import (parse_cmdline, get_parser_files,
                                            get_parser_times)
     parse_cmdline(get_parser_files)
-    assert ap.return_value.add_argument.call_count == 5
+    assert ap.return_value.add_argument.call_count == 7
     ap.reset_mock()
     parse_cmdline(get_parser_times)
-    assert ap.return_value.add_argument.call_count == 8
+    assert ap.return_value.add_argument.call_count == 15
 
 
 @unittest.mock.patch("satpy.MultiScene.from_files", autospec=True)
@@ -70,4 +70,9 @@ def test_video_times(spvp, svs, tmp_path):
             vid_out="video.mp4",
             area="panama",
             sector="F",
-            out_dir=tmp_path / "out")
+            out_dir=tmp_path / "out",
+            frame_cache=None,
+            quicklook=None,
+            segment_duration=None,
+            checkpoint=None,
+            concat_out=None)
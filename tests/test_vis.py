@@ -2,8 +2,9 @@
 
 import datetime
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
 
+import numpy
 import pytest
 import pyresample
 
@@ -51,6 +52,17 @@ def test_show(fakescene, fakearea, tmp_path):
                 show_only_coastlines=fakearea,
                 path_to_coastlines="/coast", label="fish")
     assert S
+    with patch("satpy.Scene") as sS, \
+            patch("sattools.scutil.get_quicklook_scene") as ssg:
+        sS.return_value = fakescene
+        ssg.return_value = fakescene
+        S = sattools.vis.show(
+                ["/tmp/animals/pinguin", "/tmp/animals/polarbear"],
+                comps, chans, ["native"],
+                tmp_path / "out", "{label:s}_{area:s}_{dataset:s}.tiff",
+                reader="pranksat", label="fish", quicklook=5)
+        ssg.assert_called_once_with(fakescene, 5, generate=True)
+    assert S
     empty = Scene()
     with patch("satpy.Scene") as sS:
         sS.return_value = empty
@@ -127,3 +139,242 @@ def test_show_video_from_times(
             vid_out="test.mp4",
             enh_args={})
     assert (tmp_path / "show-vid" / "test.mp4").exists()
+
+
+def test_save_animation(fake_multiscene2, tmp_path):
+    """Test saving an animation with cached frames."""
+    import sattools.vis
+    from sattools.framecache import FrameCache
+    fc = FrameCache(tmp_path / "cache")
+    ms = fake_multiscene2
+    # animation frames must have equal size, so drop the stacked one
+    ms = type(ms)(ms.scenes[:2])
+    with patch.object(sattools.vis, "_render_frame",
+                      wraps=sattools.vis._render_frame) as svr:
+        fns = sattools.vis.save_animation(
+                ms, str(tmp_path / "{name:s}.gif"), frame_cache=fc)
+        # both scenes have identical metadata and data and share frames
+        assert svr.call_count == 4
+        svr.reset_mock()
+        fns2 = sattools.vis.save_animation(
+                ms, str(tmp_path / "{name:s}-2.gif"), frame_cache=fc)
+        svr.assert_not_called()
+        # without source files, frames with different data are not shared
+        ms.scenes[1]["C14"] = ms.scenes[1]["C14"] + 1
+        sattools.vis.save_animation(
+                ms, str(tmp_path / "{name:s}-3.gif"), frame_cache=fc)
+        assert svr.call_count == 1
+    assert len(fns) == len(fns2) == 4
+    assert (tmp_path / "C14.gif").exists()
+    assert (tmp_path / "C14-2.gif").exists()
+
+
+def test_show_video_segments(fake_multiscene3, tmp_path):
+    """Test showing a video in segments with a playlist."""
+    from sattools.vis import show_video_abi_glm_times
+    ms = fake_multiscene3
+    for sc in ms.scenes:
+        sc.save_datasets = MagicMock()
+    with patch("sattools.scutil.get_abi_glm_multiscenes") as ssg:
+        ssg.side_effect = lambda *args, **kwargs: iter([ms])
+        playlists = show_video_abi_glm_times(
+            datetime.datetime(1900, 1, 1, 0, 0),
+            datetime.datetime(1900, 1, 1, 2, 30),
+            out_dir=tmp_path,
+            vid_out="{name:s}-{start_time:%H%M}-{end_time:%H%M}.gif",
+            enh_args={},
+            segment_duration="1h")
+    assert ssg.call_count == 3
+    assert ssg.call_args_list[2][0][:2] == (
+            datetime.datetime(1900, 1, 1, 2, 0),
+            datetime.datetime(1900, 1, 1, 2, 30))
+    ms.scenes[0].save_datasets.assert_called_once()
+    assert len(playlists) == 4
+    text = (tmp_path / "C14.m3u8").read_text()
+    assert text.count("#EXTINF:0.300,") == 3
+    assert "C14-0000-0001.gif" in text
+    assert text.rstrip().endswith("#EXT-X-ENDLIST")
+
+
+def test_write_playlist(tmp_path):
+    """Test that the playlist header matches the segment type."""
+    import imageio
+    from sattools.vis import write_playlist
+    for i in range(2):
+        with imageio.get_writer(
+                tmp_path / f"seg{i:d}.mp4", fps=10,
+                output_params=["-movflags", "frag_keyframe+empty_moov"]) \
+                as w:
+            for _ in range(5):
+                w.append_data(numpy.zeros((16, 16, 3), dtype="u1"))
+        (tmp_path / f"seg{i:d}.ts").write_bytes(b"G" * 188)
+    write_playlist(tmp_path / "ts.m3u8",
+                   [(tmp_path / f"seg{i:d}.ts", 5) for i in range(2)],
+                   10, complete=True)
+    lines = (tmp_path / "ts.m3u8").read_text().splitlines()
+    assert lines[1] == "#EXT-X-VERSION:3"
+    assert not any(ln.startswith("#EXT-X-MAP") for ln in lines)
+    assert lines[-2:] == ["seg1.ts", "#EXT-X-ENDLIST"]
+    write_playlist(tmp_path / "mp4.m3u8",
+                   [(tmp_path / f"seg{i:d}.mp4", 5) for i in range(2)],
+                   10, complete=False)
+    lines = (tmp_path / "mp4.m3u8").read_text().splitlines()
+    assert lines[1] == "#EXT-X-VERSION:7"
+    maps = [ln for ln in lines if ln.startswith("#EXT-X-MAP")]
+    assert maps[1].startswith('#EXT-X-MAP:URI="seg1.mp4",BYTERANGE="')
+    # the initialisation section is ftyp and moov, media start with moof
+    init = int(maps[0].split('"')[3].split("@")[0])
+    (length, start) = map(int, lines[-2].split(":")[1].split("@"))
+    assert start == init
+    content = (tmp_path / "seg0.mp4").read_bytes()
+    assert content[4:8] == b"ftyp"
+    assert content[start+4:start+8] == b"moof"
+    assert start + length <= len(content)
+    assert lines[-1] == "seg1.mp4"
+
+
+def test_show_video_segments_resume(fake_multiscene3, tmp_path):
+    """Test resuming segmented video processing from a checkpoint."""
+    import json
+    from sattools.vis import show_video_abi_glm_times
+    ms = fake_multiscene3
+    for sc in ms.scenes:
+        sc.save_datasets = MagicMock()
+    n = 0
+
+    def fake_get(start, end, *args, **kwargs):
+        nonlocal n
+        n += 1
+        if n == 2:
+            raise OSError("S3 hiccup")
+        for sc in ms.scenes:
+            for did in sc.keys():
+                sc[did].attrs["start_time"] = start
+        return iter([ms])
+    kwargs = dict(
+            start_date=datetime.datetime(1900, 1, 1, 0, 0),
+            end_date=datetime.datetime(1900, 1, 1, 2, 30),
+            out_dir=tmp_path,
+            vid_out="{name:s}-{start_time:%H%M}.gif",
+            enh_args={},
+            segment_duration="1h",
+            checkpoint=tmp_path / "checkpoint.json")
+    with patch("sattools.scutil.get_abi_glm_multiscenes") as ssg:
+        ssg.side_effect = fake_get
+        with pytest.raises(OSError):
+            show_video_abi_glm_times(**kwargs)
+        state = json.loads((tmp_path / "checkpoint.json").read_text())
+        assert list(state["segments"]) == ["1900-01-01T00:00:00"]
+        with patch("sattools.vis.concat_videos") as svc:
+            written = show_video_abi_glm_times(
+                    **kwargs, concat_out="{name:s}-all.gif")
+        assert ssg.call_count == 4
+        assert ssg.call_args_list[2][0][0] == datetime.datetime(
+                1900, 1, 1, 1, 0)
+        assert tmp_path / "C14-all.gif" in written
+        svc.assert_any_call(
+                [str(tmp_path / f"C14-{h:02d}00.gif") for h in range(3)],
+                tmp_path / "C14-all.gif")
+        state = json.loads((tmp_path / "checkpoint.json").read_text())
+        assert len(state["segments"]) == 3
+        # all done, nothing left to process
+        show_video_abi_glm_times(**kwargs)
+        assert ssg.call_count == 4
+        # a segment whose output is lost is processed again
+        (tmp_path / "C14-0100.gif").unlink()
+        show_video_abi_glm_times(**kwargs)
+        assert ssg.call_count == 5
+        with pytest.raises(ValueError):
+            show_video_abi_glm_times(
+                    **{**kwargs, "segment_duration": "30min"})
+        with pytest.raises(ValueError):
+            show_video_abi_glm_times(
+                    **{**kwargs, "segment_duration": None})
+        for (k, v) in [("area", "germ"), ("sector", "C"), ("quicklook", 4),
+                       ("enh_args", {"enhance": False}),
+                       ("vid_out", "{name:s}-{start_time:%H%M}.mp4")]:
+            with pytest.raises(ValueError, match=f"is for {k:s}"):
+                show_video_abi_glm_times(**{**kwargs, k: v})
+        assert ssg.call_count == 5
+    ms.scenes[0].save_datasets.assert_called_once()
+
+
+def test_concat_videos(tmp_path):
+    """Test concatenating videos without re-encoding."""
+    import imageio
+    from sattools.vis import concat_videos
+    files = []
+    for i in range(3):
+        fn = tmp_path / f"seg{i:d}.mp4"
+        with imageio.get_writer(fn, fps=10) as writer:
+            for _ in range(5):
+                writer.append_data(numpy.full((16, 16, 3), 50*i, "u1"))
+        files.append(fn)
+    concat_videos(files, tmp_path / "all.mp4")
+    reader = imageio.get_reader(tmp_path / "all.mp4")
+    assert reader.count_frames() == 15
+    assert not list(tmp_path.glob("*.txt"))
+
+
+def test_show_cog(fakescene, tmp_path):
+    """Test writing cloud optimised geotiffs."""
+    import rasterio
+    import sattools.vis
+    chunks = fakescene["raspberry"].chunks
+    with patch("satpy.Scene") as sS:
+        sS.return_value = fakescene
+        S = sattools.vis.show(
+                ["/tmp/animals/pinguin"], ["raspberry"], [], ["native"],
+                tmp_path, "{area:s}_{dataset:s}.tif", cog=True)
+    assert fakescene["raspberry"].chunks == chunks
+    assert tmp_path / "native_raspberry.tif" in S
+    with rasterio.open(tmp_path / "native_raspberry.tif") as src:
+        assert src.profile["tiled"]
+        assert src.profile["compress"] == "deflate"
+    assert not list(tmp_path.glob("*tmp"))
+
+
+def test_show_strategy(fakescene, tmp_path):
+    """Test choosing whether to composite or resample first."""
+    import sattools.vis
+    fakescene.load = MagicMock()
+    fakescene.save_dataset = MagicMock()
+    fakescene.resample = MagicMock()
+    fakescene.resample.return_value = fakescene
+    with patch("satpy.Scene") as sS:
+        sS.return_value = fakescene
+        sattools.vis.show(
+                ["/tmp/animals/pinguin"], ["raspberry"], [],
+                ["fribbulus xax"], tmp_path, "{area:s}_{dataset:s}.tif",
+                strategy="resample_first")
+        fakescene.load.assert_called_with([], generate=False)
+        fakescene.resample.assert_called_once_with("fribbulus xax")
+        with pytest.raises(ValueError):
+            sattools.vis.show(
+                    ["/tmp/animals/pinguin"], ["raspberry"], [],
+                    ["fribbulus xax"], tmp_path, "{area:s}_{dataset:s}.tif",
+                    strategy="whatever_first")
+
+
+def test_estimate_composite_strategy(fakescene, fakearea):
+    """Test estimating the cheaper strategy from pixel counts."""
+    from sattools.vis import estimate_composite_strategy
+    small = fakearea.aggregate(x=5, y=5)
+    assert estimate_composite_strategy(fakescene, small) == "composite_first"
+    with patch.object(type(fakescene), "missing_datasets",
+                      new_callable=PropertyMock) as smd:
+        smd.return_value = {"purple"}
+        assert estimate_composite_strategy(
+                fakescene, small) == "resample_first"
+        assert estimate_composite_strategy(
+                fakescene, fakearea) == "composite_first"
+        assert estimate_composite_strategy(
+                fakescene, "fribbulus xax") == "composite_first"
+        with patch("sattools.ptc.get_all_areas") as sga:
+            sga.return_value = {"small": small, "large": fakearea}
+            assert estimate_composite_strategy(
+                    fakescene, "small") == "resample_first"
+            assert estimate_composite_strategy(
+                    fakescene, "large") == "composite_first"
+            assert estimate_composite_strategy(
+                    fakescene, "nowhere") == "composite_first"